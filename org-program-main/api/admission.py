@@ -0,0 +1,301 @@
+"""
+Admission control for expensive routes, so bulk ingestion cannot starve browsing.
+
+Requests are sorted into route classes (ROUTE_CLASSES): `uploads` (asset uploads
+and imports), `exports` (DC/JSONL/CSV export, OAI-PMH) and `reads` (other GETs).
+Each class has
+  - a concurrency limit: requests beyond it wait in a bounded FIFO queue, for at
+    most ADMISSION_MAX_WAIT seconds; a full queue or an expired wait is answered
+    with 503 and Retry-After;
+  - an optional per-client token bucket: a client that exceeds its rate gets 429
+    with Retry-After set to when its next token is due.
+Other requests (item edits, health checks, metrics, the SSE stream) pass straight through.
+
+Configuration (environment), per class (UPLOADS, EXPORTS, READS):
+    ADMISSION=on|off
+    ADMISSION_<CLASS>_CONCURRENCY   requests handled at once (0 = unlimited)
+    ADMISSION_<CLASS>_QUEUE         requests allowed to wait for a slot
+    ADMISSION_<CLASS>_RATE          requests/second per client (0 = no bucket)
+    ADMISSION_<CLASS>_BURST         bucket size (default: 2 x rate, at least 1)
+    ADMISSION_MAX_WAIT=10           seconds a queued request may wait
+    ADMISSION_CLIENT_HEADER         e.g. X-Forwarded-For behind a trusted proxy
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Pattern, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+UPLOADS = "uploads"
+EXPORTS = "exports"
+READS = "reads"
+
+# (class, methods, path pattern); first match wins, unmatched requests are not limited
+ROUTE_CLASSES: List[Tuple[Optional[str], Sequence[str], Pattern[str]]] = [
+    (UPLOADS, ("POST",), re.compile(r"^/api/items/[^/]+/assets(/batch|/staged)?$")),
+    (UPLOADS, ("POST",), re.compile(r"^/api/import/")),
+    (EXPORTS, ("GET", "POST"), re.compile(r"^/api/(export|oai)(/|$)")),
+    # Long-lived streams and operational endpoints must never queue
+    (None, ("GET",), re.compile(r"^/(api/events/|api/debug/|metrics$|health$|$)")),
+    (READS, ("GET", "HEAD"), re.compile(r"^/")),
+]
+
+DEFAULTS = {
+    # EXIF parsing and hashing are CPU-bound; a few at a time leaves cores for reads
+    UPLOADS: {"concurrency": 4, "queue": 32, "rate": 0.0, "burst": 0},
+    EXPORTS: {"concurrency": 2, "queue": 4, "rate": 0.0, "burst": 0},
+    READS: {"concurrency": 64, "queue": 256, "rate": 0.0, "burst": 0},
+}
+# Token buckets kept per class; the least recently seen clients are forgotten first
+MAX_CLIENTS = 10000
+
+
+def admission_enabled() -> bool:
+    return os.getenv("ADMISSION", "on").lower() not in ("0", "off", "false")
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    for route_class, methods, pattern in ROUTE_CLASSES:
+        if method in methods and pattern.match(path):
+            return route_class
+    return None
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    Counting semaphore with a bounded FIFO wait queue. Slots are handed straight
+    to the oldest waiter on release, so a steady stream of new arrivals cannot
+    overtake queued requests. Thread-safe and not tied to one event loop.
+    """
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        """True once a slot is held; False if the queue is full or the wait timed out."""
+        if self.limit <= 0:
+            return True
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return True
+            if len(self._waiters) >= self.queue_size:
+                return False
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Client went away while queued: give back a slot handed over meanwhile
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release()
+            raise
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def release(self) -> None:
+        if self.limit <= 0:
+            return
+        with self._lock:
+            if self._waiters:
+                # The slot passes to the waiter; `active` is unchanged
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            else:
+                self.active -= 1
+
+
+class TokenBuckets:
+    """Per-client token buckets; take() returns 0 when admitted, else seconds until a token is due."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(1, burst or int(rate * 2))
+        self.max_clients = max_clients
+        # client -> [tokens, last refill (monotonic)]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, client: str, now: Optional[float] = None) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [float(self.burst), now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate
+
+
+class RouteClass:
+    def __init__(self, name: str, concurrency: int, queue: int, rate: float, burst: int):
+        self.name = name
+        self.limiter = ConcurrencyLimiter(concurrency, queue)
+        self.buckets = TokenBuckets(rate, burst)
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+def classes_from_env() -> Dict[str, RouteClass]:
+    classes = {}
+    for name, defaults in DEFAULTS.items():
+        prefix = f"ADMISSION_{name.upper()}_"
+        classes[name] = RouteClass(
+            name,
+            concurrency=_env_number(prefix + "CONCURRENCY", defaults["concurrency"], int),
+            queue=_env_number(prefix + "QUEUE", defaults["queue"], int),
+            rate=_env_number(prefix + "RATE", defaults["rate"], float),
+            burst=_env_number(prefix + "BURST", defaults["burst"], int),
+        )
+    return classes
+
+
+# --- Metrics ---
+
+REJECTED = metrics.register(
+    metrics.Counter("org_admission_rejected_total", "Requests turned away by admission control.", ("class", "reason"))
+)
+WAIT_TIME = metrics.register(
+    metrics.Histogram("org_admission_wait_seconds", "Time admitted requests spent queued for a slot.", ("class",))
+)
+# Classes of the most recently built middleware, read at scrape time
+_live_classes: Dict[str, RouteClass] = {}
+
+
+def _class_samples(attr: str):
+    def collect():
+        return [((name,), getattr(rc.limiter, attr)) for name, rc in list(_live_classes.items())]
+
+    return collect
+
+
+metrics.register(metrics.Gauge("org_admission_active", "Requests holding a slot, by class.", ("class",), _class_samples("active")))
+metrics.register(metrics.Gauge("org_admission_queued", "Requests waiting for a slot, by class.", ("class",), _class_samples("queued")))
+
+
+class AdmissionMiddleware:
+    """Apply per-client rate limits and per-class concurrency limits before routing."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        classes: Optional[Dict[str, RouteClass]] = None,
+        max_wait: Optional[float] = None,
+        client_header: Optional[str] = None,
+    ):
+        self.app = app
+        self.classes = classes if classes is not None else classes_from_env()
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+        client_header = client_header if client_header is not None else os.getenv("ADMISSION_CLIENT_HEADER", "")
+        self._client_key = client_header.lower().encode("latin-1") if client_header else None
+        _live_classes.clear()
+        _live_classes.update(self.classes)
+
+    def _client(self, scope: Scope) -> str:
+        if self._client_key is not None:
+            for key, value in scope.get("headers", ()):
+                if key == self._client_key:
+                    # X-Forwarded-For: the first entry is the original client
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = self.classes.get(classify(scope.get("method", "GET"), scope.get("path", "")))
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_in = route_class.buckets.take(self._client(scope))
+        if retry_in:
+            REJECTED.inc(route_class.name, "rate")
+            await _reject(send, 429, "Too many requests, slow down", retry_in)
+            return
+
+        started = time.perf_counter()
+        if not await route_class.limiter.acquire(self.max_wait):
+            REJECTED.inc(route_class.name, "busy")
+            logger.info("shed %s request %s (server busy)", route_class.name, scope.get("path"))
+            # Roughly one queue's worth of work before a retry has a chance
+            await _reject(send, 503, "Server busy, try again later", self.max_wait)
+            return
+        WAIT_TIME.observe(time.perf_counter() - started, route_class.name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.limiter.release()
+
+
+async def _reject(send: Send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
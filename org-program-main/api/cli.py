@@ -0,0 +1,174 @@
+"""
+Command-line entry points for long-running maintenance tasks.
+
+    python -m api.cli import-archive /path/to/collection [--sidecar fields.csv]
+    python -m api.cli import-archive --resume <job-id>
+    python -m api.cli import-dc records.xml
+    python -m api.cli reenrich [--rate 200] [--resume <job-id>]
+    python -m api.cli backfill-phash
+    python -m api.cli similarity [--refresh]
+    python -m api.cli fixity [--now] [--max-mbps 50] [--period-days 90]
+    python -m api.cli migrate
+
+Service modules are imported inside each command, so a command only pays for
+the imports it uses.
+"""
+import argparse
+import json
+import sys
+import uuid
+from pathlib import Path
+
+from .db import SCHEMA_VERSION, ensure_schema, get_session, migrate, schema_version
+from .logs import configure_logging
+
+
+def _import_archive(args: argparse.Namespace) -> int:
+    from .models import ImportJob
+    from .services.archive_import import import_report, run_import
+
+    if args.resume:
+        job_id = uuid.UUID(args.resume)
+    else:
+        if not args.source:
+            print("error: SOURCE is required unless --resume is given", file=sys.stderr)
+            return 2
+        with get_session() as session:
+            job = ImportJob(
+                source=str(Path(args.source).resolve()),
+                sidecar=str(Path(args.sidecar).resolve()) if args.sidecar else None,
+            )
+            session.add(job)
+            session.commit()
+            job_id = job.id
+        print(f"Started import job {job_id} (resume with --resume {job_id})")
+
+    job = run_import(job_id, batch_size=args.batch_size, workers=args.workers)
+    print(json.dumps({"job_id": str(job.id), "status": job.status, "error": job.error, **import_report(job)}, indent=2))
+    return 0 if job.status == "completed" else 1
+
+
+def _import_dc(args: argparse.Namespace) -> int:
+    from .services.dc_import import import_records, iter_dc_csv, iter_dc_xml
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "xml")
+    with open(args.path, "rb") as f:
+        records = iter_dc_csv(f) if fmt == "csv" else iter_dc_xml(f)
+        stats = import_records(records, batch_size=args.batch_size)
+    print(json.dumps({"format": fmt, **stats}, indent=2))
+    return 0
+
+
+def _reenrich(args: argparse.Namespace) -> int:
+    from .services.enrichment import rule_stats
+    from .services.reenrichment import create_job, enrichment_report, run_reenrichment
+
+    if args.resume:
+        job_id = uuid.UUID(args.resume)
+    else:
+        with get_session() as session:
+            job_id = create_job(session, args.batch_size, args.rate).id
+        print(f"Started enrichment job {job_id} (resume with --resume {job_id})")
+
+    job = run_reenrichment(job_id)
+    report = {"job_id": str(job.id), "status": job.status, "error": job.error, **enrichment_report(job)}
+    print(json.dumps({**report, "rules": rule_stats()}, indent=2))
+    return 0 if job.status == "completed" else 1
+
+
+def _backfill_phash(args: argparse.Namespace) -> int:
+    from .services.phash import backfill_phash
+
+    stats = backfill_phash(batch_size=args.batch_size, workers=args.workers)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def _similarity(args: argparse.Namespace) -> int:
+    from .services.similarity import rebuild_similarity, refresh_similarity
+
+    stats = refresh_similarity() if args.refresh else rebuild_similarity(top_k=args.top_k)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def _fixity(args: argparse.Namespace) -> int:
+    from .services.fixity import fixity_report, scrub
+
+    # Unset options fall back to FIXITY_* environment settings
+    options = {"period_days": args.period_days, "max_mbps": args.max_mbps, "workers": args.workers}
+    try:
+        stats = scrub(now_only=args.now, **{k: v for k, v in options.items() if v is not None})
+    except KeyboardInterrupt:
+        # Progress is checkpointed per batch; the next run resumes
+        stats = {"interrupted": True}
+    with get_session() as session:
+        report = fixity_report(session, failure_limit=20)
+    print(json.dumps({**stats, **report}, indent=2, default=str))
+    return 0 if not report["failures"] else 1
+
+
+def _migrate(args: argparse.Namespace) -> int:
+    before = schema_version()
+    if args.check:
+        print(json.dumps({"schema_version": before, "expected": SCHEMA_VERSION}, indent=2))
+        return 0 if before >= SCHEMA_VERSION else 1
+    migrate()
+    print(json.dumps({"from": before, "to": SCHEMA_VERSION}, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m api.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    imp = commands.add_parser("import-archive", help="Import a directory tree or ZIP as items with assets")
+    imp.add_argument("source", nargs="?", help="Directory or .zip to import")
+    imp.add_argument("--sidecar", help="CSV of Dublin Core fields with a path/file column")
+    imp.add_argument("--batch-size", type=int, default=500)
+    imp.add_argument("--workers", type=int, default=None, help="EXIF worker processes (0 = in-process)")
+    imp.add_argument("--resume", metavar="JOB_ID", help="Resume an interrupted import job")
+    imp.set_defaults(func=_import_archive)
+
+    dc = commands.add_parser("import-dc", help="Import Dublin Core records from XML or CSV")
+    dc.add_argument("path", help="DC XML (<records>) or CSV file")
+    dc.add_argument("--format", choices=["xml", "csv"], help="Defaults to the file extension")
+    dc.add_argument("--batch-size", type=int, default=1000)
+    dc.set_defaults(func=_import_dc)
+
+    ren = commands.add_parser("reenrich", help="Re-run enrichment rules over existing items from stored assets")
+    ren.add_argument("--batch-size", type=int, default=200)
+    ren.add_argument("--rate", type=float, default=None, help="Max items per second (default: unthrottled)")
+    ren.add_argument("--resume", metavar="JOB_ID", help="Resume an interrupted enrichment job")
+    ren.set_defaults(func=_reenrich)
+
+    ph = commands.add_parser("backfill-phash", help="Compute perceptual hashes for image assets that lack one")
+    ph.add_argument("--batch-size", type=int, default=500)
+    ph.add_argument("--workers", type=int, default=None, help="Hashing processes (0 = in-process)")
+    ph.set_defaults(func=_backfill_phash)
+
+    sim = commands.add_parser("similarity", help="Build the similar-items table (TF-IDF top-k neighbours)")
+    sim.add_argument("--refresh", action="store_true", help="Only apply item changes since the last build")
+    sim.add_argument("--top-k", type=int, default=10)
+    sim.set_defaults(func=_similarity)
+
+    fix = commands.add_parser("fixity", help="Verify stored assets against their checksums, paced over a period")
+    fix.add_argument("--now", action="store_true", help="Finish a full pass at the bandwidth cap, then exit")
+    fix.add_argument("--max-mbps", type=float, default=None, help="Read bandwidth cap in MiB/s (FIXITY_MAX_MBPS, 50)")
+    fix.add_argument("--period-days", type=float, default=None, help="Days per full pass (FIXITY_PERIOD_DAYS, 90)")
+    fix.add_argument("--workers", type=int, default=None, help="Hashing threads (FIXITY_WORKERS, 2)")
+    fix.set_defaults(func=_fixity)
+
+    mig = commands.add_parser("migrate", help="Create or upgrade the schema (run once per deploy, before workers)")
+    mig.add_argument("--check", action="store_true", help="Only report whether the schema is current (exit 1 if not)")
+    mig.set_defaults(func=_migrate)
+
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.func is not _migrate:
+        ensure_schema()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 import os
 from contextlib import contextmanager
-from typing import Iterator
+from pathlib import Path
+from typing import Iterable, Iterator
 
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 
 def get_database_url() -> str:
@@ -14,6 +15,11 @@ def get_upload_dir() -> str:
     return os.getenv("UPLOAD_DIR", "./uploads")
 
 
+def to_stored_path(path: Path) -> str:
+    # Asset.file_path is kept relative to the working directory when possible
+    return str(path.relative_to(Path.cwd())) if str(path).startswith(str(Path.cwd())) else str(path)
+
+
 engine = create_engine(
     get_database_url(),
     connect_args={"check_same_thread": False} if get_database_url().startswith("sqlite") else {},
@@ -21,24 +27,167 @@ engine = create_engine(
 )
 
 
+def _add_missing_column(conn, table: str, column: str, ddl: str) -> None:
+    # create_all() never alters existing tables, so columns added later are added here
+    existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+# Bump whenever init_db()/create_fts_tables() change, so existing databases are
+# migrated again on the next `python -m api.cli migrate` or app startup
+SCHEMA_VERSION = 6
+
+_schema_ready = False
+
+
 def init_db() -> None:
     from . import models  # noqa: F401 - ensure models are imported for SQLModel metadata
     SQLModel.metadata.create_all(engine)
+    # create_all() only indexes tables it creates; add indexes introduced later
+    with engine.begin() as conn:
+        _add_missing_column(conn, "asset", "phash", "BIGINT")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_asset_checksum ON asset (checksum)")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_asset_phash ON asset (phash)")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_item_updated_at_id ON item (updated_at, id)")
+        _add_missing_column(conn, "item", "date_start", "INTEGER")
+        _add_missing_column(conn, "item", "date_end", "INTEGER")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_item_date_range ON item (date_start, date_end)")
+        _backfill_date_range(conn)
+        _move_inline_metadata(conn)
+        _backfill_item_summary(conn)
+
+
+def _backfill_date_range(conn, batch: int = 5000) -> None:
+    # Parse the free-form dates of items written before date_start/date_end existed
+    from .services.dates import date_columns
+
+    last_rowid = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            "SELECT rowid, date FROM item WHERE rowid > ? AND date IS NOT NULL AND date_start IS NULL "
+            "ORDER BY rowid LIMIT ?",
+            (last_rowid, batch),
+        ).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        values = []
+        for rowid, date in rows:
+            columns = date_columns(date)
+            if columns["date_start"] is not None:
+                values.append((columns["date_start"], columns["date_end"], rowid))
+        if values:
+            conn.exec_driver_sql("UPDATE item SET date_start = ?, date_end = ? WHERE rowid = ?", values)
+
+
+def _backfill_item_summary(conn) -> None:
+    # Summary rows for items written before the itemsummary table existed
+    from .services.item_summary import backfill_summaries
+
+    backfill_summaries(conn)
+
+
+def _move_inline_metadata(conn, batch: int = 1000) -> None:
+    # EXIF/OCR used to be JSON columns on asset; copy them into the compressed
+    # assetmetadata side table, then drop the columns (SQLite 3.35+)
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(asset)")}
+    inline = [c for c in ("exif_json", "ocr_json") if c in columns]
+    if not inline:
+        return
+    import json
+    import uuid
+
+    from sqlalchemy import insert
+
+    from .models import AssetMetadata
+    from .services.asset_metadata import metadata_row
+
+    kinds = {"exif_json": "exif", "ocr_json": "ocr"}
+    last_rowid = 0
+    while True:
+        rows = conn.exec_driver_sql(
+            f"SELECT rowid, id, {', '.join(inline)} FROM asset WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (last_rowid, batch),
+        ).fetchall()
+        if not rows:
+            break
+        last_rowid = rows[-1][0]
+        values = [
+            metadata_row(uuid.UUID(row[1]), kinds[column], json.loads(raw))
+            for row in rows
+            for column, raw in zip(inline, row[2:])
+            if raw is not None
+        ]
+        if values:
+            conn.execute(insert(AssetMetadata).prefix_with("OR IGNORE"), values)
+    for column in inline:
+        conn.exec_driver_sql(f"ALTER TABLE asset DROP COLUMN {column}")
+
+
+# Prefix indexes for 2- and 3-character prefixes make typeahead `term*` queries
+# index lookups instead of full term-list scans (see services/suggest.py)
+FTS_PREFIXES = "2 3"
 
 
 def create_fts_tables() -> None:
-    # Create a simple contentless FTS5 table for items search across title/description/ocr_text
+    # Create a simple FTS5 table for items search across title/description/ocr_text
+    ddl = f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {{name}} USING fts5(
+            item_id UNINDEXED,
+            title,
+            description,
+            ocr_text,
+            prefix='{FTS_PREFIXES}'
+        );
+    """
+    with engine.begin() as conn:
+        existing = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'item_fts'").scalar()
+        if existing is None:
+            conn.exec_driver_sql(ddl.format(name="item_fts"))
+        elif "prefix=" not in existing:
+            # Tables created before prefix indexes existed are rebuilt once, in one transaction
+            conn.exec_driver_sql(ddl.format(name="item_fts_rebuild"))
+            conn.exec_driver_sql(
+                "INSERT INTO item_fts_rebuild (item_id, title, description, ocr_text) "
+                "SELECT item_id, title, description, ocr_text FROM item_fts"
+            )
+            conn.exec_driver_sql("DROP TABLE item_fts")
+            conn.exec_driver_sql("ALTER TABLE item_fts_rebuild RENAME TO item_fts")
+
+
+def schema_version() -> int:
     with engine.connect() as conn:
-        conn.exec_driver_sql(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS item_fts USING fts5(
-                item_id UNINDEXED,
-                title,
-                description,
-                ocr_text
-            );
-            """
-        )
+        return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def migrate() -> int:
+    """
+    Create tables, columns, indexes and the FTS table, then stamp SCHEMA_VERSION
+    into the database (PRAGMA user_version). Safe to run repeatedly.
+    """
+    global _schema_ready
+    init_db()
+    create_fts_tables()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {int(SCHEMA_VERSION)}")
+    _schema_ready = True
+    return SCHEMA_VERSION
+
+
+def ensure_schema() -> bool:
+    """
+    Worker-boot check: one PRAGMA read when the database is already current, a
+    full migrate() otherwise. Returns True if a migration ran.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return False
+    if schema_version() >= SCHEMA_VERSION:
+        _schema_ready = True
+        return False
+    migrate()
+    return True
 
 
 def reset_fts_for_item(session: Session, item_id: str, title: str, description: str, ocr_text: str) -> None:
@@ -51,6 +200,37 @@ def reset_fts_for_item(session: Session, item_id: str, title: str, description:
     )
 
 
+def insert_fts_rows(session: Session, rows: Iterable[dict]) -> None:
+    # Bulk variant for freshly created items (no existing rows to clear).
+    # Each row needs item_id, title, description and ocr keys.
+    params = [
+        {
+            "item_id": r["item_id"],
+            "title": r.get("title") or "",
+            "description": r.get("description") or "",
+            "ocr": r.get("ocr") or "",
+        }
+        for r in rows
+    ]
+    if params:
+        session.connection().execute(
+            text(
+                "INSERT INTO item_fts (item_id, title, description, ocr_text) VALUES (:item_id, :title, :description, :ocr)"
+            ),
+            params,
+        )
+
+
+def delete_fts_rows(session: Session, item_ids: Iterable[str]) -> None:
+    # Bulk counterpart of the DELETE in reset_fts_for_item
+    item_ids = list(item_ids)
+    if item_ids:
+        session.exec(
+            text("DELETE FROM item_fts WHERE item_id IN :item_ids").bindparams(bindparam("item_ids", expanding=True)),
+            params={"item_ids": item_ids},
+        )
+
+
 @contextmanager
 def get_session() -> Iterator[Session]:
     with Session(engine) as session:
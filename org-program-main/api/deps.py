@@ -1,6 +1,8 @@
-from typing import Iterator
+import os
+from pathlib import Path
+from typing import Iterator, Optional
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from sqlmodel import Session
 
 from .db import get_session
@@ -9,3 +11,24 @@ from .db import get_session
 def get_db_session() -> Iterator[Session]:
     with get_session() as session:
         yield session
+
+
+def resolve_import_path(path: Optional[str]) -> Optional[str]:
+    """
+    Resolve a server-side path for imports and staged uploads. Relative paths are
+    taken from IMPORT_ROOT, and the result (after symlinks) must lie inside it.
+    Without IMPORT_ROOT the server reads no paths at all: anything copied into
+    the asset store becomes public under /uploads.
+    """
+    if not path:
+        return None
+    import_root = os.getenv("IMPORT_ROOT")
+    if not import_root:
+        raise HTTPException(status_code=403, detail="Server-side imports are disabled; set IMPORT_ROOT to enable them")
+    root = Path(import_root).resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise HTTPException(status_code=400, detail="Path is outside IMPORT_ROOT")
+    if not resolved.exists():
+        raise HTTPException(status_code=400, detail=f"Path not found: {path}")
+    return str(resolved)
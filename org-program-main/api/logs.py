@@ -0,0 +1,192 @@
+"""
+Leveled, structured logging for the api package.
+
+Modules log through `logging.getLogger(__name__)` with %-style arguments, so a
+disabled level costs one level check and no string formatting. Extra context goes
+in `extra={...}` and is rendered as key=value pairs (text) or JSON fields (json).
+
+Configuration (environment):
+    LOG_LEVEL=INFO                               level for the whole api package
+    LOG_LEVELS=api.services.exif=DEBUG,...       per-module overrides
+    LOG_FORMAT=text|json
+    LOG_SAMPLE=api.services.exif=100,...         keep 1 in N DEBUG/INFO records per call site
+"""
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ROOT_LOGGER = "api"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("org_request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, object]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RESERVED}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the id of the HTTP request it was logged under (or None)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keep one in `every` DEBUG/INFO records per call site (logger, file, line), so
+    per-file events stay visible at ingest rates without flooding the output.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._counters: Dict[tuple, "itertools.count[int]"] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            counter = self._counters.setdefault(key, itertools.count())
+            seen = next(counter)
+        if seen % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = _extra_fields(record)
+        if getattr(record, "request_id", None):
+            fields = {"request_id": record.request_id, **fields}
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        payload.update(_extra_fields(record))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for part in value.split(","):
+        name, sep, setting = part.partition("=")
+        if sep and name.strip() and setting.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(force: bool = False) -> logging.Logger:
+    """
+    Install the api package's handler, levels and samplers from the environment.
+    Runs once per process unless `force` is set (e.g. after changing LOG_* in tests).
+    """
+    global _configured
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER)
+        if _configured and not force:
+            return root
+
+        for handler in [h for h in root.handlers if getattr(h, "_org_handler", False)]:
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(sys.stderr)
+        handler._org_handler = True
+        handler.addFilter(RequestIdFilter())
+        fmt = os.getenv("LOG_FORMAT", "text").lower()
+        handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        root.addHandler(handler)
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        # The api tree has its own handler; don't repeat records through the root logger
+        root.propagate = False
+
+        for name, level in _parse_pairs(os.getenv("LOG_LEVELS", "")).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        # Logger filters run only for records that passed the level check
+        for name in list(logging.Logger.manager.loggerDict):
+            logger = logging.getLogger(name)
+            for existing in [f for f in logger.filters if isinstance(f, SampleFilter)]:
+                logger.removeFilter(existing)
+        for name, every in _parse_pairs(os.getenv("LOG_SAMPLE", "")).items():
+            try:
+                logging.getLogger(name).addFilter(SampleFilter(int(every)))
+            except ValueError:
+                root.warning("ignoring LOG_SAMPLE entry %s=%s", name, every)
+
+        _configured = True
+        return root
+
+
+class RequestIdMiddleware:
+    """
+    Bind a request id (the client's X-Request-ID, or a new one) to every log record
+    written while handling the request, and echo it in the response headers.
+    """
+
+    def __init__(self, app: ASGIApp, header: str = "X-Request-ID"):
+        self.app = app
+        self.header = header
+        self._header_key = header.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == self._header_key:
+                # Client-supplied ids are trusted only when short and printable
+                candidate = value.decode("latin-1")
+                if 0 < len(candidate) <= 64 and candidate.isprintable():
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -1,17 +1,51 @@
+import logging
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 
-from .db import init_db, create_fts_tables
-from .routers import items as items_router
-from .routers import assets as assets_router
-from .routers import export as export_router
-from .db import get_upload_dir
+from .db import engine, ensure_schema, get_upload_dir
+from . import admission, metrics, profiling
+from .logs import RequestIdMiddleware, configure_logging
+from .responses import CompressionMiddleware, select_json_response_class
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes belong to the one-off `python -m api.cli migrate` step of a
+    # deploy; a booting worker only reads the stamped schema version (and migrates
+    # if it is behind, unless MIGRATE_ON_STARTUP=off)
+    if os.getenv("MIGRATE_ON_STARTUP", "on").lower() not in ("0", "off", "false"):
+        if ensure_schema():
+            logger.info("database schema migrated at startup")
+    Path(get_upload_dir()).mkdir(parents=True, exist_ok=True)
+    # Typeahead dictionaries take one scan of the item table; do it off the request path
+    from .services.suggest import warm_in_background
+
+    warm_in_background()
+    # Opt-in integrity scrubbing in this worker (FIXITY_SCRUB=on; one worker per store)
+    from .services.fixity import start_in_background, stop_background
+
+    start_in_background()
+    yield
+    stop_background()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Org Program API", openapi_url="/openapi.json")
+    configure_logging()
+
+    # Only override the response class when it is actually faster (see responses.py)
+    app_kwargs = {}
+    json_response = select_json_response_class()
+    if json_response is not None:
+        app_kwargs["default_response_class"] = json_response
+    app = FastAPI(title="Org Program API", openapi_url="/openapi.json", lifespan=lifespan, **app_kwargs)
 
     # CORS middleware for frontend development
     origins = [
@@ -35,25 +69,85 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Serve uploaded files for development convenience
-    try:
-        upload_dir = get_upload_dir()
-        app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
-        print(f"[DEBUG][main] Mounted /uploads static dir: {upload_dir}")
-    except Exception as e:
-        print(f"[DEBUG][main] Failed to mount /uploads: {e}")
+    # Negotiated gzip/br compression; item payloads with EXIF compress very well
+    if os.getenv("COMPRESSION", "on").lower() not in ("0", "off", "false"):
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+            level=int(os.getenv("COMPRESSION_LEVEL", "6")),
+            brotli_quality=int(os.getenv("BROTLI_QUALITY", "4")),
+        )
 
-    # Initialize DB and FTS tables
-    init_db()
-    create_fts_tables()
+    # Concurrency limits and per-client rate limits per route class, so bulk
+    # uploads and exports cannot starve interactive reads. Inside the metrics
+    # middleware so shed requests (429/503) are counted.
+    if admission.admission_enabled():
+        app.add_middleware(admission.AdmissionMiddleware)
 
-    # API Routes
+    # Per-route latency, SQL statements per request and pipeline stage timings.
+    # Outside admission and compression, so its latency includes both and shed
+    # requests are counted; only SQL profiling and request ids wrap it
+    # (RequestId > SqlProfile > Metrics > Admission > Compression).
+    metrics_enabled = os.getenv("METRICS", "on").lower() not in ("0", "off", "false")
+    if metrics_enabled:
+        metrics.instrument_engine(engine)
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    # Opt-in SQL profiling for staging: statements, plans and callers per request
+    sql_profile = profiling.profiling_enabled()
+    if sql_profile:
+        profiling.instrument_engine(engine)
+        app.add_middleware(profiling.SqlProfileMiddleware)
+
+    # Outermost: every log record written while handling a request carries its id
+    app.add_middleware(RequestIdMiddleware)
+
+    # Serve uploaded files: straight from the upload directory for local storage
+    # (created at startup), via presigned redirects or the read cache for S3
+    from .storage import get_storage
+
+    if get_storage().name == "local":
+        app.mount("/uploads", StaticFiles(directory=get_upload_dir(), check_dir=False), name="uploads")
+    else:
+        from .routers import uploads as uploads_router
+
+        app.include_router(uploads_router.router)
+
+    # API Routes. Imported here so importing api.main stays cheap for tools that
+    # only need create_app() or nothing at all.
     from fastapi import APIRouter
 
+    from .routers import assets as assets_router
+    from .routers import changes as changes_router
+    from .routers import duplicates as duplicates_router
+    from .routers import enrichment as enrichment_router
+    from .routers import events as events_router
+    from .routers import export as export_router
+    from .routers import fixity as fixity_router
+    from .routers import imports as imports_router
+    from .routers import items as items_router
+    from .routers import oai as oai_router
+    from .routers import profiling as profiling_router
+    from .routers import similarity as similarity_router
+    from .routers import suggest as suggest_router
+    from .routers import timeline as timeline_router
+
     api = APIRouter(prefix="/api")
     api.include_router(items_router.router)
     api.include_router(assets_router.router)
     api.include_router(export_router.router)
+    api.include_router(changes_router.router)
+    api.include_router(events_router.router)
+    api.include_router(imports_router.router)
+    api.include_router(oai_router.router)
+    api.include_router(enrichment_router.router)
+    api.include_router(duplicates_router.router)
+    api.include_router(similarity_router.router)
+    api.include_router(suggest_router.router)
+    api.include_router(timeline_router.router)
+    api.include_router(fixity_router.router)
+    if sql_profile:
+        api.include_router(profiling_router.router)
     app.include_router(api)
 
     # Security headers middleware - temporarily disabled for debugging
@@ -75,7 +169,20 @@ def create_app() -> FastAPI:
     def health_check():
         return {"status": "ok", "message": "Organization App API is running"}
 
+    if metrics_enabled:
+        # Prometheus scrape target (text exposition format)
+        @app.get("/metrics", include_in_schema=False)
+        def prometheus_metrics():
+            return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
     return app
 
 
-app = create_app()
\ No newline at end of file
+def __getattr__(name: str):
+    # `api.main:app` (uvicorn) and `from api.main import app` build the app on first
+    # access instead of at import time
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,337 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text exposition format, rendered without the prometheus_client dependency
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are stored per bucket and summed cumulatively on render."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        # Linear scan beats bisect for a dozen buckets
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((values, (list(s[0]), s[1], s[2])) for values, s in self._series.items())
+        for values, (counts, total, count) in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_value(bound if bound == float("inf") else float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose samples are produced by a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], collect: Callable[[], List[Tuple[LabelValues, float]]]):
+        self.name, self.help, self.labels, self._collect = name, help_text, tuple(labels), collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self._collect()
+        except Exception as e:
+            logger.warning("collecting %s failed: %s", self.name, e)
+            samples = []
+        for values, value in samples:
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}")
+        return lines
+
+
+_registry: List[object] = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Request, SQL and pipeline-stage metrics ---
+
+HTTP_REQUESTS = register(Counter("org_http_requests_total", "HTTP requests handled.", ("method", "route", "status")))
+HTTP_LATENCY = register(
+    Histogram("org_http_request_duration_seconds", "Time from request start to the last body byte.", ("method", "route"))
+)
+REQUEST_QUERIES = register(
+    Histogram("org_http_request_db_queries", "SQL statements executed per request.", ("route",), QUERY_COUNT_BUCKETS)
+)
+REQUEST_DB_TIME = register(Histogram("org_http_request_db_seconds", "SQL time spent per request.", ("route",)))
+DB_QUERIES = register(Counter("org_db_queries_total", "SQL statements executed (requests and background work)."))
+DB_TIME = register(Counter("org_db_query_seconds_total", "SQL execution time (requests and background work)."))
+STAGE_LATENCY = register(Histogram("org_stage_duration_seconds", "Processing pipeline stage durations.", ("stage",)))
+
+
+class RequestStats:
+    """Per-request accumulator. Shared by reference with the threadpool running sync endpoints."""
+
+    __slots__ = ("queries", "db_seconds", "stages", "closed")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.stages: Dict[str, float] = {}
+        # Set once the response is sent, so background tasks are not billed to the request
+        self.closed = False
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("org_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one pipeline stage (exif, ocr, fts, ...) into org_stage_duration_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, name)
+        stats = _current.get()
+        if stats is not None and not stats.closed:
+            stats.stages[name] = stats.stages.get(name, 0.0) + elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("org_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["org_query_started"].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERIES.inc()
+    DB_TIME.inc(amount=elapsed)
+    stats = _current.get()
+    if stats is not None and not stats.closed:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("org_query_started"):
+        conn.info["org_query_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every SQL statement on `engine`, and export its pool gauges. Idempotent."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    pool = engine.pool
+
+    def pool_samples() -> List[Tuple[LabelValues, float]]:
+        # Not every pool class (e.g. SingletonThreadPool) implements every counter
+        samples = []
+        for stat in ("size", "checkedout", "checkedin", "overflow"):
+            fn = getattr(pool, stat, None)
+            if callable(fn):
+                samples.append(((stat,), fn()))
+        return samples
+
+    register(Gauge("org_db_pool_connections", "Connection pool state by kind.", ("state",), pool_samples))
+
+
+def _cache_samples(key: str) -> Callable[[], List[Tuple[LabelValues, float]]]:
+    def collect():
+        from .services.cache import item_cache_stats
+
+        return [((stats["name"],), stats[key]) for stats in item_cache_stats()]
+
+    return collect
+
+
+def _rule_samples(key: str, scale: float = 1.0) -> Callable[[], List[Tuple[LabelValues, float]]]:
+    def collect():
+        from .services.enrichment import rule_stats
+
+        return [((stats["rule"],), stats[key] * scale) for stats in rule_stats()]
+
+    return collect
+
+
+register(Gauge("org_cache_entries", "Entries held by each item cache.", ("cache",), _cache_samples("size")))
+# Exposed as gauges: the counters live on the caches and restart when they are cleared
+register(Gauge("org_cache_hits", "Item cache hits.", ("cache",), _cache_samples("hits")))
+register(Gauge("org_cache_misses", "Item cache misses.", ("cache",), _cache_samples("misses")))
+register(Gauge("org_enrichment_rule_hits", "Enrichment rule hits since the rule table was compiled.", ("rule",), _rule_samples("hits")))
+register(
+    Gauge(
+        "org_enrichment_rule_seconds",
+        "Enrichment rule time since the rule table was compiled.",
+        ("rule",),
+        _rule_samples("total_ms", 0.001),
+    )
+)
+
+
+def _route_label(scope: Scope) -> str:
+    # Use the route template, not the raw path, to keep label cardinality bounded
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return template
+    # Some FastAPI versions report the included router's own route, without the
+    # /api prefix; recover the prefix by matching the template against a suffix
+    index = path.find("/", 1)
+    while index != -1:
+        if regex.match(path[index:]):
+            return path[:index] + template
+        index = path.find("/", index + 1)
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency, SQL statements and SQL time per route, and adds a
+    Server-Timing header (total, db and any pipeline stages finished before the
+    response started) so slow requests can be broken down from the browser.
+    Timing stops at the last body byte; background tasks run afterwards are not counted.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        def finish() -> None:
+            if stats.closed:
+                return
+            stats.closed = True
+            elapsed = time.perf_counter() - started
+            route = _route_label(scope)
+            method = scope.get("method", "GET")
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            REQUEST_QUERIES.observe(stats.queries, route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, route)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    parts = [f"app;dur={(time.perf_counter() - started) * 1000:.1f}"]
+                    parts.append(f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"')
+                    parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.stages.items())
+                    headers.append("Server-Timing", ", ".join(parts))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Errors and disconnects never send a final body
+            finish()
+            _current.reset(token)
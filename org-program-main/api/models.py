@@ -2,20 +2,31 @@ import uuid
 from datetime import datetime, timezone
 from typing import Optional, List
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, BigInteger, Column, Index, LargeBinary, event
 from sqlmodel import Field, SQLModel, Relationship
 
+from .services.dates import date_columns
+
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
 class Item(SQLModel, table=True):
+    # Keyset cursor for exports and OAI-PMH harvesting; date range filters and timeline
+    __table_args__ = (
+        Index("ix_item_updated_at_id", "updated_at", "id"),
+        Index("ix_item_date_range", "date_start", "date_end"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
 
     title: str = Field(index=True)
     description: Optional[str] = None
     date: Optional[str] = None
+    # First/last day `date` can mean, as YYYYMMDD; derived on every write (services/dates.py)
+    date_start: Optional[int] = None
+    date_end: Optional[int] = None
     type: Optional[str] = None
     format: Optional[str] = None
     coverage: Optional[str] = None
@@ -36,6 +47,14 @@ class Item(SQLModel, table=True):
     assets: list["Asset"] = Relationship(back_populates="item")
 
 
+@event.listens_for(Item, "before_insert")
+@event.listens_for(Item, "before_update")
+def _derive_date_range(mapper, connection, item: Item) -> None:
+    # Bulk inserts (insert(Item) with row dicts) skip ORM events; they call date_columns() themselves
+    for column, value in date_columns(item.date).items():
+        setattr(item, column, value)
+
+
 class Asset(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, index=True)
     item_id: uuid.UUID = Field(foreign_key="item.id", index=True)
@@ -43,9 +62,153 @@ class Asset(SQLModel, table=True):
     file_path: str
     mime_type: Optional[str] = None
     bytes: int = 0
-    checksum: Optional[str] = None
-    exif_json: dict = Field(default_factory=dict, sa_column=Column(JSON))
-    ocr_json: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    checksum: Optional[str] = Field(default=None, index=True)
+    # EXIF and OCR results live in AssetMetadata, loaded only when asked for
     is_primary: bool = Field(default=False)
+    # 64-bit dHash (signed) for near-duplicate detection; None for non-images
+    phash: Optional[int] = Field(default=None, sa_column=Column(BigInteger, index=True))
 
     item: Optional[Item] = Relationship(back_populates="assets")
+
+
+class AssetMetadata(SQLModel, table=True):
+    # Extraction results (EXIF, OCR) per asset, out of the asset row so listings
+    # and relationship loads don't read them. `data` is compressed JSON (`codec`),
+    # `version` is the extractor version that produced it.
+    asset_id: uuid.UUID = Field(foreign_key="asset.id", primary_key=True)
+    kind: str = Field(primary_key=True)  # "exif" or "ocr"
+    version: int = 1
+    codec: str = "zlib"
+    size: int = 0  # uncompressed JSON bytes
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class ItemSummary(SQLModel, table=True):
+    # One narrow row per item for list and grid views, rewritten for the items
+    # passed to record_changes() (services/item_summary.py), so cards never load
+    # assets or their metadata
+    __table_args__ = (
+        Index("ix_itemsummary_created_at", "created_at"),
+        Index("ix_itemsummary_date_range", "date_start", "date_end"),
+    )
+
+    item_id: uuid.UUID = Field(primary_key=True)
+    title: str
+    type: Optional[str] = None
+    date: Optional[str] = None
+    date_start: Optional[int] = None
+    date_end: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    asset_count: int = 0
+    total_bytes: int = 0
+    # The asset flagged is_primary, else the first one attached
+    primary_asset_id: Optional[uuid.UUID] = None
+    primary_file_path: Optional[str] = None
+    primary_mime_type: Optional[str] = None
+
+
+class AssetFixity(SQLModel, table=True):
+    # Outcome of the last fixity check of each asset (services/fixity.py)
+    asset_id: uuid.UUID = Field(foreign_key="asset.id", primary_key=True)
+    status: str = Field(index=True)  # ok, mismatch, missing, error, no_checksum
+    checked_at: datetime = Field(default_factory=utcnow)
+    # Last time the stored bytes matched Asset.checksum
+    verified_at: Optional[datetime] = Field(default=None, index=True)
+    actual_checksum: Optional[str] = None  # what was read, when it differs
+    error: Optional[str] = None
+    failures: int = 0  # consecutive failed checks
+
+
+class FixityState(SQLModel, table=True):
+    # Single row: position of the rolling fixity scrub. Assets are walked in id
+    # order, one pass ("cycle") per FIXITY_PERIOD_DAYS.
+    id: int = Field(default=1, primary_key=True)
+    cycle: int = 1
+    cycle_started_at: datetime = Field(default_factory=utcnow)
+    last_asset_id: Optional[uuid.UUID] = None
+    cycle_assets: int = 0
+    cycle_bytes: int = 0
+    total_bytes: int = 0  # size of the store when the cycle started
+    completed_at: Optional[datetime] = None  # end of the last full cycle
+
+
+class ItemChange(SQLModel, table=True):
+    # Change feed for sync clients. Each item keeps only its latest row, so the
+    # feed stays one row per live item (plus tombstones) and `seq` is strictly
+    # increasing thanks to AUTOINCREMENT (ids of deleted rows are never reused).
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    item_id: uuid.UUID = Field(index=True)
+    op: str  # "upsert" or "delete"
+    changed_at: datetime = Field(default_factory=utcnow)
+
+
+class ImportJob(SQLModel, table=True):
+    # Progress checkpoint for bulk archive imports. Sources are walked in sorted
+    # order, so `last_key` is enough to resume after an interruption.
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    source: str
+    sidecar: Optional[str] = None
+    status: str = "pending"  # pending, running, completed, failed
+    last_key: Optional[str] = None
+    files_seen: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    bytes_imported: int = 0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
+
+
+class EnrichmentJob(SQLModel, table=True):
+    # Checkpoint for re-running enrichment over existing items. Items are walked in
+    # id order, so `last_item_id` is enough to resume after an interruption.
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    status: str = "pending"  # pending, running, completed, failed
+    batch_size: int = 200
+    rate: Optional[float] = None  # max items per second, None = unthrottled
+    last_item_id: Optional[uuid.UUID] = None
+    items_seen: int = 0
+    assets_seen: int = 0
+    items_changed: int = 0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
+
+
+class SimilarityTerm(SQLModel, table=True):
+    # Vocabulary with document frequencies from the last full similarity build
+    id: Optional[int] = Field(default=None, primary_key=True)
+    term: str = Field(index=True, unique=True)
+    df: int = 0
+
+
+class SimilarityPosting(SQLModel, table=True):
+    # Sparse TF-IDF vectors, one row per (item, term), L2-normalised per item.
+    # The covering (term_id, item_id, weight) index serves dot products in SQL.
+    __table_args__ = (Index("ix_similarityposting_term", "term_id", "item_id", "weight"),)
+
+    item_id: uuid.UUID = Field(primary_key=True)
+    term_id: int = Field(primary_key=True)
+    weight: float
+
+
+class ItemSimilarity(SQLModel, table=True):
+    # Precomputed top-k neighbours; GET /items/{id}/similar only reads this table
+    item_id: uuid.UUID = Field(primary_key=True)
+    similar_id: uuid.UUID = Field(primary_key=True, index=True)
+    score: float
+
+
+class SimilarityState(SQLModel, table=True):
+    # Single row: change-feed position the neighbour table reflects
+    id: int = Field(default=1, primary_key=True)
+    last_seq: int = 0
+    doc_count: int = 0
+    built_at: datetime = Field(default_factory=utcnow)
+    refreshed_at: datetime = Field(default_factory=utcnow)
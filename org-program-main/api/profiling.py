@@ -0,0 +1,229 @@
+"""
+Opt-in per-request SQL profiling (SQL_PROFILE=on; meant for staging, not production).
+
+Every statement run while a request is handled is recorded with its duration, the
+application line that issued it and, for SELECTs on SQLite, its
+EXPLAIN QUERY PLAN (cached per statement text). Statements slower than
+SLOW_QUERY_MS are logged as warnings. Each response carries an X-SQL-Profile
+summary header, and the last SQL_PROFILE_HISTORY request profiles are kept for
+GET /api/debug/sql.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .logs import request_id_var
+
+
+logger = logging.getLogger(__name__)
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("SQL_PROFILE", "off").lower() in ("1", "on", "true")
+
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+HISTORY = int(os.getenv("SQL_PROFILE_HISTORY", "100"))
+# Plans are cached per normalised statement; bounded so ad-hoc SQL cannot grow it forever
+PLAN_CACHE_SIZE = 512
+
+_API_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_SKIP_FILES = {os.path.abspath(__file__), os.path.join(_API_DIR, "metrics.py"), os.path.join(_API_DIR, "db.py")}
+
+# Expanded IN lists differ only in their number of placeholders
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    return _IN_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestProfile:
+    __slots__ = ("request_id", "method", "path", "started", "elapsed_ms", "statements", "closed")
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.elapsed_ms = 0.0
+        self.statements: List[dict] = []
+        self.closed = False
+
+    @property
+    def sql_ms(self) -> float:
+        return sum(s["ms"] for s in self.statements)
+
+    def top(self, limit: int = 10) -> List[dict]:
+        """Statements grouped by normalised text, most total time first (repeats point at N+1 loops)."""
+        groups: Dict[str, dict] = {}
+        for s in self.statements:
+            group = groups.setdefault(s["sql"], {"sql": s["sql"], "count": 0, "total_ms": 0.0, "where": s["where"]})
+            group["count"] += 1
+            group["total_ms"] += s["ms"]
+        ordered = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)[:limit]
+        for group in ordered:
+            group["total_ms"] = round(group["total_ms"], 3)
+        return ordered
+
+    def header(self) -> str:
+        slowest = max((s["ms"] for s in self.statements), default=0.0)
+        return f"queries={len(self.statements)}; sql_ms={self.sql_ms:.2f}; slowest_ms={slowest:.2f}"
+
+    def summary(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "started": self.started,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "queries": len(self.statements),
+            "sql_ms": round(self.sql_ms, 3),
+        }
+
+    def detail(self) -> dict:
+        return {**self.summary(), "top": self.top(), "statements": self.statements}
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("org_sql_profile", default=None)
+_history: Deque[RequestProfile] = deque(maxlen=HISTORY)
+_history_lock = threading.Lock()
+_plans: "OrderedDict[str, List[str]]" = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def recent_profiles() -> List[RequestProfile]:
+    with _history_lock:
+        return list(reversed(_history))
+
+
+def find_profile(request_id: str) -> Optional[RequestProfile]:
+    with _history_lock:
+        return next((p for p in _history if p.request_id == request_id), None)
+
+
+def _caller() -> Optional[str]:
+    # First frame in our own code outside the db plumbing: the line that issued the query
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_API_DIR) and filename not in _SKIP_FILES:
+            return f"{filename[len(_API_DIR):]}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _explain(conn, statement: str, parameters, key: str) -> Optional[List[str]]:
+    with _plans_lock:
+        if key in _plans:
+            _plans.move_to_end(key)
+            return _plans[key]
+    try:
+        # Raw DBAPI cursor so the EXPLAIN does not fire engine events (and profile itself)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            rows = cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ()).fetchall()
+        finally:
+            cursor.close()
+        plan = [row[-1] for row in rows]
+    except Exception as e:
+        logger.debug("EXPLAIN failed for %s: %s", key, e)
+        plan = None
+    with _plans_lock:
+        _plans[key] = plan
+        if len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("org_profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get("org_profile_started")
+    if profile is None or not started:
+        return
+    ms = (time.perf_counter() - started.pop()) * 1000.0
+    if profile.closed:
+        return
+    key = normalize(statement)
+    plan = None
+    if not executemany and conn.dialect.name == "sqlite" and key.split(" ", 1)[0].upper() in ("SELECT", "WITH"):
+        plan = _explain(conn, statement, parameters, key)
+    entry = {
+        "sql": key,
+        "ms": round(ms, 3),
+        "executemany": executemany,
+        "where": _caller(),
+        "plan": plan,
+    }
+    profile.statements.append(entry)
+    if ms >= SLOW_QUERY_MS:
+        logger.warning("slow query %.1f ms at %s", ms, entry["where"], extra={"sql": key, "plan": plan})
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("org_profile_started"):
+        conn.info["org_profile_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the profiling hooks to `engine`. Idempotent."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class SqlProfileMiddleware:
+    """Collect a RequestProfile per request, add the X-SQL-Profile header and keep recent profiles."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("path", "").startswith("/api/debug/sql"):
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(request_id_var.get() or "", scope.get("method", "GET"), scope.get("path", ""))
+        token = _current.set(profile)
+        started = time.perf_counter()
+
+        def finish() -> None:
+            if profile.closed:
+                return
+            profile.closed = True
+            profile.elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with _history_lock:
+                _history.append(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-SQL-Profile"] = profile.header()
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+            _current.reset(token)
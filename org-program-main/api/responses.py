@@ -0,0 +1,189 @@
+import gzip
+import inspect
+import json
+import os
+import zlib
+from typing import Any, Optional
+
+from fastapi import routing
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional accelerators: both degrade gracefully when not installed
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available, compact stdlib json otherwise."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fastapi_dumps_json_directly() -> bool:
+    # Newer FastAPI releases serialize response models straight to JSON bytes via
+    # Pydantic when no custom response class is set, which beats orjson on dicts.
+    return "dump_json" in inspect.signature(routing.serialize_response).parameters
+
+
+def select_json_response_class(mode: Optional[str] = None):
+    """
+    Pick the app-wide response class. JSON_RESPONSE=orjson forces FastJSONResponse,
+    JSON_RESPONSE=default keeps FastAPI's own, and "auto" (the default) uses orjson
+    only when it is installed and FastAPI has no faster built-in path.
+    Returns None to keep FastAPI's default.
+    """
+    mode = (mode or os.getenv("JSON_RESPONSE", "auto")).lower()
+    if mode == "orjson":
+        return FastJSONResponse
+    if mode == "auto" and orjson is not None and not _fastapi_dumps_json_directly():
+        return FastJSONResponse
+    return None
+
+
+# Already-compressed or streaming-sensitive payloads are never re-encoded
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def _choose_encoding(accept_encoding: str, allow_brotli: bool) -> Optional[str]:
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            offered[token] = q
+    if allow_brotli and brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    """Incremental encoder so streamed bodies stay streamed (each chunk is flushed)."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=level)
+        else:
+            # wbits=31 -> gzip container
+            self._c = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush(zlib.Z_FINISH)
+
+
+def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated response compression (br when the brotli package is installed, else gzip).
+    Whole responses below `minimum_size` bytes are sent as-is; streamed responses are
+    compressed chunk by chunk, and event streams are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        level: int = 6,
+        brotli_quality: int = 4,
+        allow_brotli: bool = True,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        # gzip level 1-9; brotli quality 0-11 (4 is about gzip-6 speed with a better ratio)
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.allow_brotli = allow_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.allow_brotli)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        level = self.brotli_quality if encoding == "br" else self.level
+
+        start: Optional[Message] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or any(content_type.startswith(t) for t in EXCLUDED_CONTENT_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start message until we know the body size
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None and encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body:
+                    # Single-shot body: compress only when it pays off
+                    if len(body) >= self.minimum_size:
+                        body = compress_body(body, encoding, level)
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(body))
+                        headers.add_vary_header("Accept-Encoding")
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    start = None
+                    return
+                encoder = _Encoder(encoding, level)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await send(start)
+                start = None
+
+            if encoder is None:
+                await send(message)
+                return
+            data = encoder.chunk(body) if body else b""
+            if not more_body:
+                data += encoder.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1 +1 @@
-__all__ = ["items", "assets", "export"]
+__all__ = ["items", "assets", "export", "changes", "events", "imports", "oai", "enrichment", "duplicates", "similarity", "suggest", "uploads", "profiling", "timeline", "fixity"]
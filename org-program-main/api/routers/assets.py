@@ -1,229 +1,130 @@
 import hashlib
+import logging
 import mimetypes
 import os
-import shutil
 import uuid
 from pathlib import Path
-
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlmodel import Session
-
-from ..deps import get_db_session
-from ..db import get_upload_dir, reset_fts_for_item
-from ..models import Asset, Item
+from typing import List, Optional, Sequence
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status
+from sqlmodel import Session, select
+
+from ..deps import get_db_session, resolve_import_path
+from ..metrics import stage
+from ..db import reset_fts_for_item
+from ..models import Asset, Item, ItemSummary, utcnow
+from ..schemas import ItemSummaryRead, StagedAssetsRequest
+from ..services.archive_import import SourceEntry
+from ..services.asset_metadata import save_metadata
+from ..services.batch_upload import attach_files, store_and_extract
+from ..services.changes import record_change
+from ..services.enrichment import enrich_item
+from ..services.events import STAGE_EXIF, STAGE_INDEXED, STAGE_OCR, STAGE_STORED, bus
 from ..services.exif import extract_exif
+from ..services.phash import dhash
+from ..services.similarity import refresh_in_background
 from ..services.ocr import extract_ocr_stub
+from ..storage import StorageError, get_storage, open_writer
 
 
-router = APIRouter(prefix="/items", tags=["assets"])
-def _infer_subjects(filename: str, exif: dict, ocr: dict) -> list[str]:
-    """
-    Very simple, rule-based subject inference using filename tokens, EXIF hints, and OCR text.
-    This is intentionally conservative and capped to a handful of tags.
-    """
-    subjects: set[str] = set()
-
-    try:
-        base = os.path.splitext(os.path.basename(filename or ""))[0].lower()
-        tokens = {t for t in base.replace("_", " ").replace("-", " ").split() if len(t) > 2}
-
-        # Filename-driven categories
-        if any(t in tokens for t in {"library","museum","building","architecture","church","bridge","tower","castle"}):
-            subjects.add("architecture")
-            subjects.add("places")
-        if any(t in tokens for t in {"fan","art","drawing","sketch","illustration"}):
-            subjects.add("art")
-            subjects.add("fan art")
-
-        raw = (exif or {}).get("raw", {})
+logger = logging.getLogger(__name__)
 
-        # EXIF Artist -> subject hint
-        artist = raw.get("Artist")
-        if isinstance(artist, (bytes, bytearray)):
-            try:
-                artist = artist.decode("utf-16-le", errors="ignore")
-            except Exception:
-                artist = str(artist)
-        if artist:
-            subjects.add("artist:" + str(artist).strip())
-
-        software = str(raw.get("Software") or "").lower()
-        if "scanner" in software:
-            subjects.add("scanned")
-
-        # OCR text keyword hints
-        text = (ocr or {}).get("text") or ""
-        if any(k in text.lower() for k in ["library","archive","museum"]):
-            subjects.add("places")
+router = APIRouter(prefix="/items", tags=["assets"])
 
-    except Exception as e:
-        print(f"[DEBUG][assets._infer_subjects] inference failed: {e}")
 
-    # Limit number to keep UI tidy
-    return sorted(list(subjects))[:10]
+def _asset_response(asset: Asset, exif: dict, ocr: dict) -> dict:
+    return {
+        "id": str(asset.id),
+        "item_id": str(asset.item_id),
+        "file_path": asset.file_path,
+        "mime_type": asset.mime_type,
+        "bytes": asset.bytes,
+        "checksum": asset.checksum,
+        "exif_json": exif,
+        "ocr_json": ocr,
+        "is_primary": asset.is_primary,
+        "phash": asset.phash,
+    }
 
 
 @router.post("/{item_id}/assets", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def upload_asset(
+def upload_asset(
     item_id: uuid.UUID,
+    background: BackgroundTasks,
     file: UploadFile = File(...),
     session: Session = Depends(get_db_session),
 ):
+    # Plain def: runs in the threadpool, so the blocking storage writes (S3 part
+    # uploads, the final PUT) and the extractors never stall the event loop
     item = session.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    upload_root = Path(get_upload_dir())
-    upload_root.mkdir(parents=True, exist_ok=True)
-    item_dir = upload_root / str(item.id)
-    item_dir.mkdir(parents=True, exist_ok=True)
-
+    storage = get_storage()
     original_name = os.path.basename(file.filename or "upload.bin")
-    dest_path = item_dir / original_name
+    # Asset id is assigned up front so the key and progress events can reference it.
+    # A key per asset: a second file with the same name never overwrites the first.
+    asset_id = uuid.uuid4()
+    key = f"{item.id}/{asset_id}/{original_name}"
 
-    # Save to disk and compute checksum and bytes
+    # Stream to the storage backend, computing checksum and bytes on the way
     sha256 = hashlib.sha256()
     size = 0
-    with dest_path.open("wb") as out_f:
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            out_f.write(chunk)
-            size += len(chunk)
-            sha256.update(chunk)
-
-    mime_type = file.content_type or mimetypes.guess_type(str(dest_path))[0] or "application/octet-stream"
+    try:
+        with stage("store"), open_writer(storage, key) as out_f:
+            while True:
+                chunk = file.file.read(1024 * 1024)
+                if not chunk:
+                    break
+                out_f.write(chunk)
+                size += len(chunk)
+                sha256.update(chunk)
+    except StorageError as e:
+        logger.error("storing upload %s failed: %s", key, e)
+        raise HTTPException(status_code=502, detail="Asset storage is unavailable")
+    # Extractors read a local file: the stored file itself or the backend's cached copy
+    local_path = str(out_f.path)
+
+    mime_type = file.content_type or mimetypes.guess_type(original_name)[0] or "application/octet-stream"
     checksum = sha256.hexdigest()
 
+    progress = {"item_id": str(item.id), "asset_id": str(asset_id), "filename": original_name}
+    bus.publish(STAGE_STORED, bytes=size, checksum=checksum, **progress)
+
     # Extract metadata
-    exif = extract_exif(str(dest_path))
-    ocr = extract_ocr_stub(str(dest_path))
+    with stage("exif"):
+        exif = extract_exif(local_path)
+    # Perceptual hash for near-duplicate detection (images only)
+    with stage("phash"):
+        phash = dhash(local_path) if mime_type.startswith("image/") else None
+    bus.publish(STAGE_EXIF, date=exif.get("date"), gps=exif.get("gps") is not None, **progress)
+    with stage("ocr"):
+        ocr = extract_ocr_stub(local_path)
+    bus.publish(STAGE_OCR, has_text=bool(ocr.get("text")), **progress)
 
     asset = Asset(
+        id=asset_id,
         item_id=item.id,
-        file_path=str(dest_path.relative_to(Path.cwd())) if str(dest_path).startswith(str(Path.cwd())) else str(dest_path),
+        file_path=storage.stored_path(key),
         mime_type=mime_type,
         bytes=size,
         checksum=checksum,
-        exif_json=exif,
-        ocr_json=ocr,
         is_primary=False,
+        phash=phash,
     )
     session.add(asset)
+    save_metadata(session, asset.id, exif=exif, ocr=ocr)
     session.commit()
     session.refresh(asset)
 
-    # Auto-populate item fields from EXIF if they're empty
-    item_updated = False
-    
-    # Set title from filename (no extension) if empty
-    if not item.title or item.title.strip() == "":
-        filename_without_ext = os.path.splitext(original_name)[0]
-        item.title = filename_without_ext
-        item_updated = True
-    
-    # Set format from MIME type if empty
-    if not item.format or item.format.strip() == "":
-        item.format = mime_type
-        item_updated = True
-    
-    # Set date from EXIF if empty and available
-    if (not item.date or item.date.strip() == "") and exif.get("date"):
-        item.date = exif["date"]
-        item_updated = True
-    
-    # Set coverage from GPS if empty and available
-    if (not item.coverage or item.coverage.strip() == "") and exif.get("gps"):
-        gps = exif["gps"]
-        item.coverage = f"{gps['lat']},{gps['lon']}"
-        item_updated = True
-    
-    # Subjects/category inference (rule-based)
-    suggested = _infer_subjects(original_name, exif, ocr)
-    if suggested:
-        before_subjects = set(item.subjects or [])
-        after_subjects = sorted(list(before_subjects.union(suggested)))
-        if after_subjects != item.subjects:
-            print(f"[DEBUG][assets.upload] inferred subjects add={suggested}")
-            item.subjects = after_subjects
-            item_updated = True
-
-    # Set high-level type from MIME
-    if not item.type:
-        if (mime_type or '').startswith('image/'):
-            item.type = 'photo'
-            item_updated = True
-        elif (mime_type or '').startswith('application/pdf'):
-            item.type = 'document'
-            item_updated = True
-
-    # Map EXIF raw to DC-like fields if empty
-    raw = (exif or {}).get("raw", {})
-
-    # description
-    if (not item.description or item.description.strip() == ""):
-        desc = raw.get("ImageDescription") or raw.get("XPComment")
-        if isinstance(desc, (bytes, bytearray)):
-            try:
-                desc = desc.decode("utf-16-le", errors="ignore")
-            except Exception:
-                desc = str(desc)
-        if desc and isinstance(desc, str) and desc.strip():
-            item.description = desc.strip()
-            item_updated = True
-
-    # creators
-    artist = raw.get("Artist") or raw.get("XPAuthor")
-    if artist:
-        if isinstance(artist, (bytes, bytearray)):
-            try:
-                artist = artist.decode("utf-16-le", errors="ignore")
-            except Exception:
-                artist = str(artist)
-        names = [n.strip() for n in str(artist).replace("|", ";").split(";") if n.strip()]
-        before = set(item.creators or [])
-        after = sorted(list(before.union(names)))
-        if after != item.creators:
-            item.creators = after
-            item_updated = True
-
-    # subjects from XPKeywords
-    xp_kw = raw.get("XPKeywords")
-    if xp_kw:
-        if isinstance(xp_kw, (bytes, bytearray)):
-            try:
-                xp_kw = xp_kw.decode("utf-16-le", errors="ignore")
-            except Exception:
-                xp_kw = str(xp_kw)
-        kw = [k.strip() for k in str(xp_kw).replace(",", ";").split(";") if k.strip()]
-        before = set(item.subjects or [])
-        after = sorted(list(before.union(kw)))
-        if after != item.subjects:
-            item.subjects = after
-            item_updated = True
-
-    # identifier as checksum
-    if checksum:
-        before_ids = set(item.identifiers or [])
-        after_ids = sorted(list(before_ids.union([checksum])))
-        if after_ids != item.identifiers:
-            item.identifiers = after_ids
-            item_updated = True
-
-    # source from Make/Model
-    if (not item.source or item.source.strip() == ""):
-        make = str(raw.get("Make") or "").strip()
-        model = str(raw.get("Model") or "").strip()
-        src = (make + " " + model).strip()
-        if src:
-            item.source = src
-            item_updated = True
-
-    # Commit item updates if any were made
-    if item_updated:
-        session.commit()
-        session.refresh(item)
+    # Auto-populate item fields from the file, EXIF and OCR where empty
+    with stage("enrich"):
+        enrich_item(item, original_name, mime_type, checksum, exif, ocr)
+
+    # The new asset changes the item's representation, so always bump updated_at
+    item.updated_at = utcnow()
+    session.commit()
+    session.refresh(item)
 
     # Update FTS with OCR text if any
     ocr_text = str(ocr.get("text", "") or "")
@@ -231,17 +132,83 @@ async def upload_asset(
 
     # refresh item for most recent values
     session.refresh(item)
-    reset_fts_for_item(session, str(item.id), item.title, item.description or "", ocr_text)
+    with stage("fts"):
+        reset_fts_for_item(session, str(item.id), item.title, item.description or "", ocr_text)
+    record_change(session, item.id)
     session.commit()
+    bus.publish(STAGE_INDEXED, **progress)
+    background.add_task(refresh_in_background)
 
-    return {
-        "id": str(asset.id),
-        "item_id": str(asset.item_id),
-        "file_path": asset.file_path,
-        "mime_type": asset.mime_type,
-        "bytes": asset.bytes,
-        "checksum": asset.checksum,
-        "exif_json": asset.exif_json,
-        "ocr_json": asset.ocr_json,
-        "is_primary": asset.is_primary,
-    }
+    return _asset_response(asset, exif, ocr)
+
+
+def _attach_batch(
+    session: Session,
+    background: BackgroundTasks,
+    item_id: uuid.UUID,
+    entries: List[SourceEntry],
+    mime_types: Sequence[Optional[str]],
+) -> List[dict]:
+    item = session.get(Item, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    storage = get_storage()
+    try:
+        files = store_and_extract(storage, item.id, entries, mime_types)
+    except StorageError as e:
+        logger.error("storing batch for item %s failed: %s", item.id, e)
+        raise HTTPException(status_code=502, detail="Asset storage is unavailable")
+    assets = attach_files(session, storage, item, files)
+    background.add_task(refresh_in_background)
+    return [_asset_response(asset, f.exif, f.ocr) for asset, f in zip(assets, files)]
+
+
+@router.post("/{item_id}/assets/batch", response_model=List[dict], status_code=status.HTTP_201_CREATED)
+def upload_assets(
+    item_id: uuid.UUID,
+    background: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    session: Session = Depends(get_db_session),
+):
+    """Attach many files in one request; the item is enriched and reindexed once."""
+    # Plain def: runs in the threadpool and reads the spooled uploads synchronously
+    entries = [
+        SourceEntry(os.path.basename(f.filename or f"upload-{i}.bin"), f.size or 0, lambda f=f: f.file)
+        for i, f in enumerate(files)
+    ]
+    return _attach_batch(session, background, item_id, entries, [f.content_type for f in files])
+
+
+@router.post("/{item_id}/assets/staged", response_model=List[dict], status_code=status.HTTP_201_CREATED)
+def attach_staged_assets(
+    item_id: uuid.UUID,
+    payload: StagedAssetsRequest,
+    background: BackgroundTasks,
+    session: Session = Depends(get_db_session),
+):
+    """Attach files already on the server (inside IMPORT_ROOT); they are copied, not moved."""
+    paths = [resolve_import_path(path) for path in payload.paths]
+    not_files = [path for path in paths if not Path(path).is_file()]
+    if not_files:
+        raise HTTPException(status_code=400, detail=f"Not a file: {not_files[0]}")
+    entries = [SourceEntry(os.path.basename(p), os.path.getsize(p), lambda p=p: open(p, "rb")) for p in paths]
+    return _attach_batch(session, background, item_id, entries, [None] * len(entries))
+
+
+@router.put("/{item_id}/assets/{asset_id}/primary", response_model=ItemSummaryRead)
+def set_primary_asset(item_id: uuid.UUID, asset_id: uuid.UUID, session: Session = Depends(get_db_session)):
+    """Make `asset_id` the item's primary asset (its card image); returns the updated summary."""
+    asset = session.get(Asset, asset_id)
+    if not asset or asset.item_id != item_id:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    for other in session.exec(select(Asset).where(Asset.item_id == item_id, Asset.is_primary)).all():
+        other.is_primary = False
+        session.add(other)
+    asset.is_primary = True
+    session.add(asset)
+    item = session.get(Item, item_id)
+    item.updated_at = utcnow()
+    session.add(item)
+    record_change(session, item_id)
+    session.commit()
+    return session.get(ItemSummary, item_id)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..schemas import ChangeFeed, ChangeRead, ItemRead
+from ..services.changes import fetch_changes, latest_seq
+
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("", response_model=ChangeFeed)
+def list_changes(
+    since: int = Query(default=0, ge=0, description="Cursor returned as `next` by the previous call"),
+    limit: int = Query(default=500, ge=1, le=5000),
+    session: Session = Depends(get_db_session),
+):
+    rows = fetch_changes(session, since, limit)
+    changes = [
+        ChangeRead(
+            seq=change.seq,
+            item_id=change.item_id,
+            op=change.op,
+            changed_at=change.changed_at,
+            # Tombstones (or items deleted after the change was read) carry no payload
+            item=ItemRead.model_validate(item) if item is not None and change.op != "delete" else None,
+        )
+        for change, item in rows
+    ]
+    next_cursor = changes[-1].seq if changes else max(since, 0)
+    has_more = len(changes) == limit and next_cursor < latest_seq(session)
+    return ChangeFeed(changes=changes, next=next_cursor, has_more=has_more)
@@ -0,0 +1,64 @@
+import logging
+import time
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..models import Asset
+from ..schemas import DuplicateCluster, DuplicateReport, NearDuplicate
+from ..services.phash import DEFAULT_MAX_DISTANCE, get_index, hamming
+
+
+logger = logging.getLogger(__name__)
+
+
+router = APIRouter(prefix="/duplicates", tags=["duplicates"])
+
+
+@router.get("/images", response_model=DuplicateReport)
+def list_duplicate_clusters(
+    max_distance: int = Query(default=DEFAULT_MAX_DISTANCE, ge=0, le=8, description="Max differing bits"),
+    min_size: int = Query(default=2, ge=2),
+    limit: int = Query(default=100, ge=1, le=10000),
+    session: Session = Depends(get_db_session),
+):
+    started = time.perf_counter()
+    index = get_index(session, max_distance)
+    clusters = index.clusters(min_size=min_size)
+    logger.debug("duplicate clusters", extra={"assets": len(index.entries), "clusters": len(clusters)})
+
+    return DuplicateReport(
+        max_distance=max_distance,
+        assets_indexed=len(index.entries),
+        cluster_count=len(clusters),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        clusters=[
+            DuplicateCluster(
+                size=len(cluster),
+                # Distances are relative to the cluster's first asset
+                assets=[
+                    NearDuplicate(**entry._asdict(), distance=hamming(entry.phash, cluster[0].phash))
+                    for entry in cluster
+                ],
+            )
+            for cluster in clusters[:limit]
+        ],
+    )
+
+
+@router.get("/images/{asset_id}", response_model=List[NearDuplicate])
+def list_near_duplicates(
+    asset_id: uuid.UUID,
+    max_distance: int = Query(default=DEFAULT_MAX_DISTANCE, ge=0, le=8),
+    session: Session = Depends(get_db_session),
+):
+    asset = session.get(Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if asset.phash is None:
+        raise HTTPException(status_code=400, detail="Asset has no perceptual hash")
+    matches = get_index(session, max_distance).query(asset.phash)
+    return [NearDuplicate(**entry._asdict(), distance=distance) for entry, distance in matches if entry.asset_id != asset.id]
@@ -0,0 +1,57 @@
+import uuid
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..models import EnrichmentJob
+from ..schemas import EnrichmentJobRead, EnrichmentJobRequest
+from ..services.enrichment import rule_stats
+from ..services.reenrichment import create_job, enrichment_report, run_reenrichment
+
+
+router = APIRouter(prefix="/enrichment", tags=["enrichment"])
+
+
+def _job_read(job: EnrichmentJob) -> EnrichmentJobRead:
+    data = EnrichmentJobRead.model_validate(job)
+    data.report = enrichment_report(job)
+    return data
+
+
+@router.post("/jobs", response_model=EnrichmentJobRead, status_code=status.HTTP_202_ACCEPTED)
+def start_enrichment_job(
+    payload: EnrichmentJobRequest,
+    background: BackgroundTasks,
+    session: Session = Depends(get_db_session),
+):
+    job = create_job(session, payload.batch_size, payload.rate)
+    # Runs after the response is sent; poll GET /enrichment/jobs/{id} for progress
+    background.add_task(run_reenrichment, job.id)
+    return _job_read(job)
+
+
+@router.get("/jobs/{job_id}", response_model=EnrichmentJobRead)
+def get_enrichment_job(job_id: uuid.UUID, session: Session = Depends(get_db_session)):
+    job = session.get(EnrichmentJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+    return _job_read(job)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=EnrichmentJobRead, status_code=status.HTTP_202_ACCEPTED)
+def resume_enrichment_job(job_id: uuid.UUID, background: BackgroundTasks, session: Session = Depends(get_db_session)):
+    job = session.get(EnrichmentJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail="Enrichment job already completed")
+    background.add_task(run_reenrichment, job.id)
+    return _job_read(job)
+
+
+@router.get("/rules", response_model=List[dict])
+def get_rule_stats():
+    # Per-rule hits and time in this process since the rule table was compiled
+    return rule_stats()
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from ..services.events import BusFull, bus
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Comment line sent when idle so proxies keep the connection open
+HEARTBEAT_SECONDS = 15.0
+
+
+def _format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/ingest")
+async def stream_ingest_events(
+    request: Request,
+    item_id: Optional[uuid.UUID] = Query(default=None, description="Only stream events for this item"),
+):
+    try:
+        sub = bus.subscribe(str(item_id) if item_id else None)
+    except BusFull:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "5"})
+
+    async def event_stream():
+        try:
+            # Tell the client to back off a little before reconnecting
+            yield "retry: 3000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await sub.get(timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
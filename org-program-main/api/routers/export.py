@@ -1,48 +1,45 @@
 import uuid
-from typing import List
+from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlmodel import Session, select
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from ..deps import get_db_session
-from ..models import Item
-from ..services.dc_xml import items_to_dc_xml
+from ..services.exporters import iter_csv, iter_dc_xml, iter_jsonl
 
 
 router = APIRouter(prefix="/export", tags=["export"])
 
 
 @router.get("/dc")
-def export_dc(ids: str = Query(..., description="Comma-separated UUIDs"), session: Session = Depends(get_db_session)):
-    if not ids.strip():
-        raise HTTPException(status_code=400, detail="ids is required")
-    try:
-        id_list = [uuid.UUID(x.strip()) for x in ids.split(",") if x.strip()]
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid UUID in ids")
-
-    items: List[Item] = session.exec(select(Item).where(Item.id.in_(id_list))).all()
-    # Serialize items as dicts suitable for XML builder
-    items_payload = []
-    for it in items:
-        items_payload.append(
-            {
-                "title": it.title,
-                "description": it.description,
-                "date": it.date,
-                "type": it.type,
-                "format": it.format,
-                "coverage": it.coverage,
-                "rights": it.rights,
-                "publisher": it.publisher,
-                "language": it.language,
-                "source": it.source,
-                "creators": it.creators or [],
-                "contributors": it.contributors or [],
-                "subjects": it.subjects or [],
-                "identifiers": it.identifiers or [],
-            }
-        )
-
-    xml_str = items_to_dc_xml(items_payload)
-    return Response(content=xml_str, media_type="application/xml")
+def export_dc(ids: Optional[str] = Query(default=None, description="Comma-separated UUIDs; omit to export everything")):
+    id_list = None
+    if ids is not None:
+        if not ids.strip():
+            raise HTTPException(status_code=400, detail="ids is required")
+        try:
+            id_list = [uuid.UUID(x.strip()) for x in ids.split(",") if x.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid UUID in ids")
+
+    # Pre-rendered per-item fragments are concatenated straight into the stream
+    return StreamingResponse(iter_dc_xml(id_list), media_type="application/xml")
+
+
+@router.get("/jsonl")
+def export_jsonl(since: Optional[datetime] = Query(default=None, description="Only items updated at or after this time")):
+    # Streams the whole archive page by page; nothing is materialized up front
+    return StreamingResponse(
+        iter_jsonl(since),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="items.jsonl"'},
+    )
+
+
+@router.get("/csv")
+def export_csv(since: Optional[datetime] = Query(default=None, description="Only items updated at or after this time")):
+    return StreamingResponse(
+        iter_csv(since),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="items.csv"'},
+    )
@@ -0,0 +1,30 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..models import Asset, AssetFixity
+from ..schemas import AssetFixityRead, FixityReport
+from ..services.fixity import check_asset, fixity_report, record_results
+from ..storage import get_storage
+
+
+router = APIRouter(prefix="/fixity", tags=["fixity"])
+
+
+@router.get("", response_model=FixityReport)
+def get_fixity_report(failures: int = Query(100, ge=0, le=1000), session: Session = Depends(get_db_session)):
+    # Filled in by the background scrubber (python -m api.cli fixity, or FIXITY_SCRUB=on)
+    return fixity_report(session, failure_limit=failures)
+
+
+@router.post("/assets/{asset_id}/check", response_model=AssetFixityRead)
+def check_asset_now(asset_id: uuid.UUID, session: Session = Depends(get_db_session)):
+    # Re-verify one asset immediately, e.g. after restoring it from a replica
+    asset = session.get(Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    record_results(session, [check_asset(get_storage(), asset.id, asset.file_path, asset.checksum)])
+    session.commit()
+    return session.get(AssetFixity, asset_id)
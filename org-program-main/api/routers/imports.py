@@ -0,0 +1,102 @@
+import csv
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, UploadFile, status
+from lxml import etree
+from sqlmodel import Session
+
+from ..deps import get_db_session, resolve_import_path
+from ..models import ImportJob
+from ..schemas import ArchiveImportRequest, DcImportResult, ImportJobRead
+from ..services.archive_import import import_report, run_import
+from ..services.dc_import import import_records, iter_dc_csv, iter_dc_xml
+
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+
+def _job_read(job: ImportJob) -> ImportJobRead:
+    data = ImportJobRead.model_validate(job)
+    data.report = import_report(job)
+    return data
+
+
+@router.post("/archive", response_model=ImportJobRead, status_code=status.HTTP_202_ACCEPTED)
+def import_archive(
+    payload: ArchiveImportRequest,
+    background: BackgroundTasks,
+    session: Session = Depends(get_db_session),
+):
+    source = resolve_import_path(payload.path)
+    if not (Path(source).is_dir() or zipfile.is_zipfile(source)):
+        raise HTTPException(status_code=400, detail="path must be a directory or a ZIP archive")
+    sidecar = resolve_import_path(payload.sidecar)
+
+    job = ImportJob(source=source, sidecar=sidecar)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+
+    # Runs after the response is sent; poll GET /import/jobs/{id} for progress.
+    # Threads, not the CLI's process pool: the job runs inside this API worker.
+    background.add_task(run_import, job.id, max(1, payload.batch_size), payload.workers, processes=False)
+    return _job_read(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobRead)
+def get_import_job(job_id: uuid.UUID, session: Session = Depends(get_db_session)):
+    job = session.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return _job_read(job)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=ImportJobRead, status_code=status.HTTP_202_ACCEPTED)
+def resume_import_job(
+    job_id: uuid.UUID,
+    background: BackgroundTasks,
+    batch_size: int = 500,
+    workers: Optional[int] = None,
+    session: Session = Depends(get_db_session),
+):
+    job = session.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail="Import job already completed")
+    # IMPORT_ROOT may have changed since the job was created
+    resolve_import_path(job.source)
+    resolve_import_path(job.sidecar)
+    background.add_task(run_import, job.id, max(1, batch_size), workers, processes=False)
+    return _job_read(job)
+
+
+def _detect_dc_format(file: UploadFile, requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    name = (file.filename or "").lower()
+    content_type = (file.content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return "xml"
+
+
+@router.post("/dc", response_model=DcImportResult)
+def import_dublin_core(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(default=None, pattern="^(xml|csv)$", description="Defaults to the file extension"),
+    batch_size: int = Query(default=1000, ge=1, le=10000),
+):
+    # Plain def: runs in the threadpool and reads the spooled upload synchronously,
+    # one record at a time
+    fmt = _detect_dc_format(file, format)
+    records = iter_dc_csv(file.file) if fmt == "csv" else iter_dc_xml(file.file)
+    try:
+        stats = import_records(records, batch_size=batch_size)
+    except (etree.XMLSyntaxError, UnicodeDecodeError, csv.Error) as e:
+        # Batches before the parse error stay committed
+        raise HTTPException(status_code=400, detail=f"Could not parse {fmt.upper()}: {e}")
+    return DcImportResult(format=fmt, **stats)
@@ -1,24 +1,48 @@
 import uuid
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy import text
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from ..deps import get_db_session
 from ..db import reset_fts_for_item
-from ..models import Item
-from ..schemas import ItemCreate, ItemRead, ItemUpdate
+from ..models import Item, utcnow
+from ..schemas import ItemCreate, ItemRead, ItemSummaryRead, ItemUpdate, SimilarItem
+from ..services.asset_metadata import KINDS, attach_metadata
+from ..services.changes import OP_DELETE, etag_matches, record_change, version_etag
+from ..services.item_cache import get_item_payload, item_version
+from ..services.item_summary import list_summaries
+from ..services.similarity import TOP_K, refresh_in_background, similar_items
+from ..services.timeline import date_bounds, date_range_clauses
 
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
+def _with_metadata(session: Session, items: list, include: Optional[str]) -> list:
+    # Asset EXIF/OCR live in a side table and are only read when asked for
+    kinds = [kind for kind in (part.strip() for part in (include or "").split(",")) if kind in KINDS]
+    if not kinds:
+        return items
+    return attach_metadata(session, [ItemRead.model_validate(item) for item in items], kinds)
+
+
 @router.get("", response_model=List[ItemRead])
 def list_items(
     q: Optional[str] = Query(default=None, description="Keyword search"),
+    include: Optional[str] = Query(default=None, description="Asset data to include: exif, ocr (comma-separated)"),
+    date_from: Optional[str] = Query(default=None, description="Items dated on or after, e.g. 1890 or 1931-07-04"),
+    date_to: Optional[str] = Query(default=None, description="Items dated on or before, e.g. 1899 or 1931-07"),
+    sort: Literal["created", "date"] = Query(default="created", description="Newest first, or by date (undated last)"),
     session: Session = Depends(get_db_session),
 ):
+    # Date filters match items whose parsed date range overlaps [date_from, date_to]
+    try:
+        dates = date_range_clauses(*date_bounds(date_from, date_to))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     if q:
         # Simple FTS5 search across title, description, ocr_text
         rows = session.exec(
@@ -27,16 +51,42 @@ def list_items(
         if not rows:
             return []
         ids = [uuid.UUID(r[0]) if isinstance(r[0], str) else r[0] for r in rows]
-        items = session.exec(select(Item).where(Item.id.in_(ids))).all()
-        # Preserve the order of FTS results
-        order_map = {id_: i for i, id_ in enumerate(ids)}
-        items.sort(key=lambda it: order_map.get(it.id, 1_000_000))
-        return items
-    return session.exec(select(Item).order_by(Item.created_at.desc())).all()
+        items = session.exec(select(Item).where(Item.id.in_(ids), *dates).options(selectinload(Item.assets))).all()
+        if sort == "date":
+            items.sort(key=lambda it: (it.date_start is None, it.date_start or 0, it.date_end or 0))
+        else:
+            # Preserve the order of FTS results
+            order_map = {id_: i for i, id_ in enumerate(ids)}
+            items.sort(key=lambda it: order_map.get(it.id, 1_000_000))
+        return _with_metadata(session, items, include)
+    if sort == "date":
+        order = (Item.date_start.asc().nulls_last(), Item.date_end.asc())
+    else:
+        order = (Item.created_at.desc(),)
+    # Load all assets in one extra query instead of one lazy load per item
+    items = session.exec(select(Item).where(*dates).order_by(*order).options(selectinload(Item.assets))).all()
+    return _with_metadata(session, items, include)
+
+
+@router.get("/summary", response_model=List[ItemSummaryRead])
+def list_item_summaries(
+    date_from: Optional[str] = Query(default=None, description="Items dated on or after, e.g. 1890 or 1931-07-04"),
+    date_to: Optional[str] = Query(default=None, description="Items dated on or before, e.g. 1899 or 1931-07"),
+    sort: Literal["created", "date"] = Query(default="created", description="Newest first, or by date (undated last)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(get_db_session),
+):
+    # Card and grid views: one itemsummary row per item, no asset or metadata loads
+    try:
+        start, end = date_bounds(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return list_summaries(session, sort, start, end, limit, offset)
 
 
 @router.post("", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
-def create_item(payload: ItemCreate, session: Session = Depends(get_db_session)):
+def create_item(payload: ItemCreate, background: BackgroundTasks, session: Session = Depends(get_db_session)):
     item = Item(**payload.model_dump())
     session.add(item)
     session.commit()
@@ -45,22 +95,40 @@ def create_item(payload: ItemCreate, session: Session = Depends(get_db_session))
     # Update FTS
     ocr_text = ""
     reset_fts_for_item(session, str(item.id), item.title, item.description or "", ocr_text)
+    record_change(session, item.id)
     session.commit()
     session.refresh(item)
+    # Keep "similar items" current without delaying the response
+    background.add_task(refresh_in_background)
     return item
 
 
 @router.get("/{item_id}", response_model=ItemRead)
-def get_item(item_id: uuid.UUID, session: Session = Depends(get_db_session)):
-    item = session.get(Item, item_id)
-    if not item:
+def get_item(
+    item_id: uuid.UUID,
+    if_none_match: Optional[str] = Header(default=None),
+    session: Session = Depends(get_db_session),
+):
+    # One primary-key lookup for updated_at decides 404 / 304 / cache hit
+    version = item_version(session, item_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+
+    # Conditional GET: sync clients revalidate without re-downloading the payload
+    etag = version_etag(item_id, version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # Serialized ItemRead from the read-through cache (see services/item_cache.py)
+    body = get_item_payload(session, item_id, version)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.put("/{item_id}", response_model=ItemRead)
 def update_item(
-    item_id: uuid.UUID, payload: ItemUpdate, session: Session = Depends(get_db_session)
+    item_id: uuid.UUID, payload: ItemUpdate, background: BackgroundTasks, session: Session = Depends(get_db_session)
 ):
     item = session.get(Item, item_id)
     if not item:
@@ -68,6 +136,7 @@ def update_item(
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         setattr(item, k, v)
+    item.updated_at = utcnow()
     session.add(item)
     session.commit()
     session.refresh(item)
@@ -75,19 +144,35 @@ def update_item(
     # Update FTS
     ocr_text = ""
     reset_fts_for_item(session, str(item.id), item.title, item.description or "", ocr_text)
+    record_change(session, item.id)
     session.commit()
     session.refresh(item)
+    background.add_task(refresh_in_background)
     return item
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(item_id: uuid.UUID, session: Session = Depends(get_db_session)):
+def delete_item(item_id: uuid.UUID, background: BackgroundTasks, session: Session = Depends(get_db_session)):
     item = session.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     session.delete(item)
+    # Clean FTS row and leave a tombstone for sync clients
+    session.exec(text("DELETE FROM item_fts WHERE item_id = :item_id").bindparams(item_id=str(item_id)))
+    record_change(session, item_id, OP_DELETE)
     session.commit()
-    # Clean FTS row
-    session.exec("DELETE FROM item_fts WHERE item_id = :item_id", {"item_id": str(item_id)})
-    session.commit()
+    background.add_task(refresh_in_background)
     return None
+
+
+@router.get("/{item_id}/similar", response_model=List[SimilarItem])
+def get_similar_items(
+    item_id: uuid.UUID,
+    limit: int = Query(default=TOP_K, ge=1, le=100),
+    session: Session = Depends(get_db_session),
+):
+    # Precomputed neighbours (see services/similarity.py); no scoring at request time
+    rows = similar_items(session, item_id, limit)
+    if not rows and not session.get(Item, item_id):
+        raise HTTPException(status_code=404, detail="Item not found")
+    return [SimilarItem(id=similar_id, title=title, score=round(score, 4)) for similar_id, title, score in rows]
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..services.oai import handle_request
+
+
+router = APIRouter(prefix="/oai", tags=["oai-pmh"])
+
+
+def _oai_response(request: Request, params, session: Session) -> Response:
+    base_url = str(request.url.replace(query=""))
+    body = handle_request(session, base_url, {k: v for k, v in params.items()})
+    return Response(content=body, media_type="text/xml; charset=utf-8")
+
+
+@router.get("")
+def oai_get(request: Request, session: Session = Depends(get_db_session)):
+    return _oai_response(request, request.query_params, session)
+
+
+@router.post("")
+async def oai_post(request: Request, session: Session = Depends(get_db_session)):
+    # OAI-PMH also allows arguments as an urlencoded form body
+    form = await request.form()
+    # Queries and XML building are synchronous; keep them off the event loop
+    return await run_in_threadpool(_oai_response, request, form, session)
@@ -0,0 +1,27 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..profiling import find_profile, recent_profiles
+
+
+# Only mounted when SQL_PROFILE=on
+router = APIRouter(prefix="/debug/sql", tags=["debug"])
+
+
+@router.get("", response_model=List[dict])
+def list_sql_profiles(
+    limit: int = Query(default=50, ge=1, le=1000),
+    min_queries: int = Query(default=0, ge=0, description="Only requests that ran at least this many statements"),
+):
+    # Most recent first; open one by request_id for statements, plans and callers
+    profiles = [p for p in recent_profiles() if len(p.statements) >= min_queries]
+    return [p.summary() for p in profiles[:limit]]
+
+
+@router.get("/{request_id}", response_model=dict)
+def get_sql_profile(request_id: str):
+    profile = find_profile(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile for this request id (it may have aged out)")
+    return profile.detail()
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, status
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..services.similarity import rebuild_similarity, refresh_similarity, similarity_status
+
+
+router = APIRouter(prefix="/similarity", tags=["similarity"])
+
+
+@router.get("", response_model=dict)
+def get_similarity_status(session: Session = Depends(get_db_session)):
+    return similarity_status(session)
+
+
+@router.post("/rebuild", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+def start_similarity_rebuild(background: BackgroundTasks):
+    # Full rebuild recomputes IDF weights; poll GET /similarity for built_at
+    background.add_task(rebuild_similarity)
+    return {"status": "scheduled"}
+
+
+@router.post("/refresh", response_model=dict)
+def run_similarity_refresh():
+    # Normally triggered after item writes; exposed for catching up after bulk jobs
+    return refresh_similarity()
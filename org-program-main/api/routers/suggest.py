@@ -0,0 +1,28 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..schemas import Suggestions
+from ..services.suggest import SUGGEST_FIELDS, suggest
+
+
+router = APIRouter(prefix="/suggest", tags=["suggest"])
+
+FIELDS = ("title",) + SUGGEST_FIELDS
+
+
+@router.get("", response_model=Suggestions, response_model_exclude_none=True)
+def get_suggestions(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    fields: List[str] = Query(list(FIELDS)),
+    session: Session = Depends(get_db_session),
+):
+    # Typeahead: called per keystroke, so titles come from FTS prefix indexes and
+    # subjects/creators from an in-memory dictionary (see services/suggest.py)
+    unknown = [f for f in fields if f not in FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    return suggest(session, prefix, limit, fields)
@@ -0,0 +1,26 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from ..deps import get_db_session
+from ..schemas import Timeline
+from ..services.timeline import date_bounds, timeline
+
+
+router = APIRouter(prefix="/timeline", tags=["timeline"])
+
+
+@router.get("", response_model=Timeline)
+def get_timeline(
+    granularity: Literal["year", "month"] = Query("year"),
+    date_from: Optional[str] = Query(default=None, description="Only items dated on or after, e.g. 1850"),
+    date_to: Optional[str] = Query(default=None, description="Only items dated on or before, e.g. 1950"),
+    session: Session = Depends(get_db_session),
+):
+    # Histogram of item dates: grouped scans of the (date_start, date_end) index
+    try:
+        start, end = date_bounds(date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return timeline(session, granularity, start, end)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, RedirectResponse
+
+from ..storage import StorageError, get_storage, reads_proxied
+
+
+# Mounted at the app root (not under /api) in place of StaticFiles when assets
+# live in an object store, so "uploads/<item id>/<file>" links keep working
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"])
+def read_upload(key: str):
+    storage = get_storage()
+    if not reads_proxied():
+        # Bytes go straight from the object store to the client
+        return RedirectResponse(storage.presigned_url(key), status_code=307)
+    try:
+        path = storage.fetch(key)
+    except StorageError:
+        raise HTTPException(status_code=404, detail="File not found")
+    # Hot objects are served from the node's read cache without touching the store
+    return FileResponse(path)
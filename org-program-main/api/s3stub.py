@@ -0,0 +1,145 @@
+"""
+Local S3-compatible stand-in for development and tests.
+
+Serves the subset of the S3 API that api.storage uses (path-style PUT/GET/HEAD/
+DELETE of objects and multipart uploads) from a directory, so the object-store
+backend can be exercised without AWS or MinIO:
+
+    python -m api.s3stub --root ./s3data --port 9000
+    STORAGE_BACKEND=s3 S3_ENDPOINT=http://127.0.0.1:9000 S3_BUCKET=assets \
+        S3_ACCESS_KEY=dev S3_SECRET_KEY=dev uvicorn api.main:app
+
+Requests must be SigV4-signed (header or presigned query) and presigned URLs
+must be unexpired, but signatures are not verified.
+"""
+import argparse
+import hashlib
+import re
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Union
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+
+_PART = re.compile(r"<PartNumber>(\d+)</PartNumber>")
+_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+def _error(status: int, code: str, message: str = "") -> Response:
+    body = f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code><Message>{message}</Message></Error>'
+    return Response(body, status_code=status, media_type="application/xml")
+
+
+def _authorized(request: Request) -> Union[Response, None]:
+    if request.headers.get("authorization", "").startswith("AWS4-HMAC-SHA256 "):
+        return None
+    params = request.query_params
+    if "X-Amz-Signature" not in params:
+        return _error(403, "AccessDenied", "Missing SigV4 authentication")
+    try:
+        signed_at = datetime.strptime(params["X-Amz-Date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        expires = timedelta(seconds=int(params["X-Amz-Expires"]))
+    except (KeyError, ValueError):
+        return _error(403, "AccessDenied", "Malformed presigned URL")
+    if datetime.now(timezone.utc) > signed_at + expires:
+        return _error(403, "AccessDenied", "Request has expired")
+    return None
+
+
+def create_stub_app(root: Union[str, Path]) -> Starlette:
+    root = Path(root)
+    uploads = root / ".multipart"
+
+    def object_path(bucket: str, key: str) -> Path:
+        parts = [p for p in key.split("/") if p not in ("", ".", "..")]
+        return root.joinpath(bucket, *parts)
+
+    def etag(data: bytes) -> str:
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+    async def handle(request: Request) -> Response:
+        denied = _authorized(request)
+        if denied is not None:
+            return denied
+        bucket, key = request.path_params["bucket"], request.path_params["key"]
+        path = object_path(bucket, key)
+        params = request.query_params
+        method = request.method
+
+        if method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            (uploads / upload_id).mkdir(parents=True)
+            body = (
+                f'<?xml version="1.0" encoding="UTF-8"?><InitiateMultipartUploadResult xmlns="{_XMLNS}">'
+                f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>"
+                "</InitiateMultipartUploadResult>"
+            )
+            return Response(body, media_type="application/xml")
+
+        if "uploadId" in params:
+            upload_dir = uploads / params["uploadId"]
+            if not upload_dir.is_dir():
+                return _error(404, "NoSuchUpload")
+            if method == "PUT":
+                data = await request.body()
+                (upload_dir / params["partNumber"]).write_bytes(data)
+                return Response(headers={"ETag": etag(data)})
+            if method == "POST":
+                numbers = [int(n) for n in _PART.findall((await request.body()).decode("utf-8"))]
+                if not numbers or numbers != sorted(numbers):
+                    return _error(400, "InvalidPartOrder")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                digest = hashlib.md5()
+                with path.open("wb") as out_f:
+                    for number in numbers:
+                        part = (upload_dir / str(number)).read_bytes()
+                        digest.update(hashlib.md5(part).digest())
+                        out_f.write(part)
+                shutil.rmtree(upload_dir)
+                body = (
+                    f'<?xml version="1.0" encoding="UTF-8"?><CompleteMultipartUploadResult xmlns="{_XMLNS}">'
+                    f'<Key>{key}</Key><ETag>"{digest.hexdigest()}-{len(numbers)}"</ETag></CompleteMultipartUploadResult>'
+                )
+                return Response(body, media_type="application/xml")
+            if method == "DELETE":
+                shutil.rmtree(upload_dir)
+                return Response(status_code=204)
+
+        if method == "PUT":
+            data = await request.body()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            return Response(headers={"ETag": etag(data)})
+        if method in ("GET", "HEAD"):
+            if not path.is_file():
+                return _error(404, "NoSuchKey")
+            return FileResponse(path, media_type="application/octet-stream")
+        if method == "DELETE":
+            path.unlink(missing_ok=True)
+            return Response(status_code=204)
+        return _error(405, "MethodNotAllowed")
+
+    return Starlette(
+        routes=[Route("/{bucket}/{key:path}", handle, methods=["GET", "HEAD", "PUT", "POST", "DELETE"])]
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local S3-compatible stand-in")
+    parser.add_argument("--root", default="./s3data", help="Directory holding buckets and objects")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.root), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ItemBase(BaseModel):
@@ -50,17 +50,219 @@ class AssetRead(BaseModel):
     mime_type: Optional[str]
     bytes: int
     checksum: Optional[str]
-    exif_json: dict
-    ocr_json: dict
+    # Stored apart from the asset row; filled on GET /items/{id} and with include=exif,ocr
+    exif_json: Optional[dict] = None
+    ocr_json: Optional[dict] = None
     is_primary: bool
+    phash: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class ItemRead(ItemBase):
     id: uuid.UUID
+    # `date` parsed to its first/last possible day (YYYYMMDD); None when unreadable
+    date_start: Optional[int] = None
+    date_end: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     assets: List[AssetRead] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemSummaryRead(BaseModel):
+    # Card/grid row: no asset list, no metadata
+    item_id: uuid.UUID
+    title: str
+    type: Optional[str] = None
+    date: Optional[str] = None
+    date_start: Optional[int] = None
+    date_end: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    asset_count: int
+    total_bytes: int
+    primary_asset_id: Optional[uuid.UUID] = None
+    primary_file_path: Optional[str] = None
+    primary_mime_type: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ChangeRead(BaseModel):
+    seq: int
+    item_id: uuid.UUID
+    op: str
+    changed_at: datetime
+    item: Optional[ItemRead] = None
+
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangeRead]
+    next: int
+    has_more: bool
+
+
+class ArchiveImportRequest(BaseModel):
+    # Server-side paths, inside IMPORT_ROOT (relative paths are taken from it)
+    path: str
+    sidecar: Optional[str] = None
+    batch_size: int = 500
+    workers: Optional[int] = None  # EXIF threads; 0 = in the job's own thread
+
+
+class StagedAssetsRequest(BaseModel):
+    # Server-side paths, inside IMPORT_ROOT (relative paths are taken from it)
+    paths: List[str] = Field(min_length=1)
+
+
+class ImportJobRead(BaseModel):
+    id: uuid.UUID
+    source: str
+    sidecar: Optional[str]
+    status: str
+    last_key: Optional[str]
+    files_seen: int
+    imported: int
+    duplicates: int
+    failed: int
+    bytes_imported: int
+    elapsed_seconds: float
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    report: dict = {}
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EnrichmentJobRequest(BaseModel):
+    batch_size: int = 200
+    rate: Optional[float] = None  # max items per second
+
+
+class EnrichmentJobRead(BaseModel):
+    id: uuid.UUID
+    status: str
+    batch_size: int
+    rate: Optional[float]
+    last_item_id: Optional[uuid.UUID]
+    items_seen: int
+    assets_seen: int
+    items_changed: int
+    elapsed_seconds: float
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    report: dict = {}
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NearDuplicate(BaseModel):
+    asset_id: uuid.UUID
+    item_id: uuid.UUID
+    phash: int
+    distance: int = 0  # Hamming distance in bits
+
+
+class DuplicateCluster(BaseModel):
+    size: int
+    assets: List[NearDuplicate]
+
+
+class DuplicateReport(BaseModel):
+    max_distance: int
+    assets_indexed: int
+    cluster_count: int
+    elapsed_ms: float
+    clusters: List[DuplicateCluster]
+
+
+class SimilarItem(BaseModel):
+    id: uuid.UUID
+    title: str
+    score: float
+
+
+class TitleSuggestion(BaseModel):
+    id: uuid.UUID
+    title: str
+
+
+class TermSuggestion(BaseModel):
+    value: str
+    count: int  # number of items using this value
+
+
+class Suggestions(BaseModel):
+    prefix: str
+    titles: Optional[List[TitleSuggestion]] = None
+    subjects: Optional[List[TermSuggestion]] = None
+    creators: Optional[List[TermSuggestion]] = None
+
+
+class DcImportResult(BaseModel):
+    format: str
+    records: int
+    imported: int
+    invalid: int
+    errors: List[str] = []
+    elapsed_seconds: float
+    records_per_second: Optional[float] = None
+
+
+class TimelineBucket(BaseModel):
+    period: str
+    count: int
+
+
+class Timeline(BaseModel):
+    granularity: str
+    buckets: List[TimelineBucket]
+    # Items with a readable date in the requested range; `unplaced` of them are too
+    # coarse for the granularity (e.g. "1931" in a month view)
+    dated: int
+    unplaced: int
+    undated: int
+
+
+class AssetFixityRead(BaseModel):
+    asset_id: uuid.UUID
+    status: str
+    checked_at: datetime
+    verified_at: Optional[datetime] = None
+    actual_checksum: Optional[str] = None
+    error: Optional[str] = None
+    failures: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FixityFailure(AssetFixityRead):
+    item_id: uuid.UUID
+    file_path: str
+    expected_checksum: Optional[str] = None
+
+
+class FixityCycle(BaseModel):
+    number: int
+    started_at: datetime
+    assets_checked: int
+    bytes_checked: int
+    total_bytes: int
+    progress: Optional[float] = None
+    last_completed_at: Optional[datetime] = None
+
+
+class FixityReport(BaseModel):
+    assets: int
+    checked: int
+    never_checked: int
+    overdue: int
+    by_status: Dict[str, int]
+    period_days: float
+    cycle: Optional[FixityCycle] = None
+    failures: List[FixityFailure]
+
@@ -1 +1 @@
-__all__ = ["exif", "ocr", "dc_xml"]
+__all__ = ["exif", "ocr", "dc_xml", "dc_import", "exporters", "oai", "changes", "events", "enrichment", "archive_import", "cache", "reenrichment", "phash", "similarity", "suggest", "asset_metadata", "dates", "timeline", "fixity", "batch_upload", "item_summary", "item_cache"]
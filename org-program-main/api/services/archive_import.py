@@ -0,0 +1,290 @@
+import csv
+import hashlib
+import logging
+import mimetypes
+import os
+import time
+import uuid
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from ..db import get_session, insert_fts_rows
+from ..models import Asset, ImportJob, Item, utcnow
+from ..storage import Storage, get_storage, open_writer
+from .asset_metadata import save_metadata
+from .changes import record_changes
+from .dc_xml import dc_fields_from_row
+from .enrichment import enrich_item
+from .exif import extract_exif
+from .phash import dhash
+from .ocr import extract_ocr_stub
+
+
+logger = logging.getLogger(__name__)
+
+
+COPY_CHUNK = 1024 * 1024
+SIDECAR_PATH_COLUMNS = ("path", "file", "filename")
+# EXIF/hash threads for jobs started over the API (the CLI uses processes)
+THREAD_WORKERS = 2
+
+
+class SourceEntry(NamedTuple):
+    key: str  # posix path relative to the source root
+    size: int
+    open: Callable[[], BinaryIO]
+
+
+def _sort_key(key: str) -> Tuple[str, ...]:
+    # Component-wise ordering, identical for directory walks and ZIP listings
+    return tuple(key.split("/"))
+
+
+def _is_hidden(key: str) -> bool:
+    return any(part.startswith(".") or part == "__MACOSX" for part in key.split("/"))
+
+
+def _walk_dir(root: Path, rel: Tuple[str, ...], after: Optional[Tuple[str, ...]]) -> Iterator[SourceEntry]:
+    with os.scandir(root.joinpath(*rel)) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        path = rel + (entry.name,)
+        if entry.is_dir(follow_symlinks=False):
+            # Skip subtrees that sort entirely before the checkpoint
+            if after is not None and path < after and after[: len(path)] != path:
+                continue
+            yield from _walk_dir(root, path, after)
+        elif entry.is_file():
+            if after is not None and path <= after:
+                continue
+            full = entry.path
+            yield SourceEntry("/".join(path), entry.stat().st_size, lambda p=full: open(p, "rb"))
+
+
+def _walk_zip(zf: zipfile.ZipFile, after: Optional[Tuple[str, ...]]) -> Iterator[SourceEntry]:
+    infos = [i for i in zf.infolist() if not i.is_dir() and not _is_hidden(i.filename)]
+    infos.sort(key=lambda i: _sort_key(i.filename))
+    for info in infos:
+        if after is not None and _sort_key(info.filename) <= after:
+            continue
+        yield SourceEntry(info.filename, info.file_size, lambda i=info: zf.open(i))
+
+
+@contextmanager
+def open_source(source: str, after: Optional[str] = None, exclude: Optional[str] = None) -> Iterator[Iterator[SourceEntry]]:
+    """
+    Open a directory tree or ZIP archive and yield an iterator over its files in a
+    stable, sorted order, starting after the `after` key when resuming. Hidden files
+    and the `exclude` path (e.g. a sidecar stored inside the tree) are skipped.
+    """
+    after_key = _sort_key(after) if after else None
+    if zipfile.is_zipfile(source):
+        # The archive stays open until the caller is done reading entries
+        with zipfile.ZipFile(source) as zf:
+            yield _walk_zip(zf, after_key)
+        return
+    root = Path(source)
+    excluded = Path(exclude).resolve() if exclude else None
+    yield (e for e in _walk_dir(root, (), after_key) if excluded is None or root.joinpath(e.key).resolve() != excluded)
+
+
+def load_sidecar(path: str) -> Dict[str, dict]:
+    """Read a CSV of Dublin Core fields keyed by the file path column (path, file or filename)."""
+    rows: Dict[str, dict] = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            key = next((row[c] for c in SIDECAR_PATH_COLUMNS if row.get(c)), None)
+            if key:
+                rows[key.strip().replace("\\", "/").lstrip("./")] = dc_fields_from_row(row)
+    return rows
+
+
+def _batched(entries: Iterator[SourceEntry], size: int) -> Iterator[List[SourceEntry]]:
+    while True:
+        batch = list(islice(entries, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_and_hash(entry: SourceEntry, storage: Storage, key: str) -> Tuple[str, int, str]:
+    # Returns the checksum, the size and a local path to read the copy from
+    sha256 = hashlib.sha256()
+    size = 0
+    with entry.open() as src, open_writer(storage, key) as out_f:
+        while True:
+            chunk = src.read(COPY_CHUNK)
+            if not chunk:
+                break
+            out_f.write(chunk)
+            size += len(chunk)
+            sha256.update(chunk)
+    return sha256.hexdigest(), size, str(out_f.path)
+
+
+def _analyze_image(path: str) -> Tuple[dict, Optional[int]]:
+    # Module-level so the process pool can pickle it
+    return extract_exif(path), dhash(path)
+
+
+def _import_batch(
+    session: Session,
+    job: ImportJob,
+    batch: List[SourceEntry],
+    sidecar: Dict[str, dict],
+    executor: Optional[Executor],
+) -> None:
+    storage = get_storage()
+    staged = []
+
+    # 1. Copy into the asset store, hashing on the way
+    for entry in batch:
+        job.files_seen += 1
+        # Deterministic ids: re-running an interrupted batch rewrites the same objects
+        item_id = uuid.uuid5(job.id, entry.key)
+        key = f"{item_id}/{os.path.basename(entry.key)}"
+        try:
+            checksum, size, local = _copy_and_hash(entry, storage, key)
+        except Exception as e:
+            logger.warning("failed to copy %s: %s", entry.key, e)
+            job.failed += 1
+            continue
+        staged.append((entry, item_id, key, local, checksum, size))
+
+    # 2. Dedupe by checksum against the archive and within the batch (one query)
+    checksums = {s[4] for s in staged}
+    existing = set(session.exec(select(Asset.checksum).where(Asset.checksum.in_(checksums))).all()) if checksums else set()
+    unique = []
+    for staged_entry in staged:
+        key, checksum = staged_entry[2], staged_entry[4]
+        if checksum in existing:
+            job.duplicates += 1
+            storage.delete(key)
+            continue
+        existing.add(checksum)
+        unique.append(staged_entry)
+
+    # 3. EXIF extraction and perceptual hashing, fanned out to the process pool for images
+    mime_types = [mimetypes.guess_type(s[0].key)[0] or "application/octet-stream" for s in unique]
+    image_paths = [s[3] for s, mime in zip(unique, mime_types) if mime.startswith("image/")]
+    if executor is not None and image_paths:
+        image_data = dict(zip(image_paths, executor.map(_analyze_image, image_paths, chunksize=16)))
+    else:
+        image_data = {p: _analyze_image(p) for p in image_paths}
+
+    # 4. Items, assets, FTS and change feed in the same transaction as the checkpoint
+    fts_rows = []
+    new_ids = []
+    for (entry, item_id, key, local, checksum, size), mime_type in zip(unique, mime_types):
+        exif, phash = image_data.get(local) or ({"date": None, "gps": None, "raw": {}}, None)
+        ocr = extract_ocr_stub(local)
+        fields = sidecar.get(entry.key, {})
+        item = Item(id=item_id, **{"title": "", **fields})
+        asset = Asset(
+            item_id=item_id,
+            file_path=storage.stored_path(key),
+            mime_type=mime_type,
+            bytes=size,
+            checksum=checksum,
+            is_primary=True,
+            phash=phash,
+        )
+        enrich_item(item, os.path.basename(entry.key), mime_type, checksum, exif, ocr)
+        session.add(item)
+        session.add(asset)
+        save_metadata(session, asset.id, exif=exif, ocr=ocr)
+        fts_rows.append(
+            {"item_id": str(item_id), "title": item.title, "description": item.description, "ocr": ocr.get("text")}
+        )
+        new_ids.append(item_id)
+        job.imported += 1
+        job.bytes_imported += size
+
+    insert_fts_rows(session, fts_rows)
+    record_changes(session, new_ids)
+    job.last_key = batch[-1].key
+    job.updated_at = utcnow()
+    session.add(job)
+    session.commit()
+
+
+def _executor(workers: Optional[int], processes: bool) -> Optional[Executor]:
+    if workers == 0:
+        return None
+    if processes:
+        return ProcessPoolExecutor(max_workers=workers)
+    # Jobs started over the API run inside a server worker, which must not fork
+    # a process per CPU; Pillow releases the GIL for most of the decoding
+    return ThreadPoolExecutor(max_workers=workers or THREAD_WORKERS)
+
+
+def run_import(job_id: uuid.UUID, batch_size: int = 500, workers: Optional[int] = None, processes: bool = True) -> ImportJob:
+    """
+    Run (or resume) an import job to completion. Progress is committed after every
+    batch, so an interrupted run picks up after the last committed file.
+    workers=0 extracts EXIF in-process. Otherwise `workers` processes (None: one
+    per CPU), or with processes=False, threads (None: THREAD_WORKERS).
+    """
+    started = time.perf_counter()
+    with get_session() as session:
+        job = session.get(ImportJob, job_id)
+        if job is None:
+            raise ValueError(f"Import job {job_id} not found")
+        job.status = "running"
+        job.error = None
+        session.commit()
+
+        executor = _executor(workers, processes)
+        try:
+            sidecar = load_sidecar(job.sidecar) if job.sidecar else {}
+            with open_source(job.source, after=job.last_key, exclude=job.sidecar) as entries:
+                for batch in _batched(entries, batch_size):
+                    _import_batch(session, job, batch, sidecar, executor)
+                    logger.info(
+                        "import batch",
+                        extra={
+                            "job_id": str(job.id),
+                            "imported": job.imported,
+                            "duplicates": job.duplicates,
+                            "last_key": job.last_key,
+                        },
+                    )
+            job.status = "completed"
+        except Exception as e:
+            session.rollback()
+            job = session.get(ImportJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception("import job %s failed", job_id)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            job.elapsed_seconds += time.perf_counter() - started
+            job.updated_at = utcnow()
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        return job
+
+
+def import_report(job: ImportJob) -> dict:
+    """Throughput summary for a (possibly still running) job."""
+    elapsed = job.elapsed_seconds or 0.0
+    return {
+        "files_seen": job.files_seen,
+        "imported": job.imported,
+        "duplicates": job.duplicates,
+        "failed": job.failed,
+        "megabytes": round(job.bytes_imported / 1_000_000, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "files_per_second": round(job.files_seen / elapsed, 1) if elapsed else None,
+        "megabytes_per_second": round(job.bytes_imported / 1_000_000 / elapsed, 2) if elapsed else None,
+    }
@@ -0,0 +1,132 @@
+"""
+Compressed EXIF/OCR storage (the AssetMetadata side table).
+
+Extraction results can be far larger than the asset row itself, so they are kept
+out of it: listings and relationship loads never read them, GET /api/items/{id}
+and `include=exif,ocr` load them with one IN query, and services that need only
+OCR text (similarity, re-enrichment) read just the "ocr" rows.
+
+Values are stored as compressed JSON (ASSET_METADATA_CODEC=zlib, or zstd when
+the zstandard package is installed); values that don't shrink are stored as
+plain JSON. Each row records its codec, so rows written under different
+settings stay readable.
+"""
+import json
+import os
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from ..models import Asset, AssetMetadata
+from .exif import EXIF_VERSION
+from .ocr import OCR_VERSION
+
+# Optional: better ratio and faster decompression than zlib when installed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+
+KIND_EXIF = "exif"
+KIND_OCR = "ocr"
+KINDS = (KIND_EXIF, KIND_OCR)
+VERSIONS = {KIND_EXIF: EXIF_VERSION, KIND_OCR: OCR_VERSION}
+# IN-list size for batched loads
+_PAGE = 500
+
+Metadata = Dict[uuid.UUID, Dict[str, dict]]
+
+
+def _codec() -> str:
+    codec = os.getenv("ASSET_METADATA_CODEC", "zlib").lower()
+    return "zstd" if codec == "zstd" and zstandard is not None else "zlib"
+
+
+def encode(value: dict, codec: Optional[str] = None) -> Tuple[str, bytes, int]:
+    """(codec, data, uncompressed size) for a JSON-serialisable dict."""
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    codec = codec or _codec()
+    if codec == "zstd":
+        data = zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        data = zlib.compress(raw, 6)
+    if len(data) >= len(raw):
+        return "json", raw, len(raw)
+    return codec, data, len(raw)
+
+
+def decode(codec: str, data: bytes) -> dict:
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("asset metadata is zstd-compressed but zstandard is not installed")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return json.loads(data)
+
+
+def metadata_row(asset_id: uuid.UUID, kind: str, value: dict, version: Optional[int] = None) -> dict:
+    """Column values for one AssetMetadata row (for bulk inserts)."""
+    codec, data, size = encode(value or {})
+    return {
+        "asset_id": asset_id,
+        "kind": kind,
+        "version": VERSIONS[kind] if version is None else version,
+        "codec": codec,
+        "size": size,
+        "data": data,
+    }
+
+
+def save_metadata(session: Session, asset_id: uuid.UUID, exif: Optional[dict] = None, ocr: Optional[dict] = None) -> None:
+    """Add the extraction results of a new asset to the session. The caller commits."""
+    for kind, value in ((KIND_EXIF, exif), (KIND_OCR, ocr)):
+        if value is not None:
+            session.add(AssetMetadata(**metadata_row(asset_id, kind, value)))
+
+
+def load_metadata(session: Session, asset_ids: Iterable[uuid.UUID], kinds: Sequence[str] = KINDS) -> Metadata:
+    """{asset_id: {kind: value}} for the given assets, one query per page of ids."""
+    asset_ids = list(asset_ids)
+    found: Metadata = defaultdict(dict)
+    for start in range(0, len(asset_ids), _PAGE):
+        page = asset_ids[start:start + _PAGE]
+        stmt = select(AssetMetadata.asset_id, AssetMetadata.kind, AssetMetadata.codec, AssetMetadata.data).where(
+            AssetMetadata.asset_id.in_(page), AssetMetadata.kind.in_(list(kinds))
+        )
+        for asset_id, kind, codec, data in session.exec(stmt):
+            found[asset_id][kind] = decode(codec, data)
+    return found
+
+
+def ocr_text_by_item(session: Session, item_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, List[str]]:
+    """OCR text of every asset of the given items, without touching EXIF rows."""
+    item_ids = list(item_ids)
+    texts: Dict[uuid.UUID, List[str]] = defaultdict(list)
+    for start in range(0, len(item_ids), _PAGE):
+        page = item_ids[start:start + _PAGE]
+        stmt = (
+            select(Asset.item_id, AssetMetadata.codec, AssetMetadata.data)
+            .join(AssetMetadata, AssetMetadata.asset_id == Asset.id)
+            .where(Asset.item_id.in_(page), AssetMetadata.kind == KIND_OCR)
+        )
+        for item_id, codec, data in session.exec(stmt):
+            texts[item_id].append(str(decode(codec, data).get("text") or ""))
+    return texts
+
+
+def attach_metadata(session: Session, items: list, kinds: Sequence[str] = KINDS) -> list:
+    """Fill exif_json / ocr_json on the assets of ItemRead models, in place."""
+    assets = [asset for item in items for asset in item.assets]
+    metadata = load_metadata(session, [asset.id for asset in assets], kinds)
+    for asset in assets:
+        values = metadata.get(asset.id, {})
+        if KIND_EXIF in kinds:
+            asset.exif_json = values.get(KIND_EXIF, {})
+        if KIND_OCR in kinds:
+            asset.ocr_json = values.get(KIND_OCR, {})
+    return items
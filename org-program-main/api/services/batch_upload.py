@@ -0,0 +1,139 @@
+"""
+Attach many files to one item in a single request: POST
+/api/items/{id}/assets/batch (multipart) or /assets/staged (files already on
+the server, e.g. a scanning station's output folder).
+
+Per file, the copy into the asset store (with its SHA-256) and the extractors
+(EXIF, perceptual hash, OCR) run in a pool of UPLOAD_BATCH_WORKERS threads: the
+copies overlap their I/O and hashlib/Pillow release the GIL for most of their
+work. Everything per item happens once, in one transaction: the Asset and
+metadata rows, enrichment of the item fields (in file order, so the first file
+fills an empty field as it would with single uploads), updated_at, the FTS row
+and the change-feed entry. A 300-page book is one commit and one FTS rewrite
+instead of 300.
+"""
+import logging
+import mimetypes
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlmodel import Session
+
+from ..db import reset_fts_for_item
+from ..metrics import stage
+from ..models import Asset, Item, utcnow
+from ..storage import Storage, StorageError
+from .archive_import import SourceEntry, _copy_and_hash
+from .asset_metadata import ocr_text_by_item, save_metadata
+from .changes import record_change
+from .enrichment import enrich_item
+from .events import STAGE_EXIF, STAGE_INDEXED, STAGE_OCR, STAGE_STORED, bus
+from .exif import extract_exif
+from .ocr import extract_ocr_stub
+from .phash import dhash
+
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("UPLOAD_BATCH_WORKERS", "4"))
+
+
+class ProcessedFile(NamedTuple):
+    asset_id: uuid.UUID
+    name: str
+    key: str
+    mime_type: str
+    size: int
+    checksum: str
+    exif: dict
+    ocr: dict
+    phash: Optional[int]
+
+
+def _process(storage: Storage, item_id: uuid.UUID, entry: SourceEntry, mime_type: str) -> ProcessedFile:
+    # Runs in a worker thread: store, then extract from the local copy
+    name = entry.key
+    asset_id = uuid.uuid4()
+    # A key of its own: the batch never overwrites an existing asset's file, so
+    # cleaning up after a failed batch can only remove files this batch wrote
+    key = f"{item_id}/{asset_id}/{name}"
+    progress = {"item_id": str(item_id), "asset_id": str(asset_id), "filename": name}
+    with stage("store"):
+        checksum, size, local_path = _copy_and_hash(entry, storage, key)
+    bus.publish(STAGE_STORED, bytes=size, checksum=checksum, **progress)
+    with stage("exif"):
+        exif = extract_exif(local_path)
+    with stage("phash"):
+        phash = dhash(local_path) if mime_type.startswith("image/") else None
+    bus.publish(STAGE_EXIF, date=exif.get("date"), gps=exif.get("gps") is not None, **progress)
+    with stage("ocr"):
+        ocr = extract_ocr_stub(local_path)
+    bus.publish(STAGE_OCR, has_text=bool(ocr.get("text")), **progress)
+    return ProcessedFile(asset_id, name, key, mime_type, size, checksum, exif, ocr, phash)
+
+
+def store_and_extract(
+    storage: Storage,
+    item_id: uuid.UUID,
+    entries: Sequence[SourceEntry],
+    mime_types: Sequence[Optional[str]],
+    workers: Optional[int] = None,
+) -> List[ProcessedFile]:
+    """
+    Store and analyse `entries` concurrently, returning results in input order.
+    If any file fails, the files already stored are deleted and the first error
+    is raised, so a failed batch leaves nothing behind.
+    """
+    types = [t or mimetypes.guess_type(e.key)[0] or "application/octet-stream" for e, t in zip(entries, mime_types)]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers or WORKERS, len(entries)))) as executor:
+        futures = [executor.submit(_process, storage, item_id, e, t) for e, t in zip(entries, types)]
+    # Leaving the block waits for every file, including the ones after a failure
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        for future in futures:
+            if future.exception() is None:
+                try:
+                    storage.delete(future.result().key)
+                except StorageError as e:
+                    logger.warning("could not remove %s after a failed batch: %s", future.result().key, e)
+        logger.error("batch upload to item %s failed: %s", item_id, errors[0])
+        raise errors[0]
+    return [f.result() for f in futures]
+
+
+def attach_files(session: Session, storage: Storage, item: Item, files: Sequence[ProcessedFile]) -> List[Asset]:
+    """Add the processed files to `item` and update it, its FTS row and the change feed in one commit."""
+    assets = []
+    for f in files:
+        asset = Asset(
+            id=f.asset_id,
+            item_id=item.id,
+            file_path=storage.stored_path(f.key),
+            mime_type=f.mime_type,
+            bytes=f.size,
+            checksum=f.checksum,
+            is_primary=False,
+            phash=f.phash,
+        )
+        session.add(asset)
+        save_metadata(session, asset.id, exif=f.exif, ocr=f.ocr)
+        assets.append(asset)
+
+    with stage("enrich"):
+        for f in files:
+            enrich_item(item, f.name, f.mime_type, f.checksum, f.exif, f.ocr)
+    item.updated_at = utcnow()
+    session.add(item)
+    session.flush()
+
+    # The FTS row gets the OCR text of every asset of the item, old and new
+    with stage("fts"):
+        ocr_text = " ".join(ocr_text_by_item(session, [item.id]).get(item.id, ()))
+        reset_fts_for_item(session, str(item.id), item.title, item.description or "", ocr_text)
+    record_change(session, item.id)
+    session.commit()
+    for f in files:
+        bus.publish(STAGE_INDEXED, item_id=str(item.id), asset_id=str(f.asset_id), filename=f.name)
+    return assets
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, List, Optional, Union
+
+
+class VersionedLRU:
+    """
+    Bounded, thread-safe LRU of per-item values tagged with a version (the item's
+    updated_at). A lookup only hits when the stored version matches, so a stale
+    entry can never be served even if an invalidation is missed.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: Any, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+
+class SqliteCacheStore:
+    """
+    Versioned bytes store in a local SQLite file, shared by every worker process on
+    the host. Same get/put/invalidate contract as VersionedLRU; bounded by dropping
+    the oldest writes once it grows past maxsize. The file is disposable.
+    """
+
+    _PRUNE_EVERY = 1000
+
+    def __init__(self, name: str, path: str, maxsize: int):
+        self.name = name
+        self.path = path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the tail of the cache on a crash is harmless
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, version TEXT NOT NULL, value BLOB NOT NULL)"
+        )
+
+    def get(self, key: Hashable, version: Any) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entry WHERE key = ? AND version = ?", (str(key), str(version))
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: Hashable, version: Any, value: bytes) -> None:
+        with self._lock:
+            # REPLACE gives the row a new rowid, so rowid order is write order
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, version, value) VALUES (?, ?, ?)",
+                (str(key), str(version), value),
+            )
+            self._puts += 1
+            if self._puts % self._PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        excess = self._conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0] - self.maxsize
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache_entry WHERE rowid IN (SELECT rowid FROM cache_entry ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        keys = [(str(key),) for key in keys]
+        if keys:
+            with self._lock:
+                self._conn.executemany("DELETE FROM cache_entry WHERE key = ?", keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entry")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+        return {
+            "name": self.name,
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+
+ItemCache = Union[VersionedLRU, SqliteCacheStore]
+
+# Caches holding per-item data; every item write invalidates them all
+_item_caches: List[ItemCache] = []
+
+
+def register_item_cache(cache: ItemCache) -> ItemCache:
+    _item_caches.append(cache)
+    return cache
+
+
+def invalidate_items(item_ids: Iterable[uuid.UUID]) -> None:
+    item_ids = list(item_ids)
+    for cache in _item_caches:
+        cache.invalidate(item_ids)
+
+
+def item_cache_stats() -> List[dict]:
+    return [cache.stats() for cache in _item_caches]
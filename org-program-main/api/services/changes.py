@@ -0,0 +1,84 @@
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from ..models import Item, ItemChange, utcnow
+from .cache import invalidate_items
+from .item_summary import refresh_summaries
+
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+
+def record_change(session: Session, item_id: uuid.UUID, op: str = OP_UPSERT) -> None:
+    """
+    Append a change for an item to the feed. Older rows for the same item are
+    dropped so a client catching up only ever sees the latest state per item.
+    The caller commits, keeping the feed in the same transaction as the write.
+    Also invalidates per-item caches (see services/cache.py) and rewrites the
+    items' summary rows (services/item_summary.py).
+    """
+    record_changes(session, [item_id], op)
+
+
+def record_changes(session: Session, item_ids: Iterable[uuid.UUID], op: str = OP_UPSERT) -> None:
+    # Batch form for bulk writers: one DELETE for the whole batch
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    session.exec(delete(ItemChange).where(ItemChange.item_id.in_(item_ids)))
+    now = utcnow()
+    session.add_all([ItemChange(item_id=item_id, op=op, changed_at=now) for item_id in item_ids])
+    # Every item write passes through here, so per-item caches are dropped here too
+    invalidate_items(item_ids)
+    refresh_summaries(session, item_ids)
+
+
+def fetch_changes(
+    session: Session, since: int, limit: int
+) -> List[Tuple[ItemChange, Optional[Item]]]:
+    """Return up to `limit` changes after `since` with the current item row (None for tombstones)."""
+    # One range scan on the seq primary key, joined to the live item row; the
+    # page's assets come in one extra IN query instead of one lazy load per item
+    stmt = (
+        select(ItemChange, Item)
+        .outerjoin(Item, Item.id == ItemChange.item_id)
+        .where(ItemChange.seq > since)
+        .order_by(ItemChange.seq)
+        .limit(limit)
+        .options(selectinload(Item.assets))
+    )
+    return list(session.exec(stmt).all())
+
+
+def latest_seq(session: Session) -> int:
+    row = session.exec(select(ItemChange.seq).order_by(ItemChange.seq.desc()).limit(1)).first()
+    return row or 0
+
+
+def version_etag(item_id: uuid.UUID, updated_at: datetime) -> str:
+    # Weak validator: any write bumps updated_at, which changes the tag
+    digest = hashlib.sha1(f"{item_id}:{updated_at.isoformat()}".encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compare ignoring the weak prefix, as allowed for If-None-Match
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
@@ -0,0 +1,151 @@
+"""
+Normalise free-form Item.date values into an integer range for filtering,
+sorting and the timeline.
+
+`Item.date` holds whatever EXIF or a cataloguer supplied: "1931-07-04",
+"1931:07:04 10:11:12", "July 1931", "1890s", "c. 1890", "1890-1895",
+"19th century", ... `parse_date_range()` turns these into the first and last
+day they can mean, as YYYYMMDD integers (`Item.date_start` / `Item.date_end`),
+so range queries and GROUP BY year/month are plain index scans. Values it
+cannot read leave both columns NULL; the text itself is never changed.
+"""
+import calendar
+import re
+from typing import Dict, Optional, Tuple
+
+# "circa 1890" matches 1885-1895
+CIRCA_YEARS = 5
+
+DateRange = Tuple[int, int]
+
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+_MONTHS["sept"] = 9
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+_CIRCA_PREFIX = re.compile(r"^(?:circa|approx(?:imately|\.)?|about|around|ca?\.?|~)\s*(?=\d)")
+_CIRCA_SUFFIX = re.compile(r"\s*[?~]$")
+_BETWEEN = re.compile(r"^between\s+(.+?)\s+and\s+(.+)$")
+_RANGE_SEPARATORS = re.compile(r"\s*(?:/|\bto\b|\buntil\b|–|—|\s-\s)\s*")
+
+_YEAR = re.compile(r"^(\d{4})$")
+_DECADE = re.compile(r"^(\d{3})0'?s$")
+_CENTURY = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)\s+(?:century|c\.?)$")
+_YEAR_MONTH = re.compile(r"^(\d{4})[-/.:](\d{1,2})$")
+# ISO and EXIF ("1931:07:04 10:11:12") dates, with any time part ignored
+_YEAR_MONTH_DAY = re.compile(r"^(\d{4})[-/.:](\d{1,2})[-/.:](\d{1,2})(?:[t\s]\d{1,2}:[\d:.]*\S*)?$")
+_MONTH_YEAR = re.compile(rf"^({_MONTH_NAMES})\.?,?\s+(\d{{4}})$")
+_DAY_MONTH_YEAR = re.compile(rf"^(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_NAMES})\.?,?\s+(\d{{4}})$")
+_MONTH_DAY_YEAR = re.compile(rf"^({_MONTH_NAMES})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})$")
+
+
+def _ymd(year: int, month: int, day: int) -> int:
+    return year * 10000 + month * 100 + day
+
+
+def _month_range(year: int, month: int) -> Optional[DateRange]:
+    if not 1 <= month <= 12:
+        return None
+    return _ymd(year, month, 1), _ymd(year, month, calendar.monthrange(year, month)[1])
+
+
+def _day(year: int, month: int, day: int) -> Optional[DateRange]:
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return _ymd(year, month, day), _ymd(year, month, day)
+
+
+def _single(text: str) -> Optional[DateRange]:
+    """One date expression (no ranges or circa) as (first day, last day)."""
+    m = _YEAR.match(text)
+    if m:
+        year = int(m.group(1))
+        return (_ymd(year, 1, 1), _ymd(year, 12, 31)) if year > 0 else None
+    m = _YEAR_MONTH_DAY.match(text)
+    if m:
+        return _day(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = _YEAR_MONTH.match(text)
+    if m:
+        return _month_range(int(m.group(1)), int(m.group(2)))
+    m = _DECADE.match(text)
+    if m:
+        start = int(m.group(1)) * 10
+        return (_ymd(start, 1, 1), _ymd(start + 9, 12, 31)) if start > 0 else None
+    m = _CENTURY.match(text)
+    if m:
+        # Archival usage: the 19th century is 1800-1899
+        start = (int(m.group(1)) - 1) * 100
+        return (_ymd(max(start, 1), 1, 1), _ymd(start + 99, 12, 31)) if m.group(1) != "0" else None
+    m = _MONTH_YEAR.match(text)
+    if m:
+        return _month_range(int(m.group(2)), _MONTHS[m.group(1)])
+    m = _DAY_MONTH_YEAR.match(text)
+    if m:
+        return _day(int(m.group(3)), _MONTHS[m.group(2)], int(m.group(1)))
+    m = _MONTH_DAY_YEAR.match(text)
+    if m:
+        return _day(int(m.group(3)), _MONTHS[m.group(1)], int(m.group(2)))
+    return None
+
+
+def _span(left: str, right: str) -> Optional[DateRange]:
+    start = _single(left)
+    # "1890-95": the end year borrows the start's century (only after a bare year,
+    # or "2023-02-30" would read as February 2023 to 2030)
+    if start and _YEAR.match(left) and re.fullmatch(r"\d{2}", right):
+        right = str(start[0] // 1000000) + right
+    end = _single(right)
+    if start and end and start[0] <= end[1]:
+        return start[0], end[1]
+    return None
+
+
+def _widen(value: DateRange, years: int) -> DateRange:
+    return max(value[0] - years * 10000, 10101), value[1] + years * 10000
+
+
+def parse_date_range(value: Optional[str]) -> Optional[DateRange]:
+    """(first, last) day `value` can mean as YYYYMMDD integers, or None if unreadable."""
+    if not value:
+        return None
+    text = " ".join(value.strip().lower().split())
+    circa = False
+    if _CIRCA_PREFIX.match(text) or _CIRCA_SUFFIX.search(text):
+        circa = True
+        text = _CIRCA_SUFFIX.sub("", _CIRCA_PREFIX.sub("", text))
+
+    result = _single(text)
+    if result is None and _YEAR_MONTH_DAY.match(text):
+        # A full date that doesn't exist ("1931-02-30"), not a range
+        return None
+    if result is None:
+        m = _BETWEEN.match(text)
+        if m:
+            result = _span(m.group(1), m.group(2))
+    if result is None:
+        parts = _RANGE_SEPARATORS.split(text)
+        if len(parts) == 2:
+            result = _span(parts[0], parts[1])
+    if result is None and "-" in text:
+        # "1890-1895" / "1890-95" / "1931-07-04-1931-07-10": try each hyphen as the separator
+        for index in (i for i, ch in enumerate(text) if ch == "-"):
+            result = _span(text[:index].strip(), text[index + 1:].strip())
+            if result:
+                break
+    if result is None:
+        return None
+    return _widen(result, CIRCA_YEARS) if circa else result
+
+
+def date_columns(value: Optional[str]) -> Dict[str, Optional[int]]:
+    """date_start/date_end column values for `value` (for bulk inserts that bypass ORM events)."""
+    parsed = parse_date_range(value)
+    return {"date_start": parsed[0] if parsed else None, "date_end": parsed[1] if parsed else None}
+
+
+def bound(value: str, end: bool = False) -> Optional[int]:
+    """A query bound: "1890" is 18900101 as a lower bound and 18901231 as an upper one."""
+    parsed = parse_date_range(value)
+    if parsed is None:
+        return None
+    return parsed[1] if end else parsed[0]
@@ -1,10 +1,38 @@
+import os
 from typing import Iterable
 
 from lxml import etree
 
+from .cache import VersionedLRU, register_item_cache
+
 
 DC_NS = "http://purl.org/dc/elements/1.1/"
 
+# Item fields and the Dublin Core element each maps to
+DC_SCALAR_FIELDS = ("title", "description", "date", "type", "format", "coverage", "rights", "publisher", "language", "source")
+DC_LIST_FIELDS = {"creators": "creator", "contributors": "contributor", "subjects": "subject", "identifiers": "identifier"}
+# Separator for multi-valued fields in flat formats such as CSV
+LIST_SEPARATOR = ";"
+
+
+def dc_fields_from_row(row: dict) -> dict:
+    """
+    Map a flat record (e.g. a CSV row) to item fields. Accepts both item field names
+    ("creators") and DC element names ("creator"); multi-valued cells use ";".
+    Unknown columns and empty cells are ignored.
+    """
+    fields: dict = {}
+    for name in DC_SCALAR_FIELDS:
+        value = (row.get(name) or "").strip()
+        if value:
+            fields[name] = value
+    for name, element in DC_LIST_FIELDS.items():
+        cell = row.get(name) or row.get(element) or ""
+        values = [v.strip() for v in cell.split(LIST_SEPARATOR) if v.strip()]
+        if values:
+            fields[name] = values
+    return fields
+
 
 def _add_elems(parent, tag: str, values):
     for value in values:
@@ -17,27 +45,58 @@ def _add_elems(parent, tag: str, values):
         el.text = text
 
 
+def item_to_dc_dict(item) -> dict:
+    """Flatten an Item (or any object with item attributes) into the dict shape used below."""
+    data = {name: getattr(item, name) for name in DC_SCALAR_FIELDS}
+    for name in DC_LIST_FIELDS:
+        data[name] = list(getattr(item, name) or [])
+    return data
+
+
+def add_dc_elements(parent, item: dict) -> None:
+    """Append the dc:* elements for one item under `parent` (a record or oai_dc:dc element)."""
+    # Scalars
+    for name in DC_SCALAR_FIELDS:
+        _add_elems(parent, name, [item.get(name)])
+
+    # Arrays
+    for name, element in DC_LIST_FIELDS.items():
+        _add_elems(parent, element, item.get(name, []) or [])
+
+
+# Serialized <record> fragments keyed by item id and versioned by updated_at
+dc_record_cache = register_item_cache(VersionedLRU("dc_record", int(os.getenv("DC_CACHE_SIZE", "50000"))))
+
+DC_XML_HEADER = f"<?xml version='1.0' encoding='UTF-8'?>\n<records xmlns:dc=\"{DC_NS}\">\n".encode("utf-8")
+DC_XML_FOOTER = b"</records>\n"
+_RECORD_NS_DECL = f' xmlns:dc="{DC_NS}"'.encode("utf-8")
+
+
+def render_dc_record(item: dict) -> bytes:
+    """
+    Serialize one <record> exactly as it appears inside a pretty-printed <records>
+    document, so fragments can be concatenated between DC_XML_HEADER and DC_XML_FOOTER.
+    """
+    record = etree.Element("record", nsmap={"dc": DC_NS})
+    add_dc_elements(record, item)
+    etree.indent(record, space="  ", level=1)
+    fragment = etree.tostring(record, encoding="UTF-8", with_tail=False)
+    # The namespace is declared once on <records>; drop the copy lxml adds to the fragment root
+    return b"  " + fragment.replace(_RECORD_NS_DECL, b"", 1) + b"\n"
+
+
+def cached_dc_record(item) -> bytes:
+    """Fragment for an Item, rendered at most once per (id, updated_at)."""
+    fragment = dc_record_cache.get(item.id, item.updated_at)
+    if fragment is None:
+        fragment = render_dc_record(item_to_dc_dict(item))
+        dc_record_cache.put(item.id, item.updated_at, fragment)
+    return fragment
+
+
 def items_to_dc_xml(items: Iterable[dict]) -> str:
-    root = etree.Element("records", nsmap={"dc": DC_NS})
-    for item in items:
-        record = etree.SubElement(root, "record")
-
-        # Scalars
-        _add_elems(record, "title", [item.get("title")])
-        _add_elems(record, "description", [item.get("description")])
-        _add_elems(record, "date", [item.get("date")])
-        _add_elems(record, "type", [item.get("type")])
-        _add_elems(record, "format", [item.get("format")])
-        _add_elems(record, "coverage", [item.get("coverage")])
-        _add_elems(record, "rights", [item.get("rights")])
-        _add_elems(record, "publisher", [item.get("publisher")])
-        _add_elems(record, "language", [item.get("language")])
-        _add_elems(record, "source", [item.get("source")])
-
-        # Arrays
-        _add_elems(record, "creator", item.get("creators", []) or [])
-        _add_elems(record, "contributor", item.get("contributors", []) or [])
-        _add_elems(record, "subject", item.get("subjects", []) or [])
-        _add_elems(record, "identifier", item.get("identifiers", []) or [])
-
-    return etree.tostring(root, pretty_print=True, xml_declaration=True, encoding="UTF-8").decode("utf-8")
+    fragments = [render_dc_record(item) for item in items]
+    if not fragments:
+        root = etree.Element("records", nsmap={"dc": DC_NS})
+        return etree.tostring(root, pretty_print=True, xml_declaration=True, encoding="UTF-8").decode("utf-8")
+    return (DC_XML_HEADER + b"".join(fragments) + DC_XML_FOOTER).decode("utf-8")
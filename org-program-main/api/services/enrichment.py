@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+from ..models import Asset, Item
+
+
+logger = logging.getLogger(__name__)
+
+
+# Declarative rule table. Point ENRICHMENT_RULES at a JSON file with the same shape
+# to replace it; the table is compiled once, on first use (see get_engine()).
+DEFAULT_RULES: Dict[str, Any] = {
+    # Item fields taken from EXIF tags. "fill" only sets an empty field, "merge" adds
+    # to a list field (values split on `split`). The first present tag wins unless
+    # `join` is given, in which case all present tags are joined.
+    "exif_fields": [
+        {"name": "exif_description", "field": "description", "tags": ["ImageDescription", "XPComment"], "mode": "fill"},
+        {"name": "exif_creators", "field": "creators", "tags": ["Artist", "XPAuthor"], "mode": "merge", "split": "[;|]"},
+        {"name": "exif_keywords", "field": "subjects", "tags": ["XPKeywords"], "mode": "merge", "split": "[;,]"},
+        {"name": "exif_source", "field": "source", "tags": ["Make", "Model"], "mode": "fill", "join": " "},
+    ],
+    # High-level item type from the MIME type; first matching prefix wins
+    "mime_types": [
+        {"prefix": "image/", "type": "photo"},
+        {"prefix": "application/pdf", "type": "document"},
+    ],
+    # Inferred subjects. "filename" rules match whole filename tokens; "ocr" and
+    # EXIF tag sources (e.g. "Software") match substrings, case-insensitively.
+    "subjects": [
+        {
+            "name": "filename_architecture",
+            "source": "filename",
+            "keywords": ["library", "museum", "building", "architecture", "church", "bridge", "tower", "castle"],
+            "subjects": ["architecture", "places"],
+        },
+        {
+            "name": "filename_art",
+            "source": "filename",
+            "keywords": ["fan", "art", "drawing", "sketch", "illustration"],
+            "subjects": ["art", "fan art"],
+        },
+        {"name": "software_scanner", "source": "Software", "keywords": ["scanner"], "subjects": ["scanned"]},
+        {"name": "ocr_places", "source": "ocr", "keywords": ["library", "archive", "museum"], "subjects": ["places"]},
+    ],
+    # EXIF Artist also becomes an "artist:<name>" subject
+    "artist_subject": {"tag": "Artist", "prefix": "artist:"},
+    # Cap on inferred subjects to keep the UI tidy (EXIF keywords are not capped)
+    "max_inferred_subjects": 10,
+}
+
+
+def _is_empty(value: Optional[str]) -> bool:
+    return not value or not value.strip()
+
+
+def _decode_text(value: Any) -> str:
+    """EXIF text value as a clean string. XP* tags are UTF-16-LE, so stray NULs are dropped."""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-16-le", errors="ignore")
+    return str(value).replace("\x00", "").strip()
+
+
+class _Run:
+    """State for one enrichment pass over one file."""
+
+    __slots__ = ("item", "original_name", "mime_type", "checksum", "exif", "ocr_text", "texts", "lists", "inferred", "changed")
+
+    def __init__(self, item: Item, original_name: str, mime_type: str, checksum: str, exif: dict, ocr_text: str, texts: dict):
+        self.item = item
+        self.original_name = original_name or ""
+        self.mime_type = mime_type or ""
+        self.checksum = checksum
+        self.exif = exif
+        self.ocr_text = ocr_text
+        self.texts = texts
+        # List-field additions, merged (and sorted) once at the end of the pass
+        self.lists: Dict[str, Set[str]] = {}
+        self.inferred: Set[str] = set()
+        self.changed = False
+
+    def fill(self, field: str, value: Optional[str]) -> bool:
+        if value and _is_empty(getattr(self.item, field)):
+            setattr(self.item, field, value)
+            self.changed = True
+            return True
+        return False
+
+    def add(self, field: str, values: Iterable[str]) -> bool:
+        values = [v for v in values if v]
+        if values:
+            self.lists.setdefault(field, set()).update(values)
+        return bool(values)
+
+
+class EnrichmentEngine:
+    """
+    A compiled rule table. Keyword rules become a token -> subjects dict (filename)
+    or one regex alternation per source (substring matches), so a pass costs one
+    lookup per filename token and one scan per text, whatever the number of rules.
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.max_inferred = int(rules.get("max_inferred_subjects", 10))
+        artist = rules.get("artist_subject") or {}
+        self.artist_tag: Optional[str] = artist.get("tag")
+        self.artist_prefix: str = artist.get("prefix", "artist:")
+        self.mime_types: List[Tuple[str, str]] = [(r["prefix"], r["type"]) for r in rules.get("mime_types", [])]
+
+        steps: List[Tuple[str, Callable[[_Run], bool]]] = [
+            ("title_from_filename", self._title),
+            ("format_from_mime", self._format),
+            ("date_from_exif", self._date),
+            ("coverage_from_gps", self._coverage),
+            ("type_from_mime", self._type),
+            ("identifier_checksum", self._identifier),
+        ]
+        tags: Set[str] = set()
+        for rule in rules.get("exif_fields", []):
+            tags.update(rule["tags"])
+            steps.append((rule["name"], self._field_step(rule)))
+
+        # Subject keywords, grouped by source; rules sharing a source share one step
+        self.filename_keywords: Dict[str, Set[str]] = {}
+        substring_keywords: Dict[str, Dict[str, Set[str]]] = {}
+        for rule in rules.get("subjects", []):
+            target = (
+                self.filename_keywords
+                if rule["source"] == "filename"
+                else substring_keywords.setdefault(rule["source"], {})
+            )
+            for keyword in rule["keywords"]:
+                target.setdefault(keyword.lower(), set()).update(rule["subjects"])
+        if self.filename_keywords:
+            steps.append(("subjects:filename", self._filename_subjects))
+        for source, keywords in substring_keywords.items():
+            # Longest keyword first so overlapping alternatives prefer the specific one
+            pattern = re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+            if source != "ocr":
+                tags.add(source)
+            steps.append((f"subjects:{source}", self._substring_step(source, pattern, keywords)))
+        if self.artist_tag:
+            tags.add(self.artist_tag)
+            steps.append(("artist_subject", self._artist))
+
+        # List fields are merged (and sorted) once, after every other rule
+        steps.append(("merge_lists", self._merge_lists))
+
+        self.tags = frozenset(tags)
+        self.steps = steps
+        self._runs = 0
+        self._hits = [0] * len(steps)
+        self._seconds = [0.0] * len(steps)
+        self._lock = threading.Lock()
+
+    # Built-in steps
+
+    def _title(self, run: _Run) -> bool:
+        if _is_empty(run.item.title):
+            run.item.title = os.path.splitext(run.original_name)[0]
+            run.changed = True
+            return True
+        return False
+
+    def _format(self, run: _Run) -> bool:
+        return run.fill("format", run.mime_type)
+
+    def _date(self, run: _Run) -> bool:
+        return run.fill("date", run.exif.get("date"))
+
+    def _coverage(self, run: _Run) -> bool:
+        gps = run.exif.get("gps")
+        return run.fill("coverage", f"{gps['lat']},{gps['lon']}" if gps else None)
+
+    def _type(self, run: _Run) -> bool:
+        if run.item.type:
+            return False
+        for prefix, item_type in self.mime_types:
+            if run.mime_type.startswith(prefix):
+                run.item.type = item_type
+                run.changed = True
+                return True
+        return False
+
+    def _identifier(self, run: _Run) -> bool:
+        return run.add("identifiers", [run.checksum]) if run.checksum else False
+
+    def _artist(self, run: _Run) -> bool:
+        artist = run.texts.get(self.artist_tag)
+        if artist:
+            run.inferred.add(self.artist_prefix + artist)
+            return True
+        return False
+
+    # Compiled steps
+
+    def _field_step(self, rule: Dict[str, Any]) -> Callable[[_Run], bool]:
+        field, tags, joiner = rule["field"], list(rule["tags"]), rule.get("join")
+        split = re.compile(rule["split"]) if rule.get("split") else None
+        merge = rule.get("mode", "fill") == "merge"
+
+        def step(run: _Run) -> bool:
+            values = [run.texts[tag] for tag in tags if run.texts.get(tag)]
+            if not values:
+                return False
+            value = joiner.join(values) if joiner is not None else values[0]
+            if merge:
+                parts = split.split(value) if split else [value]
+                return run.add(field, (p.strip() for p in parts))
+            return run.fill(field, value)
+
+        return step
+
+    def _filename_subjects(self, run: _Run) -> bool:
+        base = os.path.splitext(os.path.basename(run.original_name))[0].lower()
+        hit = False
+        for token in set(base.replace("_", " ").replace("-", " ").split()):
+            if len(token) > 2 and token in self.filename_keywords:
+                run.inferred.update(self.filename_keywords[token])
+                hit = True
+        return hit
+
+    def _substring_step(self, source: str, pattern: Pattern, keywords: Dict[str, Set[str]]):
+        def step(run: _Run) -> bool:
+            text = run.ocr_text if source == "ocr" else run.texts.get(source, "")
+            if not text:
+                return False
+            found = set(pattern.findall(text.lower()))
+            for keyword in found:
+                run.inferred.update(keywords[keyword])
+            return bool(found)
+
+        return step
+
+    # Running
+
+    def apply(self, item: Item, original_name: str, mime_type: str, checksum: str, exif: Dict[str, Any], ocr: Dict[str, Any]) -> bool:
+        exif = exif or {}
+        raw = exif.get("raw") or {}
+        # One pass over the EXIF dict, decoding only the tags some rule reads
+        texts = {tag: _decode_text(value) for tag, value in raw.items() if tag in self.tags and value is not None}
+        run = _Run(item, original_name, mime_type, checksum, exif, str((ocr or {}).get("text") or ""), texts)
+
+        # Per-step time is the gap between consecutive clock reads (one read per step)
+        clock = time.perf_counter
+        seconds = [0.0] * len(self.steps)
+        hits = [False] * len(self.steps)
+        last = clock()
+        for index, (name, step) in enumerate(self.steps):
+            try:
+                hits[index] = step(run)
+            except Exception as e:
+                logger.warning("enrichment rule %s failed: %s", name, e)
+            now = clock()
+            seconds[index] = now - last
+            last = now
+
+        with self._lock:
+            self._runs += 1
+            for index in range(len(self.steps)):
+                self._hits[index] += hits[index]
+                self._seconds[index] += seconds[index]
+        return run.changed
+
+    def _merge_lists(self, run: _Run) -> bool:
+        if run.inferred:
+            run.add("subjects", sorted(run.inferred)[: self.max_inferred])
+        for field, additions in run.lists.items():
+            current = getattr(run.item, field) or []
+            existing = set(current)
+            if additions <= existing:
+                continue  # nothing new; leave the stored order alone
+            merged = sorted(existing.union(additions))
+            if merged != current:
+                if field == "subjects" and run.inferred and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("inferred subjects %s", sorted(run.inferred))
+                setattr(run.item, field, merged)
+                run.changed = True
+        return bool(run.lists)
+
+    def stats(self) -> List[dict]:
+        """Per-rule call count, hit count and cumulative time since the engine was compiled."""
+        with self._lock:
+            return [
+                {
+                    "rule": name,
+                    "calls": self._runs,
+                    "hits": hits,
+                    "total_ms": round(seconds * 1000, 3),
+                    "mean_us": round(seconds / self._runs * 1e6, 2) if self._runs else None,
+                }
+                for (name, _), hits, seconds in zip(self.steps, self._hits, self._seconds)
+            ]
+
+
+_engine: Optional[EnrichmentEngine] = None
+_engine_lock = threading.Lock()
+
+
+def load_rules() -> Dict[str, Any]:
+    path = os.getenv("ENRICHMENT_RULES")
+    if not path:
+        return DEFAULT_RULES
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_engine() -> EnrichmentEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EnrichmentEngine(load_rules())
+    return _engine
+
+
+def reload_engine(rules: Optional[Dict[str, Any]] = None) -> EnrichmentEngine:
+    """Recompile the rule table (from `rules`, or ENRICHMENT_RULES / the defaults)."""
+    global _engine
+    with _engine_lock:
+        _engine = EnrichmentEngine(rules if rules is not None else load_rules())
+    return _engine
+
+
+def enrich_item(item: Item, original_name: str, mime_type: str, checksum: str, exif: Dict[str, Any], ocr: Dict[str, Any]) -> bool:
+    """
+    Auto-populate empty item fields from an attached file's name, MIME type, EXIF and OCR.
+    Existing values are never overwritten; list fields are merged. Returns True if the item changed.
+    """
+    return get_engine().apply(item, original_name, mime_type, checksum, exif, ocr)
+
+
+def enrich_from_assets(item: Item, assets: Iterable[Asset], metadata: Optional[Dict[uuid.UUID, Dict[str, dict]]] = None) -> bool:
+    """
+    Re-apply the rules to an existing item from its stored assets (no file access).
+    `metadata` holds the assets' stored EXIF/OCR by asset id (see services/asset_metadata.py).
+    """
+    engine = get_engine()
+    changed = False
+    for asset in assets:
+        name = os.path.basename(asset.file_path or "")
+        values = (metadata or {}).get(asset.id, {})
+        changed |= engine.apply(item, name, asset.mime_type, asset.checksum, values.get("exif") or {}, values.get("ocr") or {})
+    return changed
+
+
+def enrich_items(items: Iterable[Item], metadata: Optional[Dict[uuid.UUID, Dict[str, dict]]] = None) -> List[Item]:
+    """Re-apply the rules to a batch of items with their assets loaded. Returns the items that changed."""
+    return [item for item in items if enrich_from_assets(item, item.assets, metadata)]
+
+
+def rule_stats() -> List[dict]:
+    return get_engine().stats()
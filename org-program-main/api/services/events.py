@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+# Ingestion stages published by the upload pipeline, in order
+STAGE_STORED = "stored"
+STAGE_EXIF = "exif"
+STAGE_OCR = "ocr"
+STAGE_INDEXED = "indexed"
+
+
+class BusFull(Exception):
+    """Raised when the bus already serves the maximum number of subscribers."""
+
+
+class Subscription:
+    """
+    A bounded per-client queue. Publishers never wait on a slow client: when the
+    queue is full the oldest event is dropped and counted, and the client is told
+    how many events it missed the next time it reads.
+    """
+
+    def __init__(self, bus: "EventBus", maxsize: int, item_id: Optional[str]):
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.item_id = item_id
+        self.dropped = 0
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return self.item_id is None or event.get("item_id") == self.item_id
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        # Always called on the subscriber's own loop
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Next event; raises asyncio.TimeoutError when nothing arrives within timeout."""
+        event = await asyncio.wait_for(self.queue.get(), timeout)
+        if self.dropped:
+            # Surface the gap so clients can fall back to a full refresh
+            event = dict(event, dropped=self.dropped)
+            self.dropped = 0
+        return event
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """In-process pub/sub for ingestion progress. Thread-safe publish, asyncio consumers."""
+
+    def __init__(self, max_subscribers: int = 1000, queue_size: int = 256):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subs: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, item_id: Optional[str] = None) -> Subscription:
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                raise BusFull()
+            sub = Subscription(self, self.queue_size, item_id)
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def publish(self, stage: str, item_id: str, **data: Any) -> None:
+        # Cheap no-op when nobody is watching
+        if not self._subs:
+            return
+        event = {"id": next(self._ids), "stage": stage, "item_id": item_id, **data}
+        with self._lock:
+            targets = [s for s in self._subs if s.wants(event)]
+        for sub in targets:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is sub._loop:
+                sub.offer(event)
+            else:
+                # Published from a worker thread or another loop
+                try:
+                    sub._loop.call_soon_threadsafe(sub.offer, event)
+                except RuntimeError:
+                    # Subscriber loop already closed; it will be dropped on disconnect
+                    pass
+
+
+bus = EventBus(
+    max_subscribers=int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000")),
+    queue_size=int(os.getenv("EVENTS_QUEUE_SIZE", "256")),
+)
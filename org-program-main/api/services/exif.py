@@ -1,3 +1,4 @@
+import logging
 import os
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -7,6 +8,12 @@ from PIL.ExifTags import TAGS
 import piexif
 
 
+logger = logging.getLogger(__name__)
+
+# Stored with each result (AssetMetadata.version); bump when the output changes
+EXIF_VERSION = 1
+
+
 def extract_exif(file_path: str) -> Dict[str, Any]:
     """
     Extract EXIF data from image file.
@@ -17,8 +24,7 @@ def extract_exif(file_path: str) -> Dict[str, Any]:
         - "gps": {"lat": float, "lon": float} or None  
         - "raw": dict of all EXIF data
     """
-    # Debug: starting EXIF extraction
-    print(f"[DEBUG][exif.extract_exif] Start extraction for: {file_path}")
+    logger.debug("extracting EXIF from %s", file_path)
 
     result = {
         "date": None,
@@ -59,14 +65,15 @@ def extract_exif(file_path: str) -> Dict[str, Any]:
                 
     except Exception as e:
         # Log error but don't fail the upload
-        print(f"[DEBUG][exif.extract_exif] EXIF extraction failed for {file_path}: {e}")
+        logger.debug("EXIF extraction failed for %s: %s", file_path, e)
         
-    # Final debug log with a brief summary of sanitized keys
-    try:
-        raw_keys_preview = list(result.get("raw", {}).keys())[:10]
-        print(f"[DEBUG][exif.extract_exif] Done for: {file_path} | date={result['date']} gps={result['gps']} raw_keys={raw_keys_preview}")
-    except Exception:
-        pass
+    # The key preview is only built when someone is listening at DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "extracted EXIF from %s",
+            file_path,
+            extra={"date": result["date"], "gps": result["gps"], "raw_keys": list(result["raw"])[:10]},
+        )
 
     return result
 
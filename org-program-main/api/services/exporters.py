@@ -0,0 +1,151 @@
+import csv
+import io
+import uuid
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from ..db import get_session
+from ..models import Item
+from ..schemas import ItemRead
+from .dc_xml import (
+    DC_LIST_FIELDS,
+    DC_SCALAR_FIELDS,
+    DC_XML_FOOTER,
+    DC_XML_HEADER,
+    LIST_SEPARATOR,
+    dc_record_cache,
+    item_to_dc_dict,
+    render_dc_record,
+)
+
+
+# Position in the (updated_at, id) ordering; both parts are needed to break ties
+Cursor = Tuple[datetime, uuid.UUID]
+
+EXPORT_CHUNK = 500
+
+
+def _after(cursor: Cursor):
+    updated_at, item_id = cursor
+    return or_(Item.updated_at > updated_at, and_(Item.updated_at == updated_at, Item.id > item_id))
+
+
+def fetch_item_page(
+    session: Session,
+    after: Optional[Cursor] = None,
+    limit: int = EXPORT_CHUNK,
+    updated_from: Optional[datetime] = None,
+    updated_until: Optional[datetime] = None,
+    with_assets: bool = False,
+) -> List[Item]:
+    """
+    One keyset page ordered by (updated_at, id), served by ix_item_updated_at_id.
+    Unlike OFFSET paging the cost per page is constant however deep the harvest goes.
+    """
+    stmt = select(Item)
+    if after is not None:
+        stmt = stmt.where(_after(after))
+    if updated_from is not None:
+        stmt = stmt.where(Item.updated_at >= updated_from)
+    if updated_until is not None:
+        stmt = stmt.where(Item.updated_at < updated_until)
+    if with_assets:
+        stmt = stmt.options(selectinload(Item.assets))
+    stmt = stmt.order_by(Item.updated_at, Item.id).limit(limit)
+    return list(session.exec(stmt).all())
+
+
+def iter_item_pages(
+    updated_from: Optional[datetime] = None, with_assets: bool = False, chunk: int = EXPORT_CHUNK
+) -> Iterator[List[Item]]:
+    """
+    Walk the whole archive page by page in its own session (safe to use from a
+    StreamingResponse). Each page is expunged before the next is read.
+    """
+    after: Optional[Cursor] = None
+    with get_session() as session:
+        while True:
+            page = fetch_item_page(session, after, chunk, updated_from=updated_from, with_assets=with_assets)
+            if not page:
+                return
+            yield page
+            after = (page[-1].updated_at, page[-1].id)
+            session.expunge_all()
+            if len(page) < chunk:
+                return
+
+
+def iter_jsonl(updated_from: Optional[datetime] = None) -> Iterator[str]:
+    """One ItemRead JSON document per line, sent one page at a time."""
+    for page in iter_item_pages(updated_from, with_assets=True):
+        yield "".join(ItemRead.model_validate(item).model_dump_json() + "\n" for item in page)
+
+
+CSV_COLUMNS = ["id", *DC_SCALAR_FIELDS, *DC_LIST_FIELDS, "created_at", "updated_at"]
+
+
+def iter_csv(updated_from: Optional[datetime] = None) -> Iterator[str]:
+    """CSV with the same column names /import/dc accepts; list fields joined by ';'."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(CSV_COLUMNS)
+    for page in iter_item_pages(updated_from):
+        for item in page:
+            fields = item_to_dc_dict(item)
+            writer.writerow(
+                [str(item.id)]
+                + [fields[name] or "" for name in DC_SCALAR_FIELDS]
+                + [LIST_SEPARATOR.join(fields[name]) for name in DC_LIST_FIELDS]
+                + [item.created_at.isoformat(), item.updated_at.isoformat()]
+            )
+        # One chunk per page rather than one tiny write per row
+        yield flush()
+    tail = flush()
+    if tail:
+        yield tail
+
+
+def iter_dc_xml(ids: Optional[List[uuid.UUID]] = None, chunk: int = EXPORT_CHUNK) -> Iterator[bytes]:
+    """
+    Stream a DC <records> document for the given items (or the whole archive).
+    Pages read only (id, updated_at); cached fragments are concatenated as-is and
+    only cache misses load the full row and render it.
+    """
+    yield DC_XML_HEADER
+    after: Optional[Cursor] = None
+    with get_session() as session:
+        while True:
+            stmt = select(Item.id, Item.updated_at)
+            if after is not None:
+                stmt = stmt.where(_after(after))
+            if ids is not None:
+                stmt = stmt.where(Item.id.in_(ids))
+            page = session.exec(stmt.order_by(Item.updated_at, Item.id).limit(chunk)).all()
+            if not page:
+                break
+
+            fragments = {item_id: dc_record_cache.get(item_id, updated_at) for item_id, updated_at in page}
+            missing = [item_id for item_id, fragment in fragments.items() if fragment is None]
+            if missing:
+                for item in session.exec(select(Item).where(Item.id.in_(missing))).all():
+                    fragment = render_dc_record(item_to_dc_dict(item))
+                    dc_record_cache.put(item.id, item.updated_at, fragment)
+                    fragments[item.id] = fragment
+                session.expunge_all()
+            yield b"".join(fragments[item_id] for item_id, _ in page if fragments.get(item_id) is not None)
+
+            after = tuple(page[-1])
+            if len(page) < chunk:
+                break
+    yield DC_XML_FOOTER
@@ -0,0 +1,355 @@
+"""
+Fixity scrubbing: periodically re-hash stored assets and compare them with
+Asset.checksum (SHA-256), so silent corruption or lost files are noticed.
+
+Assets are walked in id order from a checkpoint (FixityState), a batch at a
+time, and hashed in a thread pool (hashlib releases the GIL on large buffers).
+One pass over the store is a "cycle". Work is paced so a cycle takes about
+FIXITY_PERIOD_DAYS: the scrubber only runs when it is behind
+`total bytes x elapsed / period`, and never reads faster than FIXITY_MAX_MBPS
+across all threads. Local files are read in FIXITY_CHUNK_MB chunks into a reused
+buffer and dropped from the page cache afterwards; S3 objects are streamed past
+the read cache.
+
+Each check leaves an AssetFixity row: status, checked_at, verified_at (last
+match), the checksum actually read on a mismatch, and a count of consecutive
+failures. GET /api/fixity reports them.
+
+Run it as its own service (`python -m api.cli fixity`), or in an API worker with
+FIXITY_SCRUB=on (one worker only: the checkpoint is shared).
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .. import metrics
+from ..db import get_session
+from ..models import Asset, AssetFixity, FixityState, utcnow
+from ..storage import Storage, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_MISMATCH = "mismatch"
+STATUS_MISSING = "missing"
+STATUS_ERROR = "error"
+STATUS_NO_CHECKSUM = "no_checksum"
+FAILED = (STATUS_MISMATCH, STATUS_MISSING, STATUS_ERROR)
+
+PERIOD_DAYS = float(os.getenv("FIXITY_PERIOD_DAYS", "90"))
+MAX_MBPS = float(os.getenv("FIXITY_MAX_MBPS", "50"))
+WORKERS = int(os.getenv("FIXITY_WORKERS", "2"))
+CHUNK_MB = int(os.getenv("FIXITY_CHUNK_MB", "8"))
+BATCH_SIZE = 200
+# Longest sleep between schedule checks, so a stop request is noticed promptly
+MAX_IDLE_SECONDS = 60.0
+
+CHECKS = metrics.register(metrics.Counter("org_fixity_checks_total", "Asset fixity checks by outcome.", ("status",)))
+BYTES_READ = metrics.register(metrics.Counter("org_fixity_bytes_total", "Bytes read by fixity checks."))
+
+
+class Throttle:
+    """Byte-rate cap shared by the hashing threads (bytes/second; 0 = unlimited)."""
+
+    def __init__(self, bytes_per_second: float):
+        self.rate = bytes_per_second
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, count: int) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            # Each read is scheduled after the previous ones; idle time earns no burst
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + count / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class CheckResult(NamedTuple):
+    asset_id: uuid.UUID
+    status: str
+    actual: Optional[str]
+    error: Optional[str]
+    bytes_read: int
+
+
+def check_asset(
+    storage: Storage,
+    asset_id: uuid.UUID,
+    stored: str,
+    expected: Optional[str],
+    throttle: Optional[Throttle] = None,
+    chunk_size: int = CHUNK_MB * 1024 * 1024,
+) -> CheckResult:
+    """Hash one stored asset and compare it with its recorded checksum."""
+    if not expected:
+        return CheckResult(asset_id, STATUS_NO_CHECKSUM, None, None, 0)
+    sha256 = hashlib.sha256()
+    read = 0
+    try:
+        for chunk in storage.read_chunks(stored, chunk_size):
+            if throttle is not None:
+                throttle.consume(len(chunk))
+            sha256.update(chunk)
+            read += len(chunk)
+    except FileNotFoundError:
+        return CheckResult(asset_id, STATUS_MISSING, None, "file not found", read)
+    except Exception as e:
+        # Read errors (OSError, StorageError, dropped connections) are recorded, not raised
+        return CheckResult(asset_id, STATUS_ERROR, None, str(e)[:500], read)
+    actual = sha256.hexdigest()
+    if actual != expected.lower():
+        return CheckResult(asset_id, STATUS_MISMATCH, actual, None, read)
+    return CheckResult(asset_id, STATUS_OK, None, None, read)
+
+
+def record_results(session: Session, results: List[CheckResult]) -> None:
+    """Upsert AssetFixity rows for a batch of checks. The caller commits."""
+    existing = {
+        row.asset_id: row
+        for row in session.exec(select(AssetFixity).where(AssetFixity.asset_id.in_([r.asset_id for r in results])))
+    }
+    now = utcnow()
+    for result in results:
+        row = existing.get(result.asset_id) or AssetFixity(asset_id=result.asset_id, status=result.status)
+        row.status = result.status
+        row.checked_at = now
+        row.actual_checksum = result.actual
+        row.error = result.error
+        if result.status == STATUS_OK:
+            row.verified_at = now
+            row.failures = 0
+        elif result.status in FAILED:
+            row.failures += 1
+            logger.warning(
+                "fixity check failed for asset %s: %s",
+                result.asset_id,
+                result.status,
+                extra={"asset_id": str(result.asset_id), "status": result.status, "error": result.error},
+            )
+        session.add(row)
+        CHECKS.inc(result.status)
+        BYTES_READ.inc(amount=result.bytes_read)
+
+
+def _state(session: Session) -> FixityState:
+    state = session.get(FixityState, 1)
+    if state is None:
+        state = FixityState(total_bytes=_store_bytes(session))
+        session.add(state)
+        session.commit()
+    return state
+
+
+def _store_bytes(session: Session) -> int:
+    return session.exec(select(func.coalesce(func.sum(Asset.bytes), 0))).one()
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands datetimes back naive; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _start_cycle(session: Session, state: FixityState) -> None:
+    state.cycle += 1
+    state.cycle_started_at = utcnow()
+    state.last_asset_id = None
+    state.cycle_assets = 0
+    state.cycle_bytes = 0
+    state.total_bytes = _store_bytes(session)
+    session.add(state)
+    session.commit()
+
+
+def _cycle_complete(state: FixityState) -> bool:
+    return state.completed_at is not None and _aware(state.completed_at) >= _aware(state.cycle_started_at)
+
+
+def _seconds_until_due(state: FixityState, period: timedelta, now: datetime) -> float:
+    """0 if the cycle is behind schedule, else seconds until it is."""
+    elapsed = (now - _aware(state.cycle_started_at)).total_seconds()
+    rate = max(state.total_bytes, 1) / period.total_seconds()  # bytes/second to finish on time
+    ahead = state.cycle_bytes - rate * elapsed
+    return max(0.0, ahead / rate)
+
+
+def scrub_batch(
+    session: Session,
+    state: FixityState,
+    storage: Storage,
+    executor: ThreadPoolExecutor,
+    throttle: Throttle,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Check the next batch of assets after the checkpoint; returns how many were checked."""
+    stmt = select(Asset.id, Asset.file_path, Asset.checksum).order_by(Asset.id).limit(batch_size)
+    if state.last_asset_id is not None:
+        stmt = stmt.where(Asset.id > state.last_asset_id)
+    rows = session.exec(stmt).all()
+    if not rows:
+        return 0
+    results = list(executor.map(lambda row: check_asset(storage, row[0], row[1], row[2], throttle), rows))
+    record_results(session, results)
+    state.last_asset_id = rows[-1][0]
+    state.cycle_assets += len(rows)
+    state.cycle_bytes += sum(r.bytes_read for r in results)
+    session.add(state)
+    session.commit()
+    return len(rows)
+
+
+def scrub(
+    storage: Optional[Storage] = None,
+    period_days: float = PERIOD_DAYS,
+    max_mbps: float = MAX_MBPS,
+    workers: int = WORKERS,
+    batch_size: int = BATCH_SIZE,
+    now_only: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> dict:
+    """
+    Run the scrubber until `stop` is set. With `now_only`, ignore the schedule:
+    finish the current cycle (or one new cycle) at the bandwidth cap, then return.
+    Safe to interrupt at any time; the next run resumes from the checkpoint.
+    """
+    storage = storage or get_storage()
+    stop = stop or threading.Event()
+    period = timedelta(days=period_days)
+    throttle = Throttle(max_mbps * 1024 * 1024)
+    checked = 0
+    with get_session() as session, ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fixity") as executor:
+        state = _state(session)
+        if now_only and _cycle_complete(state):
+            _start_cycle(session, state)
+
+        def idle(seconds: float) -> None:
+            # Nothing may stay open on the database while the scrubber sleeps
+            session.commit()
+            stop.wait(min(seconds, MAX_IDLE_SECONDS))
+
+        while not stop.is_set():
+            now = utcnow()
+            if _cycle_complete(state):
+                # Wait for the next cycle to be due
+                wait = (_aware(state.cycle_started_at) + period - now).total_seconds()
+                if wait > 0:
+                    idle(wait)
+                    continue
+                _start_cycle(session, state)
+            if not now_only:
+                wait = _seconds_until_due(state, period, now)
+                if wait > 0:
+                    idle(wait)
+                    continue
+            count = scrub_batch(session, state, storage, executor, throttle, batch_size)
+            checked += count
+            if not count:
+                # End of the store: close the cycle
+                state.completed_at = utcnow()
+                state.last_asset_id = None
+                session.add(state)
+                session.commit()
+                logger.info("fixity cycle %d complete: %d assets, %d bytes", state.cycle, state.cycle_assets, state.cycle_bytes)
+                if now_only:
+                    break
+        return {"checked": checked, "cycle": state.cycle, "cycle_assets": state.cycle_assets}
+
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def start_in_background() -> bool:
+    """Start the scrubber in a daemon thread when FIXITY_SCRUB=on. Returns whether it started."""
+    global _thread
+    if os.getenv("FIXITY_SCRUB", "off").lower() not in ("1", "on", "true"):
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+
+    def run():
+        try:
+            scrub(stop=_stop)
+        except Exception:
+            logger.exception("fixity scrubber stopped")
+
+    _thread = threading.Thread(target=run, name="fixity-scrub", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_background() -> None:
+    _stop.set()
+
+
+def fixity_report(session: Session, failure_limit: int = 100, period_days: float = PERIOD_DAYS) -> dict:
+    """Store-wide fixity summary, the schedule position and the most recent failures."""
+    total_assets = session.exec(select(func.count()).select_from(Asset)).one()
+    by_status: Dict[str, int] = dict(
+        session.exec(select(AssetFixity.status, func.count()).group_by(AssetFixity.status)).all()
+    )
+    checked = sum(by_status.values())
+    cutoff = utcnow() - timedelta(days=period_days)
+    stale = session.exec(
+        select(func.count()).select_from(AssetFixity).where((AssetFixity.verified_at < cutoff) | (AssetFixity.verified_at.is_(None)))
+    ).one()
+
+    failures = session.exec(
+        select(AssetFixity, Asset.item_id, Asset.file_path, Asset.checksum)
+        .join(Asset, Asset.id == AssetFixity.asset_id)
+        .where(AssetFixity.status.in_(FAILED))
+        .order_by(AssetFixity.checked_at.desc())
+        .limit(failure_limit)
+    ).all()
+
+    state = session.get(FixityState, 1)
+    cycle = None
+    if state is not None:
+        cycle = {
+            "number": state.cycle,
+            "started_at": state.cycle_started_at,
+            "assets_checked": state.cycle_assets,
+            "bytes_checked": state.cycle_bytes,
+            "total_bytes": state.total_bytes,
+            "progress": round(min(1.0, state.cycle_bytes / state.total_bytes), 4) if state.total_bytes else None,
+            "last_completed_at": state.completed_at,
+        }
+    return {
+        "assets": total_assets,
+        "checked": checked,
+        "never_checked": max(0, total_assets - checked),
+        # Never checked, never matched, or last matched longer than one period ago
+        "overdue": max(0, total_assets - checked) + stale,
+        "by_status": by_status,
+        "period_days": period_days,
+        "cycle": cycle,
+        "failures": [
+            {
+                "asset_id": row.asset_id,
+                "item_id": item_id,
+                "file_path": file_path,
+                "status": row.status,
+                "expected_checksum": expected,
+                "actual_checksum": row.actual_checksum,
+                "error": row.error,
+                "failures": row.failures,
+                "checked_at": row.checked_at,
+                "verified_at": row.verified_at,
+            }
+            for row, item_id, file_path, expected in failures
+        ],
+    }
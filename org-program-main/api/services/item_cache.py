@@ -0,0 +1,77 @@
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from ..models import Item
+from ..schemas import ItemRead
+from .asset_metadata import attach_metadata
+from .cache import SqliteCacheStore, VersionedLRU, register_item_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+# Serialized ItemRead JSON by item id, tagged with updated_at. Entries are dropped
+# by record_changes() on every item write; the version tag also covers writes made
+# by other worker processes, which cannot reach this process's memory.
+item_read_cache = register_item_cache(VersionedLRU("item_read", int(os.getenv("ITEM_CACHE_SIZE", "10000"))))
+
+
+def _shared_store() -> Optional[SqliteCacheStore]:
+    # Optional cross-worker tier: ITEM_CACHE_SHARED=/var/tmp/org-item-cache.db
+    path = os.getenv("ITEM_CACHE_SHARED")
+    if not path:
+        return None
+    try:
+        store = SqliteCacheStore("item_read_shared", path, int(os.getenv("ITEM_CACHE_SHARED_SIZE", "200000")))
+    except Exception as e:
+        logger.warning("shared item cache disabled, cannot open %s: %s", path, e)
+        return None
+    return register_item_cache(store)
+
+
+item_read_shared = _shared_store()
+
+
+def item_version(session: Session, item_id: uuid.UUID) -> Optional[datetime]:
+    """updated_at for one item (a primary-key lookup, no ORM object), or None if it is gone."""
+    return session.exec(select(Item.updated_at).where(Item.id == item_id)).first()
+
+
+def render_item(session: Session, item: Item) -> bytes:
+    # The single-item view includes each asset's EXIF and OCR (one extra IN query)
+    read = ItemRead.model_validate(item)
+    attach_metadata(session, [read])
+    return read.model_dump_json().encode("utf-8")
+
+
+def get_item_payload(session: Session, item_id: uuid.UUID, version: datetime) -> Optional[bytes]:
+    """
+    ItemRead JSON for `item_id` at `version`: process LRU, then the shared tier,
+    then the database (item, assets and their EXIF/OCR in three queries). None if
+    the item is gone.
+    """
+    body = item_read_cache.get(item_id, version)
+    if body is not None:
+        return body
+    if item_read_shared is not None:
+        body = item_read_shared.get(item_id, version.isoformat())
+        if body is not None:
+            item_read_cache.put(item_id, version, body)
+            return body
+
+    item = session.exec(select(Item).where(Item.id == item_id).options(selectinload(Item.assets))).first()
+    if item is None:
+        return None
+    # Render at the version actually read, in case a write landed in between
+    version = item.updated_at
+    body = render_item(session, item)
+    item_read_cache.put(item_id, version, body)
+    if item_read_shared is not None:
+        item_read_shared.put(item_id, version.isoformat(), body)
+    return body
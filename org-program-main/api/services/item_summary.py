@@ -0,0 +1,94 @@
+"""
+The ItemSummary table behind GET /api/items/summary: one narrow row per item
+with what a card or grid cell shows (title, type, date, asset count, total
+bytes, primary asset).
+
+Rows are rewritten, never patched: `refresh_summaries()` recomputes the rows of
+the given items with one INSERT ... SELECT that reads the item row and its
+assets through the asset item_id index. record_changes() calls it, and every
+item or asset write already goes through record_changes() in the writer's own
+transaction, so the table is always as current as the change feed. Deleted
+items simply get no new row.
+
+The primary asset is the one flagged is_primary, otherwise the first one
+attached (lowest asset rowid).
+"""
+import uuid
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, literal_column
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from ..models import Asset, Item, ItemSummary
+
+# IN-list size for batched refreshes
+_PAGE = 500
+
+_COLUMNS = [
+    "item_id", "title", "type", "date", "date_start", "date_end", "created_at", "updated_at",
+    "asset_count", "total_bytes", "primary_asset_id", "primary_file_path", "primary_mime_type",
+]
+
+
+def _summary_insert(where):
+    # Correlated subqueries per item: index lookups on asset.item_id, never a scan
+    asset_count = select(func.count()).where(Asset.item_id == Item.id).correlate(Item).scalar_subquery()
+    total_bytes = select(func.coalesce(func.sum(Asset.bytes), 0)).where(Asset.item_id == Item.id).correlate(Item).scalar_subquery()
+    primary_id = (
+        select(Asset.id)
+        .where(Asset.item_id == Item.id)
+        .order_by(Asset.is_primary.desc(), literal_column("asset.rowid"))
+        .limit(1)
+        .correlate(Item)
+        .scalar_subquery()
+    )
+    primary = aliased(Asset)
+    rows = (
+        select(
+            Item.id, Item.title, Item.type, Item.date, Item.date_start, Item.date_end, Item.created_at, Item.updated_at,
+            asset_count, total_bytes, primary.id, primary.file_path, primary.mime_type,
+        )
+        .outerjoin(primary, primary.id == primary_id)
+        .where(where)
+    )
+    return insert(ItemSummary).from_select(_COLUMNS, rows)
+
+
+def refresh_summaries(session: Session, item_ids: Iterable[uuid.UUID]) -> None:
+    """Recompute the summary rows of `item_ids` in the session's transaction (the caller commits)."""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return
+    # Pending item/asset objects must be in the database before they are read back
+    session.flush()
+    for start in range(0, len(item_ids), _PAGE):
+        page = item_ids[start:start + _PAGE]
+        session.execute(delete(ItemSummary).where(ItemSummary.item_id.in_(page)))
+        session.execute(_summary_insert(Item.id.in_(page)))
+
+
+def backfill_summaries(conn) -> None:
+    """Add summary rows for items that have none (databases from before the table existed)."""
+    conn.execute(_summary_insert(Item.id.not_in(select(ItemSummary.item_id))))
+
+
+def list_summaries(
+    session: Session,
+    sort: str = "created",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[ItemSummary]:
+    """A page of summaries, newest first or by date (undated last), optionally within [start, end]."""
+    stmt = select(ItemSummary)
+    if end is not None:
+        stmt = stmt.where(ItemSummary.date_start <= end)
+    if start is not None:
+        stmt = stmt.where(ItemSummary.date_end >= start)
+    if sort == "date":
+        stmt = stmt.order_by(ItemSummary.date_start.asc().nulls_last(), ItemSummary.date_end.asc())
+    else:
+        stmt = stmt.order_by(ItemSummary.created_at.desc())
+    return list(session.exec(stmt.limit(limit).offset(offset)).all())
@@ -0,0 +1,229 @@
+import base64
+import json
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from lxml import etree
+from sqlmodel import Session, select
+
+from ..models import Item
+from .dc_xml import DC_NS, add_dc_elements, item_to_dc_dict
+from .exporters import fetch_item_page
+
+
+OAI_NS = "http://www.openarchives.org/OAI/2.0/"
+OAI_DC_NS = "http://www.openarchives.org/OAI/2.0/oai_dc/"
+XSI_NS = "http://www.w3.org/2001/XMLSchema-instance"
+OAI_SCHEMA = "http://www.openarchives.org/OAI/2.0/ http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd"
+OAI_DC_SCHEMA = "http://www.openarchives.org/OAI/2.0/oai_dc/ http://www.openarchives.org/OAI/2.0/oai_dc.xsd"
+
+METADATA_PREFIX = "oai_dc"
+VERBS = {"Identify", "ListMetadataFormats", "ListSets", "ListIdentifiers", "ListRecords", "GetRecord"}
+
+
+def repository_id() -> str:
+    return os.getenv("OAI_REPOSITORY_ID", "org-program")
+
+
+def page_size() -> int:
+    return int(os.getenv("OAI_PAGE_SIZE", "100"))
+
+
+class OaiError(Exception):
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _datestamp(value: datetime) -> str:
+    # Stored datetimes are UTC (SQLite hands them back naive)
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_oai_date(value: str, until: bool = False) -> datetime:
+    """Parse YYYY-MM-DD or YYYY-MM-DDThh:mm:ssZ; `until` bounds are made exclusive."""
+    try:
+        if len(value) == 10:
+            parsed = datetime.strptime(value, "%Y-%m-%d")
+            step = timedelta(days=1)
+        else:
+            parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+            step = timedelta(seconds=1)
+    except ValueError:
+        raise OaiError("badArgument", f"Invalid date: {value}")
+    parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed + step if until else parsed
+
+
+def encode_token(after: Tuple[datetime, uuid.UUID], args: Dict[str, Optional[str]], cursor: int) -> str:
+    # Self-contained token: no server-side state to expire or clean up
+    payload = {"t": after[0].isoformat(), "i": after[1].hex, "c": cursor, **{k: v for k, v in args.items() if v}}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_token(token: str):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        after = (datetime.fromisoformat(payload["t"]), uuid.UUID(payload["i"]))
+        cursor = int(payload["c"])
+    except Exception:
+        raise OaiError("badResumptionToken", "The resumptionToken is invalid or expired")
+    args = {k: payload.get(k) for k in ("metadataPrefix", "from", "until")}
+    return after, args, cursor
+
+
+def _oai_identifier(item_id: uuid.UUID) -> str:
+    return f"oai:{repository_id()}:{item_id}"
+
+
+def _parse_identifier(identifier: str) -> uuid.UUID:
+    prefix = f"oai:{repository_id()}:"
+    if not identifier.startswith(prefix):
+        raise OaiError("idDoesNotExist", f"Unknown identifier: {identifier}")
+    try:
+        return uuid.UUID(identifier[len(prefix):])
+    except ValueError:
+        raise OaiError("idDoesNotExist", f"Unknown identifier: {identifier}")
+
+
+def _root(base_url: str, params: Dict[str, str]):
+    root = etree.Element(f"{{{OAI_NS}}}OAI-PMH", nsmap={None: OAI_NS, "xsi": XSI_NS})
+    root.set(f"{{{XSI_NS}}}schemaLocation", OAI_SCHEMA)
+    etree.SubElement(root, f"{{{OAI_NS}}}responseDate").text = _datestamp(datetime.now(timezone.utc))
+    request = etree.SubElement(root, f"{{{OAI_NS}}}request")
+    request.text = base_url
+    # Echo arguments only for well-formed requests, as the spec asks
+    if params.get("verb") in VERBS:
+        for key, value in params.items():
+            request.set(key, value)
+    return root
+
+
+def _header(parent, item: Item):
+    header = etree.SubElement(parent, f"{{{OAI_NS}}}header")
+    etree.SubElement(header, f"{{{OAI_NS}}}identifier").text = _oai_identifier(item.id)
+    etree.SubElement(header, f"{{{OAI_NS}}}datestamp").text = _datestamp(item.updated_at)
+
+
+def _record(parent, item: Item):
+    record = etree.SubElement(parent, f"{{{OAI_NS}}}record")
+    _header(record, item)
+    metadata = etree.SubElement(record, f"{{{OAI_NS}}}metadata")
+    dc = etree.SubElement(metadata, f"{{{OAI_DC_NS}}}dc", nsmap={"oai_dc": OAI_DC_NS, "dc": DC_NS})
+    dc.set(f"{{{XSI_NS}}}schemaLocation", OAI_DC_SCHEMA)
+    add_dc_elements(dc, item_to_dc_dict(item))
+
+
+def _require(params: Dict[str, str], allowed: set, required: set = frozenset()):
+    extra = set(params) - allowed - {"verb"}
+    if extra:
+        raise OaiError("badArgument", f"Illegal arguments: {', '.join(sorted(extra))}")
+    missing = required - set(params)
+    if missing:
+        raise OaiError("badArgument", f"Missing arguments: {', '.join(sorted(missing))}")
+
+
+def _identify(root, session: Session, base_url: str):
+    earliest = session.exec(select(Item.updated_at).order_by(Item.updated_at).limit(1)).first()
+    el = etree.SubElement(root, f"{{{OAI_NS}}}Identify")
+    for tag, text in (
+        ("repositoryName", os.getenv("OAI_REPOSITORY_NAME", "Org Program Archive")),
+        ("baseURL", base_url),
+        ("protocolVersion", "2.0"),
+        ("adminEmail", os.getenv("OAI_ADMIN_EMAIL", "admin@example.org")),
+        ("earliestDatestamp", _datestamp(earliest) if earliest else "1970-01-01T00:00:00Z"),
+        ("deletedRecord", "no"),
+        ("granularity", "YYYY-MM-DDThh:mm:ssZ"),
+    ):
+        etree.SubElement(el, f"{{{OAI_NS}}}{tag}").text = text
+
+
+def _list_metadata_formats(root):
+    el = etree.SubElement(root, f"{{{OAI_NS}}}ListMetadataFormats")
+    fmt = etree.SubElement(el, f"{{{OAI_NS}}}metadataFormat")
+    etree.SubElement(fmt, f"{{{OAI_NS}}}metadataPrefix").text = METADATA_PREFIX
+    etree.SubElement(fmt, f"{{{OAI_NS}}}schema").text = "http://www.openarchives.org/OAI/2.0/oai_dc.xsd"
+    etree.SubElement(fmt, f"{{{OAI_NS}}}metadataNamespace").text = OAI_DC_NS
+
+
+def _list(root, session: Session, verb: str, params: Dict[str, str]):
+    if "resumptionToken" in params:
+        _require(params, {"resumptionToken"})
+        after, args, cursor = decode_token(params["resumptionToken"])
+    else:
+        _require(params, {"metadataPrefix", "from", "until", "set"}, {"metadataPrefix"})
+        if "set" in params:
+            raise OaiError("noSetHierarchy", "This repository does not support sets")
+        after, cursor = None, 0
+        args = {k: params.get(k) for k in ("metadataPrefix", "from", "until")}
+    if args.get("metadataPrefix") != METADATA_PREFIX:
+        raise OaiError("cannotDisseminateFormat", f"Only {METADATA_PREFIX} is supported")
+
+    updated_from = parse_oai_date(args["from"]) if args.get("from") else None
+    updated_until = parse_oai_date(args["until"], until=True) if args.get("until") else None
+
+    # Fetch one extra row to learn whether another page exists
+    size = page_size()
+    page = fetch_item_page(session, after, size + 1, updated_from=updated_from, updated_until=updated_until)
+    has_more = len(page) > size
+    page = page[:size]
+    if not page and cursor == 0:
+        raise OaiError("noRecordsMatch", "No records match the request")
+
+    el = etree.SubElement(root, f"{{{OAI_NS}}}{verb}")
+    for item in page:
+        if verb == "ListRecords":
+            _record(el, item)
+        else:
+            _header(el, item)
+
+    if has_more or cursor:
+        token = etree.SubElement(el, f"{{{OAI_NS}}}resumptionToken")
+        token.set("cursor", str(cursor))
+        if has_more:
+            last = page[-1]
+            token.text = encode_token((last.updated_at, last.id), args, cursor + len(page))
+        # An empty token marks the last page of a resumed list
+
+
+def _get_record(root, session: Session, params: Dict[str, str]):
+    _require(params, {"identifier", "metadataPrefix"}, {"identifier", "metadataPrefix"})
+    if params["metadataPrefix"] != METADATA_PREFIX:
+        raise OaiError("cannotDisseminateFormat", f"Only {METADATA_PREFIX} is supported")
+    item = session.get(Item, _parse_identifier(params["identifier"]))
+    if item is None:
+        raise OaiError("idDoesNotExist", f"Unknown identifier: {params['identifier']}")
+    _record(etree.SubElement(root, f"{{{OAI_NS}}}GetRecord"), item)
+
+
+def handle_request(session: Session, base_url: str, params: Dict[str, str]) -> bytes:
+    """Answer one OAI-PMH request. Protocol errors are reported in the XML body."""
+    root = _root(base_url, params)
+    verb = params.get("verb")
+    try:
+        if verb not in VERBS:
+            raise OaiError("badVerb", "Illegal or missing verb")
+        if verb == "Identify":
+            _require(params, set())
+            _identify(root, session, base_url)
+        elif verb == "ListMetadataFormats":
+            _require(params, {"identifier"})
+            _list_metadata_formats(root)
+        elif verb == "ListSets":
+            raise OaiError("noSetHierarchy", "This repository does not support sets")
+        elif verb == "GetRecord":
+            _get_record(root, session, params)
+        else:
+            _list(root, session, verb, params)
+    except OaiError as e:
+        # Drop any partial payload and report the error instead
+        for child in list(root)[2:]:
+            root.remove(child)
+        if e.code in ("badVerb", "badArgument"):
+            root[1].attrib.clear()
+        error = etree.SubElement(root, f"{{{OAI_NS}}}error", code=e.code)
+        error.text = e.message
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8")
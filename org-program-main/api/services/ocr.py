@@ -1,5 +1,8 @@
 from typing import Any, Dict
 
+# Stored with each result (AssetMetadata.version); bump when the engine changes
+OCR_VERSION = 1
+
 
 def extract_ocr_stub(file_path: str) -> Dict[str, Any]:
     # Stub: return empty dict and no text for now. Replace later with OCR engine.
@@ -0,0 +1,227 @@
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from PIL import Image
+from sqlalchemy import func, literal_column
+from sqlmodel import Session, select
+
+from ..db import get_session
+from ..models import Asset, Item, utcnow
+from ..storage import get_storage
+from .changes import record_changes
+
+
+logger = logging.getLogger(__name__)
+
+
+HASH_BITS = 64
+_MASK = (1 << HASH_BITS) - 1
+
+# Default Hamming radius for "near duplicate": re-encodes, resizes and light
+# re-scans of the same picture usually land within a few bits of each other
+DEFAULT_MAX_DISTANCE = 4
+
+
+def dhash(file_path: str, size: int = 8) -> Optional[int]:
+    """
+    64-bit difference hash: shrink to 9x8 greyscale and record, per row, whether
+    each pixel is brighter than its right neighbour. Returned as a signed 64-bit
+    integer so it fits SQLite's INTEGER column; None if the file is not an image.
+    """
+    try:
+        with Image.open(file_path) as image:
+            image.draft("L", (size * 8, size * 8))  # let JPEG decode at reduced size
+            pixels = image.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS).tobytes()
+    except Exception as e:
+        logger.debug("hashing failed for %s: %s", file_path, e)
+        return None
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return to_signed(value)
+
+
+def to_signed(value: int) -> int:
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class HashEntry(NamedTuple):
+    asset_id: uuid.UUID
+    item_id: uuid.UUID
+    phash: int
+
+
+class PhashIndex:
+    """
+    Multi-index hashing for Hamming-radius search. Each hash is split into
+    max_distance + 1 bands; two hashes within max_distance bits must agree exactly
+    on at least one band (pigeonhole), so only hashes sharing a band bucket are
+    ever compared.
+    """
+
+    def __init__(self, entries: Iterable[HashEntry], max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        # Near-equal contiguous bit ranges, e.g. 13/13/13/13/12 bits for 5 bands
+        widths = [HASH_BITS // bands + (1 if i < HASH_BITS % bands else 0) for i in range(bands)]
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self.entries: List[HashEntry] = list(entries)
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in self._bands]
+        for index, entry in enumerate(self.entries):
+            value = entry.phash & _MASK
+            for buckets, (shift, mask) in zip(self._buckets, self._bands):
+                buckets[(value >> shift) & mask].append(index)
+        self._groups: Optional[List[List[HashEntry]]] = None
+
+    def query(self, phash: int, max_distance: Optional[int] = None) -> List[Tuple[HashEntry, int]]:
+        """Entries within max_distance bits of `phash` (at most the index's radius), nearest first."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        value = phash & _MASK
+        seen = set()
+        found = []
+        for buckets, (shift, mask) in zip(self._buckets, self._bands):
+            for index in buckets.get((value >> shift) & mask, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                distance = hamming(value, self.entries[index].phash)
+                if distance <= limit:
+                    found.append((self.entries[index], distance))
+        found.sort(key=lambda pair: pair[1])
+        return found
+
+    def clusters(self, min_size: int = 2) -> List[List[HashEntry]]:
+        """Connected groups of entries linked by pairs within max_distance (single linkage)."""
+        if self._groups is None:
+            self._groups = self._link()
+        return [group for group in self._groups if len(group) >= min_size]
+
+    def _link(self) -> List[List[HashEntry]]:
+        # Pair work grows with bucket size squared: narrower bands (larger radius)
+        # mean fuller buckets, so each extra bit of radius costs noticeably more
+        parent = list(range(len(self.entries)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        hashes = [entry.phash & _MASK for entry in self.entries]
+        limit = self.max_distance
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                # Hot loop: plain ints and bit_count(), no helper calls per pair
+                values = [hashes[i] for i in members]
+                for pos, a in enumerate(values):
+                    for offset, b in enumerate(values[pos + 1:], pos + 1):
+                        if (a ^ b).bit_count() <= limit:
+                            root_i, root_j = find(members[pos]), find(members[offset])
+                            if root_i != root_j:
+                                parent[root_j] = root_i
+
+        groups: Dict[int, List[HashEntry]] = defaultdict(list)
+        for index, entry in enumerate(self.entries):
+            groups[find(index)].append(entry)
+        return sorted((g for g in groups.values() if len(g) >= 2), key=len, reverse=True)
+
+
+def load_index(session: Session, max_distance: int = DEFAULT_MAX_DISTANCE) -> PhashIndex:
+    # Only three narrow columns are read, so this stays cheap for large archives
+    rows = session.exec(select(Asset.id, Asset.item_id, Asset.phash).where(Asset.phash.is_not(None))).all()
+    return PhashIndex((HashEntry(*row) for row in rows), max_distance)
+
+
+# Built indexes by radius, with the hash-set signature they were built from
+_indexes: Dict[int, Tuple[tuple, PhashIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(session: Session, max_distance: int = DEFAULT_MAX_DISTANCE) -> PhashIndex:
+    """
+    Cached PhashIndex, rebuilt only when the stored hashes change. The signature
+    (count, newest rowid, and the exact sum of phash) is read from ix_asset_phash
+    without touching the table. The sum is split into 32-bit halves: a float
+    total() would drop the low bits of 64-bit hashes, and a plain sum() overflows.
+    """
+    phash = Asset.phash
+    signature = tuple(
+        session.exec(
+            select(
+                func.count(phash),
+                func.max(literal_column("asset.rowid")).filter(phash.is_not(None)),
+                func.sum(phash.op(">>")(32)),
+                func.sum(phash.op("&")(0xFFFFFFFF)),
+            )
+        ).one()
+    )
+    with _indexes_lock:
+        cached = _indexes.get(max_distance)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    index = load_index(session, max_distance)
+    with _indexes_lock:
+        _indexes[max_distance] = (signature, index)
+    return index
+
+
+def backfill_phash(batch_size: int = 500, workers: Optional[int] = None) -> dict:
+    """Hash image assets stored before perceptual hashing existed. Commits per batch."""
+    stats = {"hashed": 0, "failed": 0}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    last_id: Optional[uuid.UUID] = None
+    try:
+        with get_session() as session:
+            while True:
+                # Keyset on id so files that cannot be hashed are not retried forever
+                stmt = select(Asset).where(Asset.phash.is_(None), Asset.mime_type.like("image/%"))
+                if last_id is not None:
+                    stmt = stmt.where(Asset.id > last_id)
+                assets = list(session.exec(stmt.order_by(Asset.id).limit(batch_size)).all())
+                if not assets:
+                    break
+                last_id = assets[-1].id
+                # Local copies: the files themselves, or fetched into the storage read cache
+                storage = get_storage()
+                paths = [storage.local_path(asset.file_path) for asset in assets]
+                hashes = executor.map(dhash, paths, chunksize=16) if executor else map(dhash, paths)
+                touched = set()
+                for asset, value in zip(assets, hashes):
+                    if value is None:
+                        stats["failed"] += 1
+                    else:
+                        asset.phash = value
+                        session.add(asset)
+                        touched.add(asset.item_id)
+                        stats["hashed"] += 1
+                # phash is part of the item payload, so the items get a new version:
+                # every worker's cache (keyed by updated_at) and sync clients see it
+                if touched:
+                    now = utcnow()
+                    for item in session.exec(select(Item).where(Item.id.in_(touched))).all():
+                        item.updated_at = now
+                        session.add(item)
+                    record_changes(session, touched)
+                session.commit()
+                session.expunge_all()
+                logger.info("phash backfill batch", extra=stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return stats
@@ -0,0 +1,128 @@
+import logging
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from ..db import delete_fts_rows, get_session, insert_fts_rows
+from ..models import EnrichmentJob, Item, utcnow
+from .asset_metadata import KIND_OCR, load_metadata
+from .changes import record_changes
+from .enrichment import enrich_items
+
+
+logger = logging.getLogger(__name__)
+
+
+def _fts_row(item: Item, metadata: dict) -> dict:
+    # Unlike a single upload, a re-run sees every asset, so all OCR text is indexed
+    ocr = "\n".join(str(metadata.get(a.id, {}).get(KIND_OCR, {}).get("text") or "") for a in item.assets).strip()
+    return {"item_id": str(item.id), "title": item.title, "description": item.description, "ocr": ocr}
+
+
+def _reenrich_batch(session: Session, job: EnrichmentJob) -> int:
+    """
+    Re-enrich the next page of items (in id order) from their stored assets: one
+    query for the items, one IN query each for their assets and the assets' stored
+    EXIF/OCR, one transaction for the item updates, FTS rows, change feed and
+    checkpoint. Returns the page size.
+    """
+    stmt = select(Item).options(selectinload(Item.assets)).order_by(Item.id).limit(job.batch_size)
+    if job.last_item_id is not None:
+        stmt = stmt.where(Item.id > job.last_item_id)
+    items: List[Item] = list(session.exec(stmt).all())
+    if not items:
+        return 0
+
+    metadata = load_metadata(session, [asset.id for item in items for asset in item.assets])
+    changed = enrich_items(items, metadata)
+    if changed:
+        now = utcnow()
+        for item in changed:
+            item.updated_at = now
+            session.add(item)
+        delete_fts_rows(session, [str(item.id) for item in changed])
+        insert_fts_rows(session, [_fts_row(item, metadata) for item in changed])
+        record_changes(session, [item.id for item in changed])
+
+    job.items_seen += len(items)
+    job.assets_seen += sum(len(item.assets) for item in items)
+    job.items_changed += len(changed)
+    job.last_item_id = items[-1].id
+    job.updated_at = utcnow()
+    session.add(job)
+    session.commit()
+    return len(items)
+
+
+def run_reenrichment(job_id: uuid.UUID) -> EnrichmentJob:
+    """
+    Run (or resume) a re-enrichment job to completion. Every batch commits its own
+    short transaction, and with `job.rate` set the loop sleeps between batches so
+    that live requests get the database in between.
+    """
+    started = time.perf_counter()
+    with get_session() as session:
+        job = session.get(EnrichmentJob, job_id)
+        if job is None:
+            raise ValueError(f"Enrichment job {job_id} not found")
+        job.status = "running"
+        job.error = None
+        session.commit()
+
+        processed = 0
+        try:
+            while True:
+                count = _reenrich_batch(session, job)
+                if not count:
+                    break
+                processed += count
+                logger.info(
+                    "re-enrichment batch",
+                    extra={"job_id": str(job.id), "seen": job.items_seen, "changed": job.items_changed},
+                )
+                # Keep identity map small between batches
+                session.expunge_all()
+                job = session.get(EnrichmentJob, job_id)
+                if job.rate:
+                    ahead = processed / job.rate - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+                if count < job.batch_size:
+                    break
+            job.status = "completed"
+        except Exception as e:
+            session.rollback()
+            job = session.get(EnrichmentJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+            logger.exception("re-enrichment job %s failed", job_id)
+        finally:
+            job.elapsed_seconds += time.perf_counter() - started
+            job.updated_at = utcnow()
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+        return job
+
+
+def enrichment_report(job: EnrichmentJob) -> dict:
+    """Throughput summary for a (possibly still running) job."""
+    elapsed = job.elapsed_seconds or 0.0
+    return {
+        "items_seen": job.items_seen,
+        "assets_seen": job.assets_seen,
+        "items_changed": job.items_changed,
+        "elapsed_seconds": round(elapsed, 2),
+        "items_per_second": round(job.items_seen / elapsed, 1) if elapsed else None,
+    }
+
+
+def create_job(session: Session, batch_size: int = 200, rate: Optional[float] = None) -> EnrichmentJob:
+    job = EnrichmentJob(batch_size=max(1, batch_size), rate=rate if rate and rate > 0 else None)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
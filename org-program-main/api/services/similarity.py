@@ -0,0 +1,315 @@
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, text
+from sqlmodel import Session, select
+
+from ..db import get_session
+from ..models import Item, ItemChange, ItemSimilarity, SimilarityPosting, SimilarityState, SimilarityTerm, utcnow
+from .asset_metadata import ocr_text_by_item
+from .changes import OP_UPSERT, latest_seq
+
+
+logger = logging.getLogger(__name__)
+
+
+TOP_K = int(os.getenv("SIMILAR_TOP_K", "10"))
+# Highest-weighted terms kept per item vector
+MAX_TERMS = 32
+# Terms found in more than this share of items carry no signal and are skipped
+MAX_DF = 0.5
+# Repeat counts per field: titles and subjects say more about an item than OCR noise
+FIELD_WEIGHTS = {"title": 2, "subjects": 2, "description": 1, "ocr": 1}
+PAGE = 500
+
+_TOKEN = re.compile(r"[^\W_]{3,}")
+_STOPWORDS = frozenset(
+    "the and for with from that this are was were not but have has had its into over than then they them their "
+    "there which will would been being also you your our out all any can may one two".split()
+)
+
+Vector = List[Tuple[str, float]]
+
+
+def _tokens(value: Optional[str]) -> List[str]:
+    return [t for t in _TOKEN.findall((value or "").lower()) if t not in _STOPWORDS]
+
+
+def term_counts(title: str, description: Optional[str], subjects: Iterable[str], ocr_text: str) -> Counter:
+    counts: Counter = Counter()
+    for field, value in (("title", title), ("description", description), ("subjects", " ".join(subjects or [])), ("ocr", ocr_text)):
+        weight = FIELD_WEIGHTS[field]
+        for token in _tokens(value):
+            counts[token] += weight
+    return counts
+
+
+def _documents(session: Session, rows: list) -> Iterator[Tuple[uuid.UUID, Counter]]:
+    # OCR rows only: the (much larger) EXIF metadata is never read here
+    ocr = ocr_text_by_item(session, [r[0] for r in rows])
+    for item_id, title, description, subjects in rows:
+        yield item_id, term_counts(title, description, subjects, " ".join(ocr.get(item_id, ())))
+
+
+def _iter_documents(session: Session, item_ids: Optional[List[uuid.UUID]] = None) -> Iterator[Tuple[uuid.UUID, Counter]]:
+    """Term counts per item (all items, or the given ids), a page at a time."""
+    columns = (Item.id, Item.title, Item.description, Item.subjects)
+    if item_ids is not None:
+        for start in range(0, len(item_ids), PAGE):
+            rows = session.exec(select(*columns).where(Item.id.in_(item_ids[start:start + PAGE]))).all()
+            yield from _documents(session, rows)
+        return
+    after: Optional[uuid.UUID] = None
+    while True:
+        stmt = select(*columns).order_by(Item.id).limit(PAGE)
+        if after is not None:
+            stmt = stmt.where(Item.id > after)
+        rows = session.exec(stmt).all()
+        if not rows:
+            return
+        yield from _documents(session, rows)
+        if len(rows) < PAGE:
+            return
+        after = rows[-1][0]
+
+
+def vectorize(counts: Counter, df: Dict[str, int], doc_count: int) -> Vector:
+    """Sublinear TF x smoothed IDF, pruned to MAX_TERMS terms and L2-normalised."""
+    df_limit = max(MAX_DF * doc_count, 2)
+    weights = {}
+    for term, count in counts.items():
+        freq = df.get(term, 1)
+        if freq > df_limit:
+            continue
+        weights[term] = (1 + math.log(count)) * (math.log((doc_count + 1) / (freq + 1)) + 1)
+    top = heapq.nlargest(MAX_TERMS, weights.items(), key=itemgetter(1))
+    norm = math.sqrt(sum(w * w for _, w in top))
+    return [(term, w / norm) for term, w in top] if norm else []
+
+
+def _top_k(vector: List[Tuple[int, float]], postings: Dict[int, List[Tuple[int, float]]], self_index: int, k: int):
+    # Plain int document/term indices: hashing UUIDs here would dominate the build
+    scores: Dict[int, float] = defaultdict(float)
+    for term, weight in vector:
+        for other, other_weight in postings[term]:
+            scores[other] += weight * other_weight
+    scores.pop(self_index, None)
+    return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+
+def _batched(rows: Iterable[dict], size: int = 5000) -> Iterator[List[dict]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def rebuild_similarity(top_k: int = TOP_K) -> dict:
+    """
+    Full offline build: vocabulary and document frequencies, one sparse vector per
+    item, and every item's top-k neighbours from an in-memory inverted index
+    (scored while the rows are written). Replaces the similarity tables in one
+    transaction.
+    """
+    started = time.perf_counter()
+    with get_session() as session:
+        # Changes after this point are left for refresh_similarity()
+        seq = latest_seq(session)
+        docs = dict(_iter_documents(session))
+        df: Counter = Counter()
+        for counts in docs.values():
+            df.update(counts.keys())
+        doc_count = len(docs)
+
+        item_ids = list(docs)
+        term_ids = {term: index for index, term in enumerate(sorted(df), start=1)}
+        vectors = [[(term_ids[t], w) for t, w in vectorize(docs.pop(item_id), df, doc_count)] for item_id in item_ids]
+        postings: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for index, vector in enumerate(vectors):
+            for term_id, weight in vector:
+                postings[term_id].append((index, weight))
+
+        session.exec(delete(ItemSimilarity))
+        session.exec(delete(SimilarityPosting))
+        session.exec(delete(SimilarityTerm))
+        session.exec(delete(SimilarityState))
+        # Raw executemany (ids as stored hex) rather than ORM bulk inserts
+        hex_ids = [item_id.hex for item_id in item_ids]
+        conn = session.connection()
+        for batch in _batched({"id": i, "term": t, "df": df[t]} for t, i in term_ids.items()):
+            conn.execute(text("INSERT INTO similarityterm (id, term, df) VALUES (:id, :term, :df)"), batch)
+        for batch in _batched(
+            {"item_id": hex_ids[index], "term_id": t, "weight": w} for index, vector in enumerate(vectors) for t, w in vector
+        ):
+            conn.execute(text("INSERT INTO similarityposting (item_id, term_id, weight) VALUES (:item_id, :term_id, :weight)"), batch)
+        for batch in _batched(
+            {"item_id": hex_ids[index], "similar_id": hex_ids[other], "score": score}
+            for index, vector in enumerate(vectors)
+            for other, score in _top_k(vector, postings, index, top_k)
+        ):
+            conn.execute(text("INSERT INTO itemsimilarity (item_id, similar_id, score) VALUES (:item_id, :similar_id, :score)"), batch)
+        session.add(SimilarityState(last_seq=seq, doc_count=doc_count))
+        session.commit()
+
+    stats = {
+        "items": doc_count,
+        "terms": len(term_ids),
+        "postings": sum(len(v) for v in vectors),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("similarity rebuild finished", extra=stats)
+    return stats
+
+
+def _term_ids(session: Session, terms: List[str]) -> Dict[str, Tuple[int, int]]:
+    """term -> (id, df), inserting unseen terms with df=1."""
+    found: Dict[str, Tuple[int, int]] = {}
+    for start in range(0, len(terms), PAGE):
+        chunk = terms[start:start + PAGE]
+        for term_id, term, freq in session.exec(
+            select(SimilarityTerm.id, SimilarityTerm.term, SimilarityTerm.df).where(SimilarityTerm.term.in_(chunk))
+        ).all():
+            found[term] = (term_id, freq)
+    new = [SimilarityTerm(term=term, df=1) for term in terms if term not in found]
+    if new:
+        session.add_all(new)
+        session.flush()  # assigns ids
+        found.update((row.term, (row.id, 1)) for row in new)
+    return found
+
+
+_NEIGHBOURS_SQL = text(
+    """
+    SELECT p.item_id, SUM(p.weight * q.weight) AS score
+    FROM similarityposting AS q
+    JOIN similarityposting AS p ON p.term_id = q.term_id
+    WHERE q.item_id = :item_id AND p.item_id != :item_id
+    GROUP BY p.item_id
+    ORDER BY score DESC
+    LIMIT :k
+    """
+)
+
+
+def _link(session: Session, item_id: uuid.UUID, top_k: int) -> None:
+    """Recompute one item's neighbours with a SQL dot product and offer it to theirs."""
+    # May hold reverse edges added while linking an earlier item of the same batch
+    session.exec(delete(ItemSimilarity).where(ItemSimilarity.item_id == item_id))
+    rows = session.exec(_NEIGHBOURS_SQL.bindparams(item_id=item_id.hex, k=top_k)).all()
+    for other_hex, score in rows:
+        other = uuid.UUID(other_hex)
+        session.add(ItemSimilarity(item_id=item_id, similar_id=other, score=score))
+        # Reverse edge: only if it beats the other item's weakest neighbour
+        current = session.exec(
+            select(ItemSimilarity).where(ItemSimilarity.item_id == other).order_by(ItemSimilarity.score)
+        ).all()
+        existing = next((row for row in current if row.similar_id == item_id), None)
+        if existing is not None:
+            existing.score = score
+            session.add(existing)
+            continue
+        if len(current) >= top_k:
+            if current[0].score >= score:
+                continue
+            session.delete(current[0])
+        session.add(ItemSimilarity(item_id=other, similar_id=item_id, score=score))
+
+
+def refresh_similarity(top_k: int = TOP_K, batch_size: int = 200) -> dict:
+    """
+    Bring the neighbour table up to date with the change feed. Changed items get
+    new vectors (IDF weights stay those of the last full build) and fresh
+    neighbours; deleted items are dropped everywhere. No-op until the first build.
+    """
+    stats = {"built": False, "refreshed": 0, "removed": 0}
+    with get_session() as session:
+        state = session.get(SimilarityState, 1)
+        if state is None:
+            return stats
+        stats["built"] = True
+        while True:
+            changes = session.exec(
+                select(ItemChange).where(ItemChange.seq > state.last_seq).order_by(ItemChange.seq).limit(batch_size)
+            ).all()
+            if not changes:
+                break
+            affected = [c.item_id for c in changes]
+            session.exec(delete(SimilarityPosting).where(SimilarityPosting.item_id.in_(affected)))
+            session.exec(delete(ItemSimilarity).where(ItemSimilarity.item_id.in_(affected)))
+            session.exec(delete(ItemSimilarity).where(ItemSimilarity.similar_id.in_(affected)))
+
+            docs = dict(_iter_documents(session, [c.item_id for c in changes if c.op == OP_UPSERT]))
+            terms = _term_ids(session, sorted({t for counts in docs.values() for t in counts}))
+            df = {term: freq for term, (_, freq) in terms.items()}
+            for item_id, counts in docs.items():
+                session.add_all(
+                    SimilarityPosting(item_id=item_id, term_id=terms[t][0], weight=w)
+                    for t, w in vectorize(counts, df, state.doc_count)
+                )
+            session.flush()
+            for item_id in docs:
+                _link(session, item_id, top_k)
+
+            stats["refreshed"] += len(docs)
+            stats["removed"] += len(affected) - len(docs)
+            state.last_seq = changes[-1].seq
+            state.refreshed_at = utcnow()
+            session.add(state)
+            session.commit()
+    return stats
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_in_background() -> None:
+    """BackgroundTasks hook for item writes. Skips if a refresh is already running,
+    since that run keeps reading the change feed until it is drained."""
+    if os.getenv("SIMILARITY_AUTO_REFRESH", "on").lower() in ("0", "off", "false"):
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        refresh_similarity()
+    except Exception:
+        logger.exception("background similarity refresh failed")
+    finally:
+        _refresh_lock.release()
+
+
+def similar_items(session: Session, item_id: uuid.UUID, limit: int = TOP_K) -> List[Tuple[uuid.UUID, str, float]]:
+    # Primary-key range on item_similarity plus one join per neighbour for the title
+    stmt = (
+        select(ItemSimilarity.similar_id, Item.title, ItemSimilarity.score)
+        .join(Item, Item.id == ItemSimilarity.similar_id)
+        .where(ItemSimilarity.item_id == item_id)
+        .order_by(ItemSimilarity.score.desc())
+        .limit(limit)
+    )
+    return list(session.exec(stmt).all())
+
+
+def similarity_status(session: Session) -> dict:
+    state = session.get(SimilarityState, 1)
+    if state is None:
+        return {"built": False}
+    return {
+        "built": True,
+        "doc_count": state.doc_count,
+        "last_seq": state.last_seq,
+        "pending_changes": session.exec(select(func.count()).where(ItemChange.seq > state.last_seq)).one(),
+        "built_at": state.built_at,
+        "refreshed_at": state.refreshed_at,
+    }
@@ -0,0 +1,252 @@
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlmodel import Session, select
+
+from ..db import get_session
+from ..models import ItemChange
+from .changes import OP_DELETE, latest_seq
+
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_FIELDS = ("subjects", "creators")
+# Title matches are ranked by bm25 within the first RANK_WINDOW matches only: a
+# one-letter prefix can match most of the archive, and ranking all of it would
+# cost far more than a keystroke budget
+RANK_WINDOW = 100
+# Shortest partial word matched as a prefix term (the smallest indexed prefix)
+MIN_PARTIAL = 2
+# IN-list size when loading changed items
+_PAGE = 500
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Raw JSON text, so the full scan does not go through ORM type processing
+_SCAN = text("SELECT id, subjects, creators FROM item")
+_LOAD = text("SELECT id, subjects, creators FROM item WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+
+
+def _parse(raw: Optional[str]) -> Tuple[str, ...]:
+    # Distinct non-empty strings, so one item counts once per value
+    if not raw or raw == "[]":
+        return ()
+    values = json.loads(raw)
+    if not isinstance(values, list):
+        return ()
+    return tuple(dict.fromkeys(v.strip() for v in values if isinstance(v, str) and v.strip()))
+
+
+class TermDictionary:
+    """
+    Case-insensitive sorted dictionary of list-field values (e.g. all subjects)
+    with the number of items using each. Prefix lookups are a bisect into the
+    sorted keys; only the matching range is ranked by count.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []  # sorted casefolded values
+        self._display: Dict[str, str] = {}  # casefolded -> spelling shown
+        self._counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, counts: Dict[str, int]) -> None:
+        """Replace the contents with `counts` (value -> items); the most used spelling is shown."""
+        self._counts = Counter()
+        self._display = {}
+        for value, count in sorted(counts.items(), key=lambda kv: -kv[1]):
+            key = value.casefold()
+            self._display.setdefault(key, value)
+            self._counts[key] += count
+        self._keys = sorted(self._counts)
+
+    def add(self, values: Iterable[str]) -> None:
+        for value in values:
+            key = value.casefold()
+            if self._counts[key] == 0:
+                bisect.insort(self._keys, key)
+                self._display[key] = value
+            self._counts[key] += 1
+
+    def remove(self, values: Iterable[str]) -> None:
+        for value in values:
+            key = value.casefold()
+            if self._counts[key] <= 0:
+                continue
+            self._counts[key] -= 1
+            if self._counts[key] == 0:
+                del self._counts[key]
+                del self._display[key]
+                del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Up to `limit` values starting with `prefix`, most used first."""
+        key = prefix.casefold()
+        start = bisect.bisect_left(self._keys, key)
+        # Every key with this prefix sorts before prefix + the highest code point
+        end = bisect.bisect_left(self._keys, key + "\U0010ffff", start)
+        best = heapq.nsmallest(limit, self._keys[start:end], key=lambda k: (-self._counts[k], k))
+        return [(self._display[k], self._counts[k]) for k in best]
+
+
+class SuggestIndex:
+    """
+    In-memory subject/creator dictionaries, built with one scan of the item table
+    and kept current from the change feed: each lookup applies only the items
+    changed since the last seen seq.
+    """
+
+    def __init__(self):
+        self.dictionaries = {field: TermDictionary() for field in SUGGEST_FIELDS}
+        # Raw JSON per item (hex id), so an update can retract the values it replaces.
+        # Kept unparsed: it is only read for the few items that change.
+        self._indexed: Dict[str, Tuple[Optional[str], ...]] = {}
+        self.seq: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _set(self, item_id: str, raw: Optional[Tuple[Optional[str], ...]]) -> None:
+        old = self._indexed.pop(item_id, None)
+        if old is not None:
+            for dictionary, field_raw in zip(self.dictionaries.values(), old):
+                dictionary.remove(_parse(field_raw))
+        if raw is None:
+            return
+        parsed = [_parse(field_raw) for field_raw in raw]
+        if any(parsed):
+            self._indexed[item_id] = raw
+            for dictionary, values in zip(self.dictionaries.values(), parsed):
+                dictionary.add(values)
+
+    def build(self, session: Session) -> None:
+        # Read the feed position first: changes racing the scan are re-applied later
+        seq = latest_seq(session)
+        counts = [Counter() for _ in SUGGEST_FIELDS]
+        indexed = {}
+        for item_id, *raw in session.exec(_SCAN):
+            parsed = [_parse(field_raw) for field_raw in raw]
+            if any(parsed):
+                indexed[item_id] = tuple(raw)
+                for counter, values in zip(counts, parsed):
+                    counter.update(values)
+        for dictionary, counter in zip(self.dictionaries.values(), counts):
+            dictionary.load(counter)
+        self._indexed = indexed
+        self.seq = seq
+        logger.info("suggest index built", extra={"items": len(indexed), "seq": seq})
+
+    def refresh(self, session: Session) -> int:
+        """Apply item changes since the last build/refresh. Returns the number applied."""
+        rows = session.exec(
+            select(ItemChange.seq, ItemChange.item_id, ItemChange.op).where(ItemChange.seq > self.seq).order_by(ItemChange.seq)
+        ).all()
+        if not rows:
+            return 0
+        # ItemChange keeps one row per item, so each id appears once
+        upserted = []
+        for _, item_id, op in rows:
+            if op == OP_DELETE:
+                self._set(item_id.hex, None)
+            else:
+                upserted.append(item_id.hex)
+        for start in range(0, len(upserted), _PAGE):
+            page = upserted[start:start + _PAGE]
+            found = set()
+            for item_id, *raw in session.exec(_LOAD.bindparams(ids=page)):
+                found.add(item_id)
+                self._set(item_id, tuple(raw))
+            for item_id in set(page) - found:
+                self._set(item_id, None)
+        self.seq = rows[-1][0]
+        return len(rows)
+
+    def complete(self, session: Session, field: str, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            if self.seq is None:
+                self.build(session)
+            else:
+                self.refresh(session)
+            return self.dictionaries[field].complete(prefix, limit)
+
+    def warm(self) -> None:
+        """Build now (e.g. at startup) so the first keystroke does not pay for the scan."""
+        with self._lock, get_session() as session:
+            if self.seq is None:
+                self.build(session)
+
+
+_index = SuggestIndex()
+
+
+def get_suggest_index() -> SuggestIndex:
+    return _index
+
+
+def warm_in_background() -> None:
+    """Build the dictionaries in a daemon thread at startup (SUGGEST_WARM=off skips it)."""
+    if os.getenv("SUGGEST_WARM", "on").lower() in ("0", "off", "false"):
+        return
+
+    def run() -> None:
+        try:
+            _index.warm()
+        except Exception:
+            logger.exception("suggest index warm-up failed")
+
+    threading.Thread(target=run, name="suggest-warm", daemon=True).start()
+
+
+def fts_prefix_query(prefix: str) -> Optional[str]:
+    """
+    FTS5 query for a typeahead prefix restricted to titles: every complete word
+    must match and the last (partial) word is a prefix term, e.g.
+    'light ho' -> title : ("light" AND "ho"*). A one-character partial word is
+    left out, since only 2- and 3-character prefixes are indexed (FTS_PREFIXES)
+    and expanding a single letter means merging a large part of the index.
+    None if nothing is left to match.
+    """
+    tokens = _TOKEN.findall(prefix.casefold())
+    terms = [f'"{token}"' for token in tokens]
+    # A trailing space means the last word is complete
+    if tokens and not prefix[-1:].isspace():
+        terms.pop()
+        if len(tokens[-1]) >= MIN_PARTIAL:
+            terms.append(f'"{tokens[-1]}"*')
+    if not terms:
+        return None
+    return "title : (" + " AND ".join(terms) + ")"
+
+
+def suggest_titles(session: Session, prefix: str, limit: int) -> List[Tuple[str, str]]:
+    """(item_id, title) pairs whose title matches the prefix, best bm25 match (within RANK_WINDOW) first."""
+    query = fts_prefix_query(prefix)
+    if query is None:
+        return []
+    rows = session.exec(
+        text(
+            "SELECT item_id, title FROM (SELECT item_id, title, rank FROM item_fts WHERE item_fts MATCH :q LIMIT :window) "
+            "ORDER BY rank LIMIT :limit"
+        ).bindparams(q=query, window=RANK_WINDOW, limit=limit)
+    ).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def suggest(session: Session, prefix: str, limit: int = 10, fields: Iterable[str] = ("title",) + SUGGEST_FIELDS) -> dict:
+    fields = set(fields)
+    result: dict = {"prefix": prefix}
+    if "title" in fields:
+        result["titles"] = [{"id": item_id, "title": title} for item_id, title in suggest_titles(session, prefix, limit)]
+    needle = prefix.strip()
+    for field in SUGGEST_FIELDS:
+        if field in fields:
+            matches = _index.complete(session, field, needle, limit) if needle else []
+            result[field] = [{"value": value, "count": count} for value, count in matches]
+    return result
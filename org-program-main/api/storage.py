@@ -0,0 +1,592 @@
+"""
+Asset storage backends.
+
+Uploads and imports write through `get_storage()` instead of touching the upload
+directory, so several API nodes can share one asset store:
+
+    STORAGE_BACKEND=local   files under UPLOAD_DIR, served by StaticFiles (default)
+    STORAGE_BACKEND=s3      an S3-compatible object store (AWS, MinIO, api.s3stub)
+
+S3 settings: S3_ENDPOINT, S3_BUCKET, S3_REGION (us-east-1), S3_ACCESS_KEY,
+S3_SECRET_KEY (AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY also work), S3_PREFIX,
+S3_PART_MB (8; S3's minimum part size is 5) and S3_PRESIGN_SECONDS (900).
+
+Uploads stream to the object store as a multipart upload while a copy is kept
+in the local read cache (STORAGE_CACHE_DIR, STORAGE_CACHE_MB), where EXIF, OCR
+and hashing read it. GET /uploads/... redirects to a presigned URL, or with
+STORAGE_READS=proxy serves the object from the read cache.
+
+Asset.file_path keeps its "uploads/<item id>/<file name>" form on every backend,
+so clients keep linking to /uploads/... either way.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, urlsplit
+
+from .db import get_upload_dir, to_stored_path
+
+
+if TYPE_CHECKING:  # httpx is only imported when an S3 backend is configured
+    import httpx
+
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "uploads"
+MIN_PART_SIZE = 5 * 1024 * 1024
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+_UPLOAD_ID = re.compile(r"<UploadId>([^<]+)</UploadId>")
+
+
+class StorageError(Exception):
+    """The storage backend rejected or failed a request."""
+
+
+# --- AWS Signature Version 4 ---------------------------------------------------
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _signing_key(secret_key: str, date: str, region: str, service: str = "s3") -> bytes:
+    key = _hmac(("AWS4" + secret_key).encode("utf-8"), date)
+    key = _hmac(key, region)
+    key = _hmac(key, service)
+    return _hmac(key, "aws4_request")
+
+
+def _canonical_query(params: Dict[str, str]) -> str:
+    encoded = sorted((quote(k, safe="~"), quote(str(v), safe="~")) for k, v in params.items())
+    return "&".join(f"{k}={v}" for k, v in encoded)
+
+
+def _signature(
+    secret_key: str,
+    region: str,
+    amz_date: str,
+    method: str,
+    path: str,
+    query: str,
+    headers: Dict[str, str],
+    payload_hash: str,
+) -> Tuple[str, str]:
+    """(signed header names, hex signature) for an already-encoded path and query."""
+    names = sorted(headers)
+    canonical_headers = "".join(f"{name}:{headers[name].strip()}\n" for name in names)
+    signed_headers = ";".join(names)
+    canonical_request = "\n".join([method, path, query, canonical_headers, signed_headers, payload_hash])
+    scope = f"{amz_date[:8]}/{region}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()]
+    )
+    key = _signing_key(secret_key, amz_date[:8], region)
+    return signed_headers, hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def presign_url(
+    endpoint: str,
+    path: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires: int,
+    now: Optional[datetime] = None,
+    method: str = "GET",
+) -> str:
+    """Query-string authenticated URL for `path` (already URI-encoded, e.g. /bucket/key)."""
+    amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    params = {
+        "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+        "X-Amz-Credential": f"{access_key}/{amz_date[:8]}/{region}/s3/aws4_request",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": "host",
+    }
+    query = _canonical_query(params)
+    host = urlsplit(endpoint).netloc
+    _, signature = _signature(secret_key, region, amz_date, method, path, query, {"host": host}, UNSIGNED_PAYLOAD)
+    return f"{endpoint.rstrip('/')}{path}?{query}&X-Amz-Signature={signature}"
+
+
+# --- Local read cache ------------------------------------------------------------
+
+def _safe_key(key: str) -> str:
+    parts = [p for p in key.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    if not parts:
+        raise StorageError(f"invalid object key: {key!r}")
+    return "/".join(parts)
+
+
+class ReadCache:
+    """
+    Size-bounded LRU of objects on local disk. Holds fresh uploads (so metadata
+    extraction never re-downloads them) and objects read through the API.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._tmp = self.root / ".tmp"
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recent first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        # Survive restarts: index what is already on disk, oldest access first
+        if not self.root.is_dir():
+            return
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        found = []
+        for path in self.root.rglob("*"):
+            if path.is_file():
+                stat = path.stat()
+                found.append((stat.st_atime, path.relative_to(self.root).as_posix(), stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+
+    def path(self, key: str) -> Path:
+        return self.root / _safe_key(key)
+
+    def get(self, key: str) -> Optional[Path]:
+        key = _safe_key(key)
+        with self._lock:
+            if key in self._entries:
+                path = self.root / key
+                if path.exists():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return path
+                self._bytes -= self._entries.pop(key)
+            self.misses += 1
+        return None
+
+    def temp_path(self) -> Path:
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        return self._tmp / uuid.uuid4().hex
+
+    def add(self, key: str, temp: Path) -> Path:
+        """Move a finished temp file into the cache under `key`."""
+        key = _safe_key(key)
+        dest = self.root / key
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        size = temp.stat().st_size
+        os.replace(temp, dest)
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._bytes += size
+            evicted = self._evict(keep=key)
+        for path in evicted:
+            path.unlink(missing_ok=True)
+        return dest
+
+    def _evict(self, keep: str) -> List[Path]:
+        evicted = []
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._bytes -= size
+            evicted.append(self.root / key)
+        return evicted
+
+    def discard(self, key: str) -> None:
+        key = _safe_key(key)
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+        (self.root / key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# --- Backends --------------------------------------------------------------------
+
+class LocalWriter:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = path.open("wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+
+    def abort(self) -> None:
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class LocalStorage:
+    """Files under the upload directory; one machine's disk (or a shared mount)."""
+
+    name = "local"
+
+    def __init__(self, root: Union[str, Path, None] = None):
+        self.root = Path(root if root is not None else get_upload_dir())
+
+    def stored_path(self, key: str) -> str:
+        return to_stored_path(self.root / _safe_key(key))
+
+    def key_of(self, stored: str) -> Optional[str]:
+        try:
+            return Path(stored).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return None
+
+    def writer(self, key: str) -> LocalWriter:
+        return LocalWriter(self.root / _safe_key(key))
+
+    def local_path(self, stored: str) -> Optional[str]:
+        return stored if os.path.exists(stored) else None
+
+    def delete(self, key: str) -> None:
+        path = self.root / _safe_key(key)
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+    def read_chunks(self, stored: str, chunk_size: int) -> Iterator[memoryview]:
+        """
+        Stream a stored file (for fixity checks) through one reused buffer. The
+        pages read are dropped from the page cache afterwards, so scrubbing the
+        whole store does not evict the files being served. FileNotFoundError if gone.
+        """
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        with open(stored, "rb", buffering=0) as f:
+            _fadvise(f.fileno(), "POSIX_FADV_SEQUENTIAL")
+            try:
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    yield view[:count]
+            finally:
+                _fadvise(f.fileno(), "POSIX_FADV_DONTNEED")
+
+    def presigned_url(self, key: str) -> Optional[str]:
+        return None
+
+
+def _fadvise(fd: int, advice: str) -> None:
+    # Page-cache hints where the platform has them (not on Windows or macOS)
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        except OSError:
+            pass
+
+
+class S3Writer:
+    """
+    Streams an object to S3: buffered parts go out as a multipart upload once the
+    first part fills (a single PUT for small files), and every byte is also written
+    to a read-cache temp file that becomes the cached copy on commit.
+    """
+
+    def __init__(self, storage: "S3Storage", key: str):
+        self.storage = storage
+        self.key = key
+        self.path: Optional[Path] = None  # cached copy, set on commit
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Tuple[int, str]] = []
+        self._temp = storage.cache.temp_path()
+        self._file = self._temp.open("wb")
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._buffer += chunk
+        if len(self._buffer) >= self.storage.part_size:
+            self._flush_part()
+
+    def _flush_part(self) -> None:
+        if self._upload_id is None:
+            self._upload_id = self.storage._initiate_multipart(self.key)
+        number = len(self._parts) + 1
+        etag = self.storage._upload_part(self.key, self._upload_id, number, bytes(self._buffer))
+        self._parts.append((number, etag))
+        self._buffer.clear()
+
+    def commit(self) -> None:
+        self._file.close()
+        if self._upload_id is None:
+            self.storage._put(self.key, bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._flush_part()
+            self.storage._complete_multipart(self.key, self._upload_id, self._parts)
+        self._buffer = bytearray()
+        self.path = self.storage.cache.add(self.key, self._temp)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._temp.unlink(missing_ok=True)
+        if self._upload_id is not None:
+            try:
+                self.storage._abort_multipart(self.key, self._upload_id)
+            except StorageError as e:
+                logger.warning("failed to abort multipart upload of %s: %s", self.key, e)
+
+
+class S3Storage:
+    """S3-compatible object store, addressed path-style (endpoint/bucket/key)."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        cache: ReadCache,
+        region: str = "us-east-1",
+        prefix: str = "",
+        part_size: int = 8 * 1024 * 1024,
+        presign_seconds: int = 900,
+        client: Optional["httpx.Client"] = None,
+    ):
+        import httpx
+
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.part_size = part_size
+        self.presign_seconds = presign_seconds
+        self.cache = cache
+        self.client = client or httpx.Client(timeout=httpx.Timeout(30.0, read=300.0))
+        self._host = urlsplit(self.endpoint).netloc
+
+    def _path(self, key: str) -> str:
+        return "/" + quote(f"{self.bucket}/{self.prefix}{_safe_key(key)}", safe="/~")
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+        expected: Tuple[int, ...] = (200,),
+        stream: bool = False,
+    ) -> "httpx.Response":
+        import httpx
+
+        path = self._path(key)
+        query = _canonical_query(params or {})
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        headers = {"host": self._host, "x-amz-content-sha256": UNSIGNED_PAYLOAD, "x-amz-date": amz_date}
+        signed, signature = _signature(self.secret_key, self.region, amz_date, method, path, query, headers, UNSIGNED_PAYLOAD)
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request, "
+            f"SignedHeaders={signed}, Signature={signature}"
+        )
+        url = f"{self.endpoint}{path}" + (f"?{query}" if query else "")
+        request = self.client.build_request(method, url, content=body or None, headers=headers)
+        try:
+            response = self.client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise StorageError(f"{method} {key}: {e}") from e
+        if response.status_code not in expected:
+            detail = response.read()[:200] if stream else response.content[:200]
+            response.close()
+            raise StorageError(f"{method} {key}: HTTP {response.status_code} {detail!r}")
+        return response
+
+    def _put(self, key: str, data: bytes) -> None:
+        self._request("PUT", key, body=data)
+
+    def _initiate_multipart(self, key: str) -> str:
+        match = _UPLOAD_ID.search(self._request("POST", key, {"uploads": ""}).text)
+        if not match:
+            raise StorageError(f"no UploadId in multipart response for {key}")
+        return match.group(1)
+
+    def _upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        response = self._request("PUT", key, {"partNumber": str(number), "uploadId": upload_id}, body=data)
+        return response.headers.get("etag", "")
+
+    def _complete_multipart(self, key: str, upload_id: str, parts: List[Tuple[int, str]]) -> None:
+        body = "<CompleteMultipartUpload>" + "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>" for number, etag in parts
+        ) + "</CompleteMultipartUpload>"
+        response = self._request("POST", key, {"uploadId": upload_id}, body=body.encode("utf-8"))
+        # S3 can report a failed completion with a 200 status and an Error body
+        if "<Error>" in response.text:
+            raise StorageError(f"multipart completion failed for {key}: {response.text[:200]}")
+
+    def _abort_multipart(self, key: str, upload_id: str) -> None:
+        self._request("DELETE", key, {"uploadId": upload_id}, expected=(200, 204))
+
+    def stored_path(self, key: str) -> str:
+        return f"{URL_PREFIX}/{_safe_key(key)}"
+
+    def key_of(self, stored: str) -> Optional[str]:
+        stored = stored.replace("\\", "/")
+        return stored[len(URL_PREFIX) + 1:] if stored.startswith(URL_PREFIX + "/") else None
+
+    def writer(self, key: str) -> S3Writer:
+        return S3Writer(self, _safe_key(key))
+
+    def fetch(self, key: str) -> Path:
+        """Local copy of the object, downloaded into the read cache on a miss."""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        temp = self.cache.temp_path()
+        response = self._request("GET", key, stream=True)
+        try:
+            with temp.open("wb") as out_f:
+                for chunk in response.iter_bytes(1024 * 1024):
+                    out_f.write(chunk)
+        except Exception:
+            temp.unlink(missing_ok=True)
+            raise
+        finally:
+            response.close()
+        return self.cache.add(key, temp)
+
+    def local_path(self, stored: str) -> Optional[str]:
+        key = self.key_of(stored)
+        if key is None:
+            return None
+        try:
+            return str(self.fetch(key))
+        except StorageError as e:
+            logger.warning("could not fetch %s: %s", key, e)
+            return None
+
+    def delete(self, key: str) -> None:
+        self._request("DELETE", key, expected=(200, 204))
+        self.cache.discard(key)
+
+    def read_chunks(self, stored: str, chunk_size: int) -> Iterator[bytes]:
+        """
+        Stream an object (for fixity checks) straight from the store, bypassing the
+        read cache so a full scrub does not evict hot objects. FileNotFoundError if gone.
+        """
+        key = self.key_of(stored)
+        if key is None:
+            raise FileNotFoundError(stored)
+        response = self._request("GET", key, expected=(200, 404), stream=True)
+        try:
+            if response.status_code == 404:
+                raise FileNotFoundError(stored)
+            yield from response.iter_bytes(chunk_size)
+        finally:
+            response.close()
+
+    def presigned_url(self, key: str) -> str:
+        return presign_url(
+            self.endpoint, self._path(key), self.access_key, self.secret_key, self.region, self.presign_seconds
+        )
+
+
+Storage = Union[LocalStorage, S3Storage]
+
+
+@contextmanager
+def open_writer(storage: Storage, key: str) -> Iterator[Union[LocalWriter, S3Writer]]:
+    """
+    Write an object; it is committed when the block exits and aborted on error.
+    Afterwards `writer.path` is a local copy for extractors that need a file.
+    """
+    writer = storage.writer(key)
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def storage_from_env() -> Storage:
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "local":
+        return LocalStorage()
+    if backend != "s3":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    endpoint = os.getenv("S3_ENDPOINT", "https://s3.amazonaws.com")
+    bucket = os.getenv("S3_BUCKET")
+    if not bucket:
+        raise ValueError("S3_BUCKET is required when STORAGE_BACKEND=s3")
+    cache = ReadCache(
+        os.getenv("STORAGE_CACHE_DIR", os.path.join(get_upload_dir(), ".cache")),
+        _env_int("STORAGE_CACHE_MB", 1024) * 1024 * 1024,
+    )
+    return S3Storage(
+        endpoint=endpoint,
+        bucket=bucket,
+        access_key=os.getenv("S3_ACCESS_KEY") or os.getenv("AWS_ACCESS_KEY_ID", ""),
+        secret_key=os.getenv("S3_SECRET_KEY") or os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+        cache=cache,
+        region=os.getenv("S3_REGION", "us-east-1"),
+        prefix=os.getenv("S3_PREFIX", ""),
+        part_size=max(MIN_PART_SIZE, _env_int("S3_PART_MB", 8) * 1024 * 1024),
+        presign_seconds=_env_int("S3_PRESIGN_SECONDS", 900),
+    )
+
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = storage_from_env()
+                logger.info("asset storage: %s", _storage.name)
+    return _storage
+
+
+def use_storage(storage: Optional[Storage]) -> Optional[Storage]:
+    """Swap the process-wide backend (None re-reads the environment). Returns the previous one."""
+    global _storage
+    with _storage_lock:
+        previous, _storage = _storage, storage
+    return previous
+
+
+def reads_proxied() -> bool:
+    return os.getenv("STORAGE_READS", "redirect").lower() == "proxy"
@@ -0,0 +1,161 @@
+"""
+Benchmark suite for the API hot paths.
+
+Seeds a throwaway SQLite archive (items, one asset each with a realistic EXIF
+payload, FTS rows), then measures each hot path through the ASGI test client and
+reports latency percentiles and throughput:
+  - list_items     GET /api/items                 (whole listing; fewer runs)
+  - search         GET /api/items?q=...           (FTS5 match)
+  - get_item       GET /api/items/{id}            (random ids, mostly cold)
+  - get_item_hot   GET /api/items/{id}            (20 ids in rotation, served from cache)
+  - create_item    POST /api/items
+  - upload_asset   POST /api/items/{id}/assets    (small JPEG with EXIF)
+  - export_dc      GET /api/export/dc?ids=...     (100 items)
+  - suggest        GET /api/suggest?prefix=...    (typeahead, 1-4 typed characters)
+  - extract_exif   api.services.exif.extract_exif on a JPEG, no HTTP
+
+Results can be written as JSON and compared with a saved baseline; any case whose
+p50 is more than --threshold slower than the baseline is reported and the script
+exits with status 1, so it can gate CI.
+
+Usage (from the repo root):
+    python benchmarks/bench_api.py [--items 10000] [--runs 50] [--json out.json]
+    python benchmarks/bench_api.py --baseline benchmarks/baseline.json [--threshold 0.2]
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import io
+import itertools
+import random
+import sys
+import time
+
+import common  # sets up the scratch database; must come before api imports
+
+
+def sample_jpeg(index: int = 0) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (640, 480), ((index * 37) % 256, 120, 200))
+    exif = Image.Exif()
+    exif[0x010F] = "Canon"  # Make
+    exif[0x0110] = "EOS 5D Mark IV"  # Model
+    exif[0x013B] = "Staff Photographer"  # Artist
+    exif[0x0132] = "2021:06:01 10:11:12"  # DateTime
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def run_cases(runs: int, heavy_runs: int, selected: list) -> dict:
+    from fastapi.testclient import TestClient
+    from sqlmodel import select
+
+    from api.db import get_session
+    from api.main import create_app
+    from api.models import Item
+    from api.services.exif import extract_exif
+
+    client = TestClient(create_app())
+    with get_session() as session:
+        ids = [str(row) for row in session.exec(select(Item.id).limit(1000)).all()]
+    if not ids:
+        raise SystemExit("No items seeded")
+    rng = random.Random(42)
+    export_ids = ",".join(ids[:100])
+    counter = itertools.count()
+    hot_ids = itertools.cycle(ids[:20])
+    jpeg = sample_jpeg()
+    jpeg_path = common.Path(common.SCRATCH_DIR) / "sample.jpg"
+    jpeg_path.write_bytes(jpeg)
+    terms = ["lighthouse", "harbor", "festival", "ledger", "pier"]
+    prefixes = [term[:n] for term in terms for n in range(1, 5)]
+
+    def check(resp, expected: int = 200):
+        if resp.status_code != expected:
+            raise RuntimeError(f"{resp.request.method} {resp.request.url} -> {resp.status_code}: {resp.text[:200]}")
+        return resp
+
+    def create():
+        n = next(counter)
+        check(client.post("/api/items", json={"title": f"Benchmark item {n}", "subjects": ["bench"]}), 201)
+
+    def upload():
+        n = next(counter)
+        files = {"file": (f"bench-{n}.jpg", jpeg, "image/jpeg")}
+        check(client.post(f"/api/items/{rng.choice(ids)}/assets", files=files), 201)
+
+    cases = {
+        "list_items": (lambda: check(client.get("/api/items")), heavy_runs),
+        "item_summary": (lambda: check(client.get("/api/items/summary", params={"limit": 1000})), runs),
+        "search": (lambda: check(client.get("/api/items", params={"q": rng.choice(terms)})), runs),
+        "get_item": (lambda: check(client.get(f"/api/items/{rng.choice(ids)}")), runs),
+        "get_item_hot": (lambda: check(client.get(f"/api/items/{next(hot_ids)}")), runs),
+        "create_item": (create, runs),
+        "upload_asset": (upload, runs),
+        "suggest": (lambda: check(client.get("/api/suggest", params={"prefix": rng.choice(prefixes)})), runs),
+        "timeline": (lambda: check(client.get("/api/timeline")), runs),
+        "timeline_month": (
+            lambda: check(client.get("/api/timeline", params={"granularity": "month", "date_from": rng.randint(1850, 2000)})),
+            runs,
+        ),
+        "export_dc": (lambda: check(client.get("/api/export/dc", params={"ids": export_ids})), runs),
+        "extract_exif": (lambda: extract_exif(str(jpeg_path)), runs),
+    }
+    results = {}
+    for name, (fn, count) in cases.items():
+        if selected and name not in selected:
+            continue
+        results[name] = common.measure(fn, count)
+        row = results[name]
+        print(
+            f"  {name:<14} p50 {row['p50_ms']:>9.2f} ms  p90 {row['p90_ms']:>9.2f} ms  "
+            f"p99 {row['p99_ms']:>9.2f} ms  {row['ops_per_sec'] or 0:>9.1f} ops/s  ({count} runs)"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000, help="Synthetic archive size (10k to 1M)")
+    parser.add_argument("--exif-tags", type=int, default=40, help="Extra EXIF tags per asset")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per case")
+    parser.add_argument("--heavy-runs", type=int, default=5, help="Timed runs for the full listing")
+    parser.add_argument("--case", action="append", default=[], help="Only run this case (repeatable)")
+    parser.add_argument("--json", dest="json_out", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="Write results to this file as the new baseline")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.items:,} items into {common.SCRATCH_DIR} ...")
+    seconds = common.seed_archive(args.items, exif_tags=args.exif_tags)
+    print(f"  seeded in {seconds:.1f} s ({args.items / seconds:,.0f} items/s)\n")
+
+    started = time.perf_counter()
+    cases = run_cases(args.runs, args.heavy_runs, args.case)
+    report = {
+        "meta": {**common.environment(), "items": args.items, "runs": args.runs, "seed_seconds": round(seconds, 2)},
+        "cases": cases,
+    }
+    print(f"\nfinished in {time.perf_counter() - started:.1f} s")
+
+    for path in (args.json_out, args.save_baseline):
+        if path:
+            common.write_report(report, path)
+
+    baseline = common.load_baseline(args.baseline)
+    if args.baseline and baseline is None:
+        print(f"\nbaseline {args.baseline} not found; nothing to compare")
+    if baseline:
+        rows = common.compare(cases, baseline.get("cases", {}), args.threshold)
+        print(f"\nvs baseline {args.baseline} (p50, threshold +{args.threshold:.0%})")
+        for row in rows:
+            flag = "REGRESSION" if row["regressed"] else "ok"
+            print(f"  {row['case']:<14} {row['baseline']:>9.2f} -> {row['current']:>9.2f} ms  x{row['ratio']:<6} {flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
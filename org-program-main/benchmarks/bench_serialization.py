@@ -0,0 +1,141 @@
+"""
+Serialization and wire-size benchmark for a 1,000-item listing.
+
+Seeds a throwaway SQLite database with items that each carry an asset with a
+realistic EXIF payload, then compares:
+  - raw serialization of the ItemRead list (stdlib json, Pydantic dump_json, orjson)
+  - GET /api/items end to end for each response-class / compression setting
+
+Usage (from the repo root):
+    python benchmarks/bench_serialization.py [--items 1000] [--runs 10] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from common import synthetic_exif  # sets up the scratch database; must come before api imports
+
+
+def seed(count: int) -> None:
+    from api.db import get_session, migrate
+    from api.models import Asset, Item
+    from api.services.asset_metadata import save_metadata
+
+    migrate()
+    with get_session() as session:
+        for i in range(count):
+            item = Item(
+                title=f"Photograph {i}",
+                description="Lakeshore survey photograph, digitised from the original negative.",
+                date="2021-06-01",
+                type="photo",
+                format="image/jpeg",
+                creators=["Staff Photographer"],
+                subjects=["places", "architecture"],
+                identifiers=[f"INV-{i:06d}"],
+            )
+            session.add(item)
+            asset = Asset(
+                item_id=item.id,
+                file_path=f"uploads/{item.id}/photo-{i}.jpg",
+                mime_type="image/jpeg",
+                bytes=2_500_000,
+                checksum="%064x" % i,
+            )
+            session.add(asset)
+            save_metadata(session, asset.id, exif=synthetic_exif(i), ocr={"text": ""})
+        session.commit()
+
+
+def timed(fn, runs: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000.0
+
+
+def bench_serializers(runs: int) -> list:
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlmodel import select
+
+    from api.db import get_session
+    from api.models import Item
+    from api.responses import orjson
+    from api.schemas import ItemRead
+
+    with get_session() as session:
+        items = [ItemRead.model_validate(it) for it in session.exec(select(Item)).all()]
+    adapter = TypeAdapter(list[ItemRead])
+
+    results = [
+        ("jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(items)).encode("utf-8")),
+        ("pydantic dump_json", lambda: adapter.dump_json(items)),
+    ]
+    if orjson is not None:
+        results.append(("model_dump + orjson", lambda: orjson.dumps(adapter.dump_python(items, mode="json"))))
+    return [{"case": name, "ms": round(timed(fn, runs), 2), "bytes": len(fn())} for name, fn in results]
+
+
+def bench_endpoint(runs: int) -> list:
+    from fastapi.testclient import TestClient
+
+    from api.main import create_app
+
+    variants = [
+        ("default json, identity", {"JSON_RESPONSE": "default", "COMPRESSION": "off"}, "identity"),
+        ("orjson, identity", {"JSON_RESPONSE": "orjson", "COMPRESSION": "off"}, "identity"),
+        ("auto json, gzip", {"JSON_RESPONSE": "auto", "COMPRESSION": "on"}, "gzip"),
+        ("auto json, br", {"JSON_RESPONSE": "auto", "COMPRESSION": "on"}, "br"),
+    ]
+    results = []
+    for name, env, accept in variants:
+        os.environ.update(env)
+        client = TestClient(create_app())
+        headers = {"Accept-Encoding": accept}
+        resp = client.get("/api/items", headers=headers)
+        wire = int(resp.headers.get("content-length") or len(resp.content))
+        ms = timed(lambda: client.get("/api/items", headers=headers), runs)
+        results.append(
+            {
+                "case": name,
+                "ms": round(ms, 2),
+                "wire_bytes": wire,
+                "content_encoding": resp.headers.get("content-encoding", "identity"),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", dest="json_out", help="Write results to this file")
+    args = parser.parse_args()
+
+    seed(args.items)
+    report = {
+        "items": args.items,
+        "serializers": bench_serializers(args.runs),
+        "endpoint": bench_endpoint(args.runs),
+    }
+
+    for section in ("serializers", "endpoint"):
+        print(f"\n{section} ({args.items} items, median of {args.runs})")
+        for row in report[section]:
+            size = row.get("wire_bytes", row.get("bytes"))
+            print(f"  {row['case']:<32} {row['ms']:>9.2f} ms  {size:>12,} bytes")
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup-time benchmark: what a new worker process or short-lived tool pays
+before it can do useful work.
+
+Each case runs in a fresh interpreter (so module caches are cold) and times one
+step from inside the child:
+  - import_main      import api.main (no app is built)
+  - create_app       build the FastAPI app (routers imported, no DB work)
+  - worker_boot      create_app + lifespan startup against an already-migrated DB
+  - first_request    worker_boot + GET /api/items
+  - migrate_fresh    python -m api.cli migrate equivalent on an empty DB
+  - cli_help         import api.cli and build its parser
+
+Usage (from the repo root):
+    python benchmarks/bench_startup.py [--runs 10] [--json out.json]
+    python benchmarks/bench_startup.py --baseline startup.json [--threshold 0.2]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import common
+
+# Child programs print the measured milliseconds as their last line
+PRELUDE = "import time, sys\nsys.path.insert(0, {root!r})\n"
+CASES = {
+    "import_main": "t = time.perf_counter()\nimport api.main\n",
+    "create_app": "from api.main import create_app\nt = time.perf_counter()\ncreate_app()\n",
+    "worker_boot": (
+        "from fastapi.testclient import TestClient\nfrom api.main import create_app\n"
+        "t = time.perf_counter()\nclient = TestClient(create_app())\nclient.__enter__()\n"
+    ),
+    "first_request": (
+        "from fastapi.testclient import TestClient\nfrom api.main import create_app\n"
+        "t = time.perf_counter()\nclient = TestClient(create_app())\nclient.__enter__()\n"
+        "assert client.get('/api/items').status_code == 200\n"
+    ),
+    "migrate_fresh": "from api.db import migrate\nt = time.perf_counter()\nmigrate()\n",
+    "cli_help": "t = time.perf_counter()\nimport api.cli\n",
+}
+EPILOGUE = "print((time.perf_counter() - t) * 1000.0)\n"
+
+
+def run_case(name: str, runs: int, migrated_db: str) -> dict:
+    samples = []
+    for _ in range(runs):
+        scratch = tempfile.mkdtemp(prefix="org-startup-")
+        env = dict(os.environ)
+        # Every case but migrate_fresh boots against a database that is already current
+        db = os.path.join(scratch, "fresh.db") if name == "migrate_fresh" else migrated_db
+        env.update({"DATABASE_URL": f"sqlite:///{db}", "UPLOAD_DIR": os.path.join(scratch, "uploads")})
+        program = PRELUDE.format(root=str(common.ROOT)) + CASES[name] + EPILOGUE
+        out = subprocess.run([sys.executable, "-c", program], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return common.summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--case", action="append", default=[], help="Only run this case (repeatable)")
+    parser.add_argument("--json", dest="json_out", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    from api.db import migrate
+
+    migrate()  # the scratch DB set up by common; shared by the non-migrate cases
+    migrated_db = os.environ["DATABASE_URL"].split("sqlite:///", 1)[1]
+
+    cases = {}
+    for name in CASES:
+        if args.case and name not in args.case:
+            continue
+        cases[name] = run_case(name, args.runs, migrated_db)
+        row = cases[name]
+        print(f"  {name:<14} p50 {row['p50_ms']:>9.2f} ms  p90 {row['p90_ms']:>9.2f} ms  ({row['runs']} runs)")
+
+    report = {"meta": {**common.environment(), "runs": args.runs}, "cases": cases}
+    if args.json_out:
+        common.write_report(report, args.json_out)
+    baseline = common.load_baseline(args.baseline)
+    if baseline:
+        rows = common.compare(cases, baseline.get("cases", {}), args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regressed"] else "ok"
+            print(f"  {row['case']:<14} {row['baseline']:>9.2f} -> {row['current']:>9.2f} ms  x{row['ratio']:<6} {flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
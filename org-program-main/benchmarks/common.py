@@ -0,0 +1,201 @@
+"""
+Shared helpers for the benchmark scripts: a scratch database, a synthetic archive
+seeder, latency percentiles and baseline comparison.
+
+Import this module before anything from `api`, since api.db reads DATABASE_URL
+when it is first imported.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# Point the app at a scratch database unless the caller chose one
+SCRATCH_DIR = tempfile.mkdtemp(prefix="org-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{SCRATCH_DIR}/bench.db")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(SCRATCH_DIR, "uploads"))
+os.makedirs(os.environ["UPLOAD_DIR"], exist_ok=True)
+
+WORDS = (
+    "harbor lighthouse survey portrait street parade church bridge tower market school mill "
+    "railway station farm orchard river lake shore winter summer festival letter ledger map "
+    "postcard negative album council mayor fire flood storm ship pier factory workers family"
+).split()
+
+
+# Item.date as found in real catalogues: EXIF days, months, years, decades, circa, unknown
+DATE_FORMS = ("{year}-{month:02d}-{day:02d}", "{year}-{month:02d}", "{year}", "c. {year}", "{decade}s", "undated")
+
+
+def synthetic_exif(i: int, tags: int = 40) -> dict:
+    # Roughly the shape extract_exif() produces for a camera JPEG
+    raw = {
+        "Make": "Canon",
+        "Model": "EOS 5D Mark IV",
+        "Software": "Adobe Photoshop Lightroom Classic 12.0",
+        "DateTime": "2021:06:%02d 10:11:12" % (i % 28 + 1),
+        "Artist": "Staff Photographer",
+        "Copyright": "Example Historical Society",
+        "ExifOffset": 234,
+        "XResolution": 300.0,
+        "YResolution": 300.0,
+        "ResolutionUnit": 2,
+        "Orientation": 1,
+        "GPSInfo": {"1": "N", "2": [43.0, 14.0, 9.5], "3": "W", "4": [86.0, 15.0, 2.25]},
+        "MakerNote": "x" * 512,
+    }
+    for k in range(tags):
+        raw[f"Tag{k}"] = [k * 0.5, k * 1.5, k * 2.5]
+    return {"date": "2021-06-%02d" % (i % 28 + 1), "gps": {"lat": 43.2359, "lon": -86.2506}, "raw": raw}
+
+
+def seed_archive(items: int, assets_per_item: int = 1, exif_tags: int = 40, batch: int = 5000) -> float:
+    """
+    Bulk-insert a synthetic archive (items, assets with EXIF, FTS rows) in batches
+    of executemany INSERTs. Returns the seconds taken.
+    """
+    from sqlalchemy import insert
+
+    from api.db import get_session, insert_fts_rows, migrate
+    from api.models import Asset, AssetMetadata, Item, utcnow
+    from api.services.asset_metadata import metadata_row
+    from api.services.dates import date_columns
+    from api.services.item_summary import refresh_summaries
+
+    migrate()
+    started = time.perf_counter()
+    with get_session() as session:
+        for start in range(0, items, batch):
+            now = utcnow()
+            item_rows, asset_rows, metadata_rows, fts_rows = [], [], [], []
+            for i in range(start, min(start + batch, items)):
+                item_id = uuid.uuid4()
+                words = [WORDS[(i * 7 + k * 13) % len(WORDS)] for k in range(6)]
+                title = f"{words[0].title()} {words[1]} {i}"
+                description = f"Digitised {words[2]} {words[3]} from the {words[4]} collection, box {i // 100}."
+                date = DATE_FORMS[i % len(DATE_FORMS)].format(
+                    year=1850 + i % 170, decade=(1850 + i % 170) // 10 * 10, month=i % 12 + 1, day=i % 28 + 1
+                )
+                item_rows.append(
+                    {
+                        "id": item_id,
+                        "title": title,
+                        "description": description,
+                        "date": date,
+                        **date_columns(date),
+                        "type": "photo",
+                        "format": "image/jpeg",
+                        "creators": ["Staff Photographer"],
+                        "contributors": [],
+                        "subjects": [words[4], words[5]],
+                        "identifiers": [f"INV-{i:07d}"],
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+                for a in range(assets_per_item):
+                    asset_id = uuid.uuid4()
+                    asset_rows.append(
+                        {
+                            "id": asset_id,
+                            "item_id": item_id,
+                            "file_path": f"uploads/{item_id}/photo-{i}-{a}.jpg",
+                            "mime_type": "image/jpeg",
+                            "bytes": 2_500_000,
+                            "checksum": "%064x" % (i * assets_per_item + a),
+                            "is_primary": a == 0,
+                        }
+                    )
+                    metadata_rows.append(metadata_row(asset_id, "exif", synthetic_exif(i, exif_tags)))
+                    metadata_rows.append(metadata_row(asset_id, "ocr", {"text": ""}))
+                fts_rows.append({"item_id": str(item_id), "title": title, "description": description})
+            session.execute(insert(Item), item_rows)
+            if asset_rows:
+                session.execute(insert(Asset), asset_rows)
+                session.execute(insert(AssetMetadata), metadata_rows)
+            insert_fts_rows(session, fts_rows)
+            refresh_summaries(session, [row["id"] for row in item_rows])
+            session.commit()
+    return time.perf_counter() - started
+
+
+def measure(fn: Callable[[], object], runs: int, warmup: int = 1) -> dict:
+    """Run `fn` repeatedly and summarise its latency distribution."""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> dict:
+    """Percentiles and throughput for a list of latencies in milliseconds."""
+    samples = sorted(samples)
+
+    def pct(p: float) -> float:
+        # Nearest-rank percentile; exact for the small sample counts used here
+        return samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))]
+
+    total = sum(samples)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p90_ms": round(pct(90), 3),
+        "p99_ms": round(pct(99), 3),
+        "mean_ms": round(total / len(samples), 3),
+        "ops_per_sec": round(len(samples) / (total / 1000.0), 1) if total else None,
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write_report(report: dict, path: str) -> None:
+    Path(path).write_text(json.dumps(report, indent=2) + "\n")
+
+
+def compare(cases: Dict[str, dict], baseline: Dict[str, dict], threshold: float, metric: str = "p50_ms") -> List[dict]:
+    """
+    Compare each case's `metric` with the baseline. A case regresses when it is
+    slower than baseline * (1 + threshold).
+    """
+    rows = []
+    for name, result in cases.items():
+        base = baseline.get(name)
+        if not base or not base.get(metric) or result.get(metric) is None:
+            continue
+        ratio = result[metric] / base[metric]
+        rows.append(
+            {
+                "case": name,
+                "baseline": base[metric],
+                "current": result[metric],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def load_baseline(path: Optional[str]) -> Optional[dict]:
+    if not path or not Path(path).exists():
+        return None
+    return json.loads(Path(path).read_text())
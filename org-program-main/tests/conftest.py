@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+# Unless the caller points elsewhere, tests run against a throwaway database and
+# upload directory instead of the working copy's org.db and uploads/
+_scratch = tempfile.mkdtemp(prefix="org-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_scratch, "uploads"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    # Test modules use TestClient(app) without entering it, so the app's lifespan
+    # (which would check the schema) never runs; migrate once for the session
+    from api.db import get_upload_dir, migrate
+
+    migrate()
+    os.makedirs(get_upload_dir(), exist_ok=True)
+    yield
@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api.admission import READS, UPLOADS, AdmissionMiddleware, ConcurrencyLimiter, RouteClass, TokenBuckets, classify
+from api.main import create_app
+
+
+def test_route_classes():
+    assert classify("POST", f"/api/items/{uuid.uuid4()}/assets") == UPLOADS
+    assert classify("POST", f"/api/items/{uuid.uuid4()}/assets/batch") == UPLOADS
+    assert classify("POST", "/api/import/archive") == UPLOADS
+    assert classify("GET", "/api/export/jsonl") == "exports"
+    assert classify("GET", "/api/items") == READS
+    assert classify("PUT", "/api/items/x") is None
+    assert classify("GET", "/api/events/ingest") is None
+    assert classify("GET", "/health") is None
+
+
+def test_limiter_queues_in_order_and_sheds_when_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1)
+        assert await limiter.acquire(1.0)
+        queued = asyncio.ensure_future(limiter.acquire(1.0))
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        assert not await limiter.acquire(1.0)  # queue full
+        limiter.release()  # handed to the queued request
+        assert await queued and limiter.active == 1
+        assert not await limiter.acquire(0.01)  # waited too long
+        limiter.release()
+        assert limiter.active == 0 and limiter.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_refills_at_rate():
+    buckets = TokenBuckets(rate=2.0, burst=2)
+    assert buckets.take("a", now=0.0) == 0 and buckets.take("a", now=0.0) == 0
+    assert buckets.take("a", now=0.0) == 0.5
+    assert buckets.take("b", now=0.0) == 0  # other clients have their own bucket
+    assert buckets.take("a", now=0.5) == 0
+
+
+def test_busy_class_answers_503_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        classes = {READS: RouteClass(READS, concurrency=1, queue=0, rate=0, burst=0)}
+        middleware = AdmissionMiddleware(slow_app, classes=classes, max_wait=1.0)
+        scope = {"type": "http", "method": "GET", "path": "/api/items", "headers": [], "client": ("10.0.0.1", 1)}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        first = asyncio.ensure_future(middleware(scope, None, send))
+        await asyncio.sleep(0)
+        await middleware(scope, None, send)
+        assert sent[0]["status"] == 503
+        assert (b"retry-after", b"1") in sent[0]["headers"]
+        release.set()
+        await first
+        assert sent[-1]["body"] == b"ok" and classes[READS].limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_upload_rate_limit_per_client(monkeypatch):
+    monkeypatch.setenv("ADMISSION_UPLOADS_RATE", "0.1")
+    monkeypatch.setenv("ADMISSION_UPLOADS_BURST", "1")
+    client = TestClient(create_app())
+    url = f"/api/items/{uuid.uuid4()}/assets"
+    files = {"file": ("a.txt", b"hello", "text/plain")}
+    assert client.post(url, files=files).status_code == 404  # admitted, item missing
+    resp = client.post(url, files=files)
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 9
+    # Reads are a different class and unaffected
+    assert client.get("/api/items").status_code == 200
@@ -0,0 +1,69 @@
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+from api.db import _move_inline_metadata
+from api.main import app
+from api.models import AssetMetadata
+from api.services.asset_metadata import decode, encode, load_metadata
+
+
+client = TestClient(app)
+
+
+def test_encode_compresses_and_falls_back_to_json():
+    value = {"raw": {f"Tag{k}": [k, k * 2] for k in range(50)}}
+    codec, data, size = encode(value, "zlib")
+    assert codec == "zlib" and len(data) < size
+    assert decode(codec, data) == value
+
+    # Too small to shrink: stored as plain JSON
+    codec, data, _ = encode({"text": ""}, "zlib")
+    assert codec == "json" and decode(codec, data) == {"text": ""}
+
+
+def test_metadata_is_deferred_from_listings():
+    item_id = client.post("/api/items", json={"title": "Deferred metadata"}).json()["id"]
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 40, 40)).save(buffer, "JPEG")
+    resp = client.post(f"/api/items/{item_id}/assets", files={"file": ("red.jpg", buffer.getvalue(), "image/jpeg")})
+    assert resp.status_code == 201, resp.text
+    assert resp.json()["ocr_json"] is not None
+
+    def listed(**params):
+        items = client.get("/api/items", params=params).json()
+        return next(it for it in items if it["id"] == item_id)["assets"][0]
+
+    asset = listed()
+    assert asset["exif_json"] is None and asset["ocr_json"] is None
+    asset = listed(include="exif")
+    assert asset["exif_json"] is not None and asset["ocr_json"] is None
+    asset = listed(include="exif,ocr")
+    assert asset["exif_json"] is not None and asset["ocr_json"] is not None
+
+    # The single-item view always carries both
+    detail = client.get(f"/api/items/{item_id}").json()["assets"][0]
+    assert detail["exif_json"] is not None and detail["ocr_json"] is not None
+
+
+def test_inline_columns_move_to_side_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine, tables=[AssetMetadata.__table__])
+    asset_id = uuid.uuid4()
+    exif = {"date": "1931-07-04", "raw": {"Artist": "Cole Ward"}}
+    with engine.begin() as conn:
+        # The pre-side-table asset layout, trimmed to the relevant columns
+        conn.exec_driver_sql("CREATE TABLE asset (id CHAR(32) PRIMARY KEY, exif_json JSON, ocr_json JSON)")
+        conn.exec_driver_sql("INSERT INTO asset VALUES (?, ?, NULL)", (asset_id.hex, json.dumps(exif)))
+        _move_inline_metadata(conn)
+
+    with engine.connect() as conn:
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(asset)")}
+    assert columns == {"id"}
+    with Session(engine) as session:
+        assert load_metadata(session, [asset_id]) == {asset_id: {"exif": exif}}
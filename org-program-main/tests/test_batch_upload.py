@@ -0,0 +1,92 @@
+import io
+import os
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api.db import get_session
+from api.main import app
+from api.services import batch_upload
+from api.services.changes import latest_seq
+from api.storage import StorageError
+
+
+client = TestClient(app)
+
+
+def _jpeg(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_batch_upload_attaches_files_in_order_with_one_change():
+    item_id = client.post("/api/items", json={"title": ""}).json()["id"]
+    with get_session() as session:
+        before = latest_seq(session)
+    files = [("files", (f"page-{n:03d}.jpg", _jpeg((n * 20, 10, 10)), "image/jpeg")) for n in range(1, 6)]
+    files.append(("files", ("notes.txt", b"transcription", "text/plain")))
+
+    resp = client.post(f"/api/items/{item_id}/assets/batch", files=files)
+    assert resp.status_code == 201, resp.text
+    assets = resp.json()
+    assert [os.path.basename(a["file_path"]) for a in assets] == [f"page-{n:03d}.jpg" for n in range(1, 6)] + ["notes.txt"]
+    assert all(a["phash"] is not None for a in assets[:5]) and assets[5]["phash"] is None
+    assert assets[5]["mime_type"] == "text/plain" and assets[5]["bytes"] == 13
+
+    item = client.get(f"/api/items/{item_id}").json()
+    assert len(item["assets"]) == 6
+    assert item["title"]  # enriched from the first file
+    with get_session() as session:
+        assert latest_seq(session) == before + 1  # one item write, not one per file
+
+
+def test_failed_batch_removes_only_its_own_files():
+    item_id = client.post("/api/items", json={"title": "Batch failures"}).json()["id"]
+    missing = "00000000-0000-0000-0000-000000000000"
+    scan = [("files", ("scan.jpg", _jpeg((1, 2, 3)), "image/jpeg"))]
+    assert client.post(f"/api/items/{missing}/assets/batch", files=scan).status_code == 404
+    existing = client.post(f"/api/items/{item_id}/assets", files={"file": ("good.jpg", _jpeg((5, 5, 5)), "image/jpeg")}).json()
+    with open(existing["file_path"], "rb") as f:
+        existing_bytes = f.read()
+
+    process = batch_upload._process
+
+    def flaky(storage, item, entry, mime_type):
+        if entry.key == "bad.jpg":
+            raise StorageError("bucket unavailable")
+        return process(storage, item, entry, mime_type)
+
+    # Same name as the existing asset: stored under its own key, then removed
+    files = [("files", (name, _jpeg((9, 9, 9)), "image/jpeg")) for name in ("good.jpg", "bad.jpg")]
+    with mock.patch.object(batch_upload, "_process", flaky):
+        assert client.post(f"/api/items/{item_id}/assets/batch", files=files).status_code == 502
+    assert [a["id"] for a in client.get(f"/api/items/{item_id}").json()["assets"]] == [existing["id"]]
+    with open(existing["file_path"], "rb") as f:
+        assert f.read() == existing_bytes
+    assert os.listdir(os.path.join(os.environ["UPLOAD_DIR"], item_id)) == [existing["id"]]
+
+    # Repeated names within a batch get separate files too
+    assets = client.post(f"/api/items/{item_id}/assets/batch", files=scan * 2).json()
+    assert len({a["file_path"] for a in assets} | {existing["file_path"]}) == 3
+
+
+def test_staged_manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv("IMPORT_ROOT", str(tmp_path))
+    item_id = client.post("/api/items", json={"title": "Staged book"}).json()["id"]
+    for n in range(3):
+        (tmp_path / f"leaf-{n}.jpg").write_bytes(_jpeg((10, n * 50, 10)))
+    paths = [str(tmp_path / f"leaf-{n}.jpg") for n in range(3)]
+
+    resp = client.post(f"/api/items/{item_id}/assets/staged", json={"paths": paths})
+    assert resp.status_code == 201, resp.text
+    assert [a["mime_type"] for a in resp.json()] == ["image/jpeg"] * 3
+    assert all(os.path.exists(p) for p in paths)  # copied, not moved
+
+    assert client.post(f"/api/items/{item_id}/assets/staged", json={"paths": [str(tmp_path)]}).status_code == 400
+    assert client.post(f"/api/items/{item_id}/assets/staged", json={"paths": ["/etc/passwd"]}).status_code == 400
+    assert client.post(f"/api/items/{item_id}/assets/staged", json={"paths": ["../../etc/passwd"]}).status_code == 400
+    monkeypatch.delenv("IMPORT_ROOT")
+    assert client.post(f"/api/items/{item_id}/assets/staged", json={"paths": ["/etc/passwd"]}).status_code == 403
+    assert client.post(f"/api/items/{item_id}/assets/staged", json={"paths": []}).status_code == 422
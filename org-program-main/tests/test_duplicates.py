@@ -0,0 +1,93 @@
+import io
+import random
+
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+from api.db import engine, get_session
+from api.main import app
+from api.services.phash import HashEntry, PhashIndex, backfill_phash, get_index, hamming, to_signed
+
+
+client = TestClient(app)
+
+
+def _picture(seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    image = Image.new("RGB", (320, 240), "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(300), rng.randrange(220)
+        draw.rectangle([x, y, x + rng.randrange(20, 120), y + rng.randrange(20, 120)], fill=tuple(rng.randrange(256) for _ in range(3)))
+    return image
+
+
+def _upload(image: Image.Image, name: str, fmt: str = "JPEG", **save) -> dict:
+    item = client.post("/api/items", json={"title": name}).json()
+    buf = io.BytesIO()
+    image.save(buf, fmt, **save)
+    mime = "image/png" if fmt == "PNG" else "image/jpeg"
+    resp = client.post(f"/api/items/{item['id']}/assets", files={"file": (name, buf.getvalue(), mime)})
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+def test_rescans_cluster_together_and_distinct_images_do_not():
+    original = _picture(7)
+    scan = _upload(original, "scan.png", "PNG")
+    # Re-encoded, downsized copy: different bytes and checksum, same picture
+    rescan = _upload(original.resize((200, 150)), "rescan.jpg", quality=60)
+    other = _upload(_picture(99), "other.png", "PNG")
+
+    assert scan["checksum"] != rescan["checksum"]
+    assert None not in (scan["phash"], rescan["phash"], other["phash"])
+    assert hamming(scan["phash"], rescan["phash"]) <= 4
+
+    report = client.get("/api/duplicates/images").json()
+    cluster = next(c for c in report["clusters"] if scan["id"] in [a["asset_id"] for a in c["assets"]])
+    members = {a["asset_id"] for a in cluster["assets"]}
+    assert rescan["id"] in members
+    assert other["id"] not in members
+
+    near = client.get(f"/api/duplicates/images/{scan['id']}").json()
+    assert rescan["id"] in [n["asset_id"] for n in near]
+    assert scan["id"] not in [n["asset_id"] for n in near]
+
+
+def test_phash_index_finds_everything_within_radius():
+    rng = random.Random(3)
+    base = rng.getrandbits(64)
+    near = base ^ (1 << 0) ^ (1 << 17) ^ (1 << 40) ^ (1 << 63)  # 4 bits off, one per band region
+    entries = [HashEntry(i, i, to_signed(v)) for i, v in enumerate([base, near, base ^ 0x1F, rng.getrandbits(64)])]
+    index = PhashIndex(entries, max_distance=4)
+
+    found = {entry.asset_id: distance for entry, distance in index.query(to_signed(base))}
+    assert found == {0: 0, 1: 4}
+    assert [sorted(e.asset_id for e in group) for group in index.clusters()] == [[0, 1]]
+
+
+def test_backfill_gives_items_a_new_version():
+    asset = _upload(_picture(99), "backfill.jpg")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE asset SET phash = NULL WHERE id = ?", (asset["id"].replace("-", ""),))
+    before = client.get(f"/api/items/{asset['item_id']}")
+    assert before.json()["assets"][0]["phash"] is None
+
+    assert backfill_phash(workers=0)["hashed"] >= 1
+    after = client.get(f"/api/items/{asset['item_id']}", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200  # not 304: other workers' caches see the change too
+    assert after.json()["assets"][0]["phash"] == asset["phash"]
+
+
+def test_index_cache_sees_hash_changes_beyond_float_precision():
+    asset = _upload(_picture(123), "precise.jpg")
+    asset_key = asset["id"].replace("-", "")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE asset SET phash = ? WHERE id = ?", (2**62, asset_key))
+    with get_session() as session:
+        assert 2**62 in {entry.phash for entry in get_index(session).entries}
+        # Same count, same float sum: only an exact signature notices
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE asset SET phash = ? WHERE id = ?", (2**62 + 1, asset_key))
+        hashes = {entry.phash for entry in get_index(session).entries}
+    assert 2**62 + 1 in hashes and 2**62 not in hashes
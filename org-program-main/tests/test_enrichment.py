@@ -0,0 +1,112 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api.db import get_session
+from api.main import app
+from api.models import Asset, Item
+from api.services.asset_metadata import save_metadata
+from api.services.enrichment import DEFAULT_RULES, enrich_from_assets, enrich_item, reload_engine, rule_stats
+
+
+client = TestClient(app)
+
+
+EXIF = {
+    "date": "2020-05-01",
+    "gps": {"lat": 42.5, "lon": -83.1},
+    "raw": {
+        "ImageDescription": "Reading room",
+        "Artist": "Ann Lee|Bo Chen",
+        # XP* tags arrive as UTF-8-decoded UTF-16-LE, i.e. with NULs between characters
+        "XPKeywords": "m\x00a\x00p\x00s\x00;\x00h\x00a\x00r\x00b\x00o\x00r\x00",
+        "Make": "Epson",
+        "Model": "V850",
+        "Software": "Epson Scanner 4.0",
+    },
+}
+
+
+def test_enrich_item_maps_exif_and_infers_subjects():
+    item = Item(title="", subjects=["existing"])
+    changed = enrich_item(item, "old_library_front.jpg", "image/jpeg", "abc123", EXIF, {"text": "City Museum"})
+
+    assert changed
+    assert item.title == "old_library_front"
+    assert (item.format, item.type, item.date) == ("image/jpeg", "photo", "2020-05-01")
+    assert item.coverage == "42.5,-83.1"
+    assert item.description == "Reading room"
+    assert item.source == "Epson V850"
+    assert item.creators == ["Ann Lee", "Bo Chen"]
+    assert item.identifiers == ["abc123"]
+    assert item.subjects == sorted(
+        ["existing", "maps", "harbor", "architecture", "places", "scanned", "artist:Ann Lee|Bo Chen"]
+    )
+
+    # Re-applying is idempotent and never overwrites filled fields
+    assert not enrich_item(item, "old_library_front.jpg", "image/jpeg", "abc123", EXIF, {"text": "City Museum"})
+
+
+def test_custom_rules_and_batch_reapply_from_assets():
+    rules = {**DEFAULT_RULES, "subjects": [{"name": "maps", "source": "ocr", "keywords": ["chart"], "subjects": ["maps"]}]}
+    try:
+        reload_engine(rules)
+        item = Item(title="Harbor", subjects=[])
+        asset = Asset(file_path="uploads/x/scan.tif", mime_type="image/tiff", checksum="ff00")
+        assert enrich_from_assets(item, [asset], {asset.id: {"ocr": {"text": "Sea CHART of 1850"}}})
+        assert item.subjects == ["maps"]
+        assert item.identifiers == ["ff00"]
+
+        stats = {row["rule"]: row for row in rule_stats()}
+        assert stats["subjects:ocr"] == {**stats["subjects:ocr"], "calls": 1, "hits": 1}
+        assert "subjects:filename" not in stats
+    finally:
+        reload_engine(DEFAULT_RULES)
+
+
+def test_reenrichment_job_updates_items_from_stored_assets():
+    item = client.post("/api/items", json={"title": "Harbor survey"}).json()
+    token = uuid.uuid4().hex
+    with get_session() as session:
+        # An asset stored before the current rules existed: EXIF/OCR kept, item never enriched
+        asset = Asset(
+            item_id=uuid.UUID(item["id"]),
+            file_path=f"uploads/{item['id']}/pier_bridge.jpg",
+            mime_type="image/jpeg",
+            checksum=token,
+        )
+        session.add(asset)
+        save_metadata(
+            session,
+            asset.id,
+            exif={"date": "1931-07-04", "gps": None, "raw": {"Artist": "Cole Ward"}},
+            ocr={"text": f"harbour office {token}"},
+        )
+        session.commit()
+    since = client.get("/api/changes", params={"since": 0, "limit": 1000}).json()["next"]
+
+    resp = client.post("/api/enrichment/jobs", json={"batch_size": 2})
+    assert resp.status_code == 202, resp.text
+    job = client.get(f"/api/enrichment/jobs/{resp.json()['id']}").json()
+    assert job["status"] == "completed"
+    assert job["items_changed"] >= 1
+    assert job["report"]["items_seen"] == job["items_seen"] > 0
+
+    updated = client.get(f"/api/items/{item['id']}").json()
+    assert updated["creators"] == ["Cole Ward"]
+    assert updated["date"] == "1931-07-04"
+    assert {"architecture", "artist:Cole Ward"} <= set(updated["subjects"])
+    assert token in updated["identifiers"]
+
+    # OCR text from the stored asset is now searchable, and the item is in the change feed
+    found = client.get("/api/items", params={"q": token}).json()
+    assert [it["id"] for it in found] == [item["id"]]
+    changed = client.get("/api/changes", params={"since": since, "limit": 1000}).json()["changes"]
+    assert item["id"] in [c["item_id"] for c in changed]
+
+    rules = {row["rule"]: row for row in client.get("/api/enrichment/rules").json()}
+    assert rules["exif_creators"]["hits"] >= 1
+
+    # Running again finds nothing new to change
+    again = client.post("/api/enrichment/jobs", json={}).json()
+    assert client.get(f"/api/enrichment/jobs/{again['id']}").json()["items_changed"] == 0
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.services.events import BusFull, EventBus, bus
+
+
+client = TestClient(app)
+
+
+def test_bus_drops_oldest_when_client_is_slow():
+    async def scenario():
+        local_bus = EventBus(queue_size=2)
+        sub = local_bus.subscribe()
+        for i in range(5):
+            local_bus.publish("stored", "item-1", n=i)
+        first = await sub.get(timeout=1)
+        second = await sub.get(timeout=1)
+        sub.close()
+        return first, second, local_bus.subscriber_count
+
+    first, second, remaining = asyncio.run(scenario())
+    # Only the newest events survive and the gap is reported once
+    assert [first["n"], second["n"]] == [3, 4]
+    assert first["dropped"] == 3
+    assert "dropped" not in second
+    assert remaining == 0
+
+
+def test_bus_filters_by_item_and_caps_subscribers():
+    async def scenario():
+        local_bus = EventBus(max_subscribers=1)
+        sub = local_bus.subscribe(item_id="wanted")
+        with pytest.raises(BusFull):
+            local_bus.subscribe()
+        local_bus.publish("stored", "other")
+        local_bus.publish("stored", "wanted")
+        event = await sub.get(timeout=1)
+        assert sub.queue.empty()
+        sub.close()
+        return event
+
+    event = asyncio.run(scenario())
+    assert event["item_id"] == "wanted"
+
+
+def test_upload_publishes_ingestion_stages(tmp_path):
+    item_id = client.post("/api/items", json={"title": "Watched"}).json()["id"]
+    fpath = tmp_path / "watched.txt"
+    fpath.write_text("hello")
+
+    def upload():
+        with open(fpath, "rb") as f:
+            return client.post(f"/api/items/{item_id}/assets", files={"file": ("watched.txt", f, "text/plain")})
+
+    async def scenario():
+        sub = bus.subscribe(item_id=item_id)
+        try:
+            # The app publishes from the test client's thread onto this loop
+            resp = await asyncio.to_thread(upload)
+            stages = []
+            while len(stages) < 4:
+                stages.append(await sub.get(timeout=5))
+            return resp, stages
+        finally:
+            sub.close()
+
+    resp, events = asyncio.run(scenario())
+    assert resp.status_code == 201
+    assert [e["stage"] for e in events] == ["stored", "exif", "ocr", "indexed"]
+    assert {e["asset_id"] for e in events} == {resp.json()["id"]}
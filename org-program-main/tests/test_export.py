@@ -1,4 +1,9 @@
+import csv
+import io
+import json
+
 from fastapi.testclient import TestClient
+from lxml import etree
 
 from api.main import app
 
@@ -27,3 +32,96 @@ def test_export_dc_xml():
     assert "<dc:title>Doc</dc:title>" in body
     assert "http://purl.org/dc/elements/1.1/" in body
 
+
+OAI = {"oai": "http://www.openarchives.org/OAI/2.0/", "dc": "http://purl.org/dc/elements/1.1/"}
+
+
+def test_export_jsonl_and_csv_stream_every_item():
+    created = client.post("/api/items", json={"title": "Streamed", "creators": ["A", "B"]}).json()
+
+    jsonl = client.get("/api/export/jsonl")
+    assert jsonl.status_code == 200
+    assert jsonl.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in jsonl.text.splitlines()]
+    assert created["id"] in {r["id"] for r in rows}
+
+    csv_resp = client.get("/api/export/csv")
+    assert csv_resp.status_code == 200
+    records = list(csv.DictReader(io.StringIO(csv_resp.text)))
+    assert len(records) == len(rows)
+    streamed = next(r for r in records if r["id"] == created["id"])
+    assert streamed["title"] == "Streamed"
+    assert streamed["creators"] == "A;B"
+
+
+def test_oai_list_records_pages_with_resumption_tokens(monkeypatch):
+    monkeypatch.setenv("OAI_PAGE_SIZE", "2")
+    for i in range(3):
+        client.post("/api/items", json={"title": f"Harvest {i}"})
+
+    seen = []
+    params = {"verb": "ListRecords", "metadataPrefix": "oai_dc"}
+    while True:
+        root = etree.fromstring(client.get("/api/oai", params=params).content)
+        assert root.find("oai:error", OAI) is None
+        records = root.findall(".//oai:record", OAI)
+        assert len(records) <= 2
+        seen += [r.findtext("oai:header/oai:identifier", namespaces=OAI) for r in records]
+        token = root.find(".//oai:resumptionToken", OAI)
+        if token is None or not token.text:
+            break
+        params = {"verb": "ListRecords", "resumptionToken": token.text}
+
+    # Keyset paging visits every item exactly once
+    all_ids = {it["id"] for it in client.get("/api/items").json()}
+    assert len(seen) == len(set(seen)) == len(all_ids)
+    assert {s.rsplit(":", 1)[1] for s in seen} == all_ids
+
+
+def test_oai_get_record_and_errors():
+    created = client.post("/api/items", json={"title": "Single Record"}).json()
+    resp = client.get(
+        "/api/oai",
+        params={"verb": "GetRecord", "metadataPrefix": "oai_dc", "identifier": f"oai:org-program:{created['id']}"},
+    )
+    root = etree.fromstring(resp.content)
+    assert root.findtext(".//dc:title", namespaces=OAI) == "Single Record"
+    # Same request as a form body
+    posted = client.post(
+        "/api/oai",
+        data={"verb": "GetRecord", "metadataPrefix": "oai_dc", "identifier": f"oai:org-program:{created['id']}"},
+    )
+    assert etree.fromstring(posted.content).findtext(".//dc:title", namespaces=OAI) == "Single Record"
+
+    bad = etree.fromstring(client.get("/api/oai", params={"verb": "Nope"}).content)
+    assert bad.find("oai:error", OAI).get("code") == "badVerb"
+
+    bad_token = etree.fromstring(
+        client.get("/api/oai", params={"verb": "ListIdentifiers", "resumptionToken": "garbage"}).content
+    )
+    assert bad_token.find("oai:error", OAI).get("code") == "badResumptionToken"
+
+
+def test_export_dc_reuses_cached_fragments_until_item_changes():
+    from api.services.dc_xml import dc_record_cache
+
+    item = client.post("/api/items", json={"title": "Cached Record"}).json()
+    client.get("/api/export/dc", params={"ids": item["id"]})
+    hits = dc_record_cache.hits
+
+    again = client.get("/api/export/dc", params={"ids": item["id"]})
+    assert dc_record_cache.hits == hits + 1
+    assert "<dc:title>Cached Record</dc:title>" in again.text
+
+    client.put(f"/api/items/{item['id']}", json={"title": "Renamed Record"})
+    updated = client.get("/api/export/dc", params={"ids": item["id"]}).text
+    assert "<dc:title>Renamed Record</dc:title>" in updated
+    assert "Cached Record" not in updated
+
+
+def test_export_dc_without_ids_streams_whole_archive():
+    client.post("/api/items", json={"title": "Whole Archive"})
+    resp = client.get("/api/export/dc")
+    assert resp.status_code == 200
+    root = etree.fromstring(resp.content)
+    assert len(root.findall("record")) == len(client.get("/api/items").json())
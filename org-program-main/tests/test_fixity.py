@@ -0,0 +1,77 @@
+import io
+import os
+import time
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api.main import app
+from api.models import FixityState, utcnow
+from api.services.fixity import Throttle, _seconds_until_due, scrub
+
+
+client = TestClient(app)
+
+
+def _upload(item_id: str, name: str, color) -> dict:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, "JPEG")
+    resp = client.post(f"/api/items/{item_id}/assets", files={"file": (name, buffer.getvalue(), "image/jpeg")})
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+def test_throttle_caps_bytes_per_second():
+    throttle = Throttle(1_000_000)
+    started = time.monotonic()
+    for _ in range(3):
+        throttle.consume(100_000)
+    # The first read goes straight through; the next two wait for their share
+    assert time.monotonic() - started >= 0.15
+
+
+def test_schedule_spreads_a_cycle_over_the_period():
+    period = timedelta(days=10)
+    started = utcnow() - timedelta(days=1)
+    behind = FixityState(cycle_started_at=started, total_bytes=1000, cycle_bytes=50)
+    assert _seconds_until_due(behind, period, utcnow()) == 0
+    ahead = FixityState(cycle_started_at=started, total_bytes=1000, cycle_bytes=300)
+    # 300 bytes is the quota for day 3, two days from now
+    assert abs(_seconds_until_due(ahead, period, utcnow()) - 2 * 86400) < 60
+
+
+def test_scrub_finds_corrupt_and_missing_files():
+    item_id = client.post("/api/items", json={"title": "Fixity item"}).json()["id"]
+    good = _upload(item_id, "good.jpg", (10, 200, 10))
+    corrupt = _upload(item_id, "corrupt.jpg", (200, 10, 10))
+    lost = _upload(item_id, "lost.jpg", (10, 10, 200))
+
+    scrub(now_only=True, max_mbps=0)
+    report = client.get("/api/fixity").json()
+    assert report["by_status"]["ok"] >= 3
+    assert report["cycle"]["last_completed_at"] is not None
+
+    with open(corrupt["file_path"], "r+b") as f:
+        f.seek(-10, 2)
+        f.write(b"\x00" * 10)
+    with open(lost["file_path"], "rb") as f:
+        lost_bytes = f.read()
+    os.remove(lost["file_path"])
+
+    scrub(now_only=True, max_mbps=0)
+    report = client.get("/api/fixity").json()
+    failures = {f["asset_id"]: f for f in report["failures"]}
+    assert good["id"] not in failures
+    assert failures[corrupt["id"]]["status"] == "mismatch"
+    assert failures[corrupt["id"]]["actual_checksum"] not in (None, corrupt["checksum"])
+    assert failures[corrupt["id"]]["verified_at"] is not None  # the earlier match is kept
+    assert failures[lost["id"]]["status"] == "missing"
+    assert failures[lost["id"]]["item_id"] == item_id
+
+    # Restored from a replica: an on-demand check clears the failure
+    with open(lost["file_path"], "wb") as f:
+        f.write(lost_bytes)
+    checked = client.post(f"/api/fixity/assets/{lost['id']}/check").json()
+    assert checked["status"] == "ok" and checked["failures"] == 0
+    assert client.post(f"/api/fixity/assets/{item_id}/check").status_code == 404
@@ -0,0 +1,132 @@
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from api.db import get_session
+from api.main import app
+from api.models import ImportJob
+from api.services.archive_import import open_source, run_import
+
+
+client = TestClient(app)
+
+
+def _collection(tmp_path):
+    root = tmp_path / "collection"
+    (root / "box1").mkdir(parents=True)
+    (root / "box1" / "letter.txt").write_text("dear archivist")
+    (root / "box1" / "letter-copy.txt").write_text("dear archivist")  # byte-identical re-scan
+    (root / "notes.txt").write_text("field notes " + str(tmp_path))
+    (root / ".DS_Store").write_text("ignored")
+    sidecar = tmp_path / "fields.csv"
+    sidecar.write_text("path,title,creators,subjects\nnotes.txt,Field Notes,Ann Lee;Bo Chen,Survey\n")
+    return root, sidecar
+
+
+def test_directory_walk_is_sorted_and_resumable(tmp_path):
+    root, _ = _collection(tmp_path)
+    with open_source(str(root)) as entries:
+        keys = [e.key for e in entries]
+    assert keys == ["box1/letter-copy.txt", "box1/letter.txt", "notes.txt"]
+
+    with open_source(str(root), after="box1/letter-copy.txt") as entries:
+        assert [e.key for e in entries] == ["box1/letter.txt", "notes.txt"]
+
+
+def test_import_archive_endpoint_dedupes_and_applies_sidecar(tmp_path, monkeypatch):
+    root, sidecar = _collection(tmp_path)
+    monkeypatch.setenv("IMPORT_ROOT", str(tmp_path))
+
+    resp = client.post(
+        "/api/import/archive",
+        json={"path": str(root), "sidecar": "fields.csv", "batch_size": 2},
+    )
+    assert resp.status_code == 202, resp.text
+    job_id = resp.json()["id"]
+
+    # The background task has run by the time TestClient returns
+    job = client.get(f"/api/import/jobs/{job_id}").json()
+    assert job["status"] == "completed"
+    assert job["files_seen"] == 3
+    assert job["imported"] == 2
+    assert job["duplicates"] == 1
+    assert job["last_key"] == "notes.txt"
+    assert job["report"]["files_per_second"] is not None
+
+    found = client.get("/api/items", params={"q": "Field"}).json()
+    notes = next(it for it in found if it["title"] == "Field Notes")
+    assert notes["creators"] == ["Ann Lee", "Bo Chen"]
+    assert "Survey" in notes["subjects"]
+    assert len(notes["assets"]) == 1
+
+
+def test_server_paths_need_import_root(tmp_path, monkeypatch):
+    root, _ = _collection(tmp_path)
+    monkeypatch.delenv("IMPORT_ROOT", raising=False)
+    assert client.post("/api/import/archive", json={"path": str(root)}).status_code == 403
+
+    monkeypatch.setenv("IMPORT_ROOT", str(root))
+    for outside in ("/etc", str(tmp_path), "../fields.csv"):
+        resp = client.post("/api/import/archive", json={"path": outside})
+        assert resp.status_code == 400, outside
+    (root / "escape").symlink_to("/etc")
+    assert client.post("/api/import/archive", json={"path": "escape"}).status_code == 400
+    resp = client.post("/api/import/archive", json={"path": str(root), "sidecar": str(tmp_path / "fields.csv")})
+    assert resp.status_code == 400
+
+
+def test_zip_import_resumes_after_checkpoint(tmp_path):
+    archive = tmp_path / "scans.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a/first.txt", "first " + str(tmp_path))
+        zf.writestr("a/second.txt", "second " + str(tmp_path))
+        zf.writestr("b/third.txt", "third " + str(tmp_path))
+
+    with get_session() as session:
+        # Simulate a run interrupted after the first committed batch
+        job = ImportJob(source=str(archive), status="running", last_key="a/first.txt", files_seen=1, imported=1)
+        session.add(job)
+        session.commit()
+        job_id = job.id
+
+    job = run_import(job_id, batch_size=1, workers=0)
+    assert job.status == "completed"
+    assert job.files_seen == 3
+    assert job.imported == 3
+    assert job.last_key == "b/third.txt"
+
+
+def test_dc_xml_round_trip():
+    created = client.post(
+        "/api/items",
+        json={"title": "Round Trip", "date": "1901", "creators": ["A. Smith", "B. Jones"], "subjects": ["Harbor"]},
+    ).json()
+    xml = client.get("/api/export/dc", params={"ids": created["id"]}).content
+
+    resp = client.post("/api/import/dc", files={"file": ("records.xml", xml, "application/xml")})
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert result["format"] == "xml"
+    assert result["imported"] == 1
+
+    copies = [it for it in client.get("/api/items", params={"q": "Round"}).json() if it["id"] != created["id"]]
+    assert len(copies) == 1
+    assert copies[0]["creators"] == ["A. Smith", "B. Jones"]
+    assert copies[0]["date"] == "1901"
+
+
+def test_dc_csv_import_skips_invalid_rows():
+    body = "title,creator,subject\nHarbor Map,Cartographer;Engraver,Maps\n,Nobody,Orphan\n"
+    resp = client.post("/api/import/dc", files={"file": ("records.csv", body.encode(), "text/csv")})
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert result["format"] == "csv"
+    assert (result["records"], result["imported"], result["invalid"]) == (2, 1, 1)
+
+    harbor = [it for it in client.get("/api/items", params={"q": "Harbor"}).json() if it["title"] == "Harbor Map"]
+    assert harbor and harbor[0]["creators"] == ["Cartographer", "Engraver"]
+
+
+def test_dc_import_rejects_malformed_xml():
+    resp = client.post("/api/import/dc", files={"file": ("bad.xml", b"<records><record>", "application/xml")})
+    assert resp.status_code == 400
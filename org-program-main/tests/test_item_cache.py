@@ -0,0 +1,69 @@
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api.main import app
+from api.services import item_cache
+from api.services.cache import SqliteCacheStore
+
+
+client = TestClient(app)
+
+
+def test_repeat_reads_are_served_from_cache():
+    item = client.post("/api/items", json={"title": "Cached vase", "subjects": ["ceramics"]}).json()
+    first = client.get(f"/api/items/{item['id']}")
+    hits = item_cache.item_read_cache.hits
+    second = client.get(f"/api/items/{item['id']}")
+    assert item_cache.item_read_cache.hits == hits + 1
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.json()["subjects"] == ["ceramics"]
+
+
+def test_writes_invalidate_cached_payloads():
+    item = client.post("/api/items", json={"title": "Before"}).json()
+    url = f"/api/items/{item['id']}"
+    etag = client.get(url).headers["etag"]
+
+    client.put(url, json={"title": "After"})
+    resp = client.get(url)
+    assert resp.json()["title"] == "After"
+    assert resp.headers["etag"] != etag
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), (0, 80, 160)).save(buffer, "PNG")
+    client.post(f"{url}/assets", files={"file": ("scan.png", buffer.getvalue(), "image/png")})
+    assert len(client.get(url).json()["assets"]) == 1
+
+    gone = client.post("/api/items", json={"title": "Deleted"}).json()
+    client.get(f"/api/items/{gone['id']}")
+    client.delete(f"/api/items/{gone['id']}")
+    assert client.get(f"/api/items/{gone['id']}").status_code == 404
+
+
+def test_not_modified_skips_the_payload():
+    item = client.post("/api/items", json={"title": "Conditional"}).json()
+    url = f"/api/items/{item['id']}"
+    etag = client.get(url).headers["etag"]
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.content == b""
+
+
+def test_shared_tier_serves_other_workers(tmp_path, monkeypatch):
+    shared = SqliteCacheStore("item_read_shared", str(tmp_path / "cache.db"), maxsize=100)
+    monkeypatch.setattr(item_cache, "item_read_shared", shared)
+    item = client.post("/api/items", json={"title": "Shared"}).json()
+    body = client.get(f"/api/items/{item['id']}").content
+
+    # A cold process-local tier (another worker) is filled from the shared file
+    item_cache.item_read_cache.clear()
+    hits = shared.hits
+    assert client.get(f"/api/items/{item['id']}").content == body
+    assert shared.hits == hits + 1
+
+    # A stale version in the shared file is never served
+    shared.put(item["id"], "1999-01-01T00:00:00", b"{}")
+    item_cache.item_read_cache.clear()
+    assert client.get(f"/api/items/{item['id']}").json()["title"] == "Shared"
@@ -0,0 +1,62 @@
+import io
+
+from fastapi.testclient import TestClient
+
+from api.db import _backfill_item_summary, engine
+from api.main import app
+
+
+client = TestClient(app)
+
+
+def _summary(item_id: str) -> dict:
+    rows = client.get("/api/items/summary", params={"limit": 1000}).json()
+    return next(row for row in rows if row["item_id"] == item_id)
+
+
+def test_summary_follows_item_and_asset_writes():
+    item_id = client.post("/api/items", json={"title": "Summary album", "type": "photo", "date": "1931"}).json()["id"]
+    summary = _summary(item_id)
+    assert (summary["title"], summary["type"], summary["date_start"]) == ("Summary album", "photo", 19310101)
+    assert (summary["asset_count"], summary["total_bytes"], summary["primary_asset_id"]) == (0, 0, None)
+
+    files = [("files", (f"leaf-{n}.txt", b"x" * (n + 1) * 10, "text/plain")) for n in range(3)]
+    assets = client.post(f"/api/items/{item_id}/assets/batch", files=files).json()
+    single = client.post(f"/api/items/{item_id}/assets", files={"file": ("cover.txt", io.BytesIO(b"cover"), "text/plain")}).json()
+    summary = _summary(item_id)
+    assert (summary["asset_count"], summary["total_bytes"]) == (4, 10 + 20 + 30 + 5)
+    assert summary["primary_asset_id"] == assets[0]["id"]  # first attached until one is chosen
+
+    resp = client.put(f"/api/items/{item_id}/assets/{single['id']}/primary")
+    assert resp.status_code == 200
+    assert resp.json()["primary_asset_id"] == single["id"]
+    assert resp.json()["primary_file_path"] == single["file_path"]
+    item = client.get(f"/api/items/{item_id}").json()
+    assert [a["id"] for a in item["assets"] if a["is_primary"]] == [single["id"]]
+    assert client.put(f"/api/items/{item_id}/assets/{item_id}/primary").status_code == 404
+
+    client.put(f"/api/items/{item_id}", json={"title": "Renamed album", "date": "1890s"})
+    summary = _summary(item_id)
+    assert (summary["title"], summary["date_start"], summary["date_end"]) == ("Renamed album", 18900101, 18991231)
+
+
+def test_summary_listing_and_delete():
+    first = client.post("/api/items", json={"title": "Summary ledger", "date": "1502"}).json()["id"]
+    second = client.post("/api/items", json={"title": "Summary map", "date": "1501"}).json()["id"]
+    rows = client.get("/api/items/summary", params={"date_from": "1500", "date_to": "1509", "sort": "date"}).json()
+    assert [row["item_id"] for row in rows] == [second, first]
+    newest = client.get("/api/items/summary", params={"limit": 1}).json()
+    assert [row["item_id"] for row in newest] == [second]
+    assert client.get("/api/items/summary", params={"date_from": "someday"}).status_code == 422
+
+    assert client.delete(f"/api/items/{second}").status_code == 204
+    rows = client.get("/api/items/summary", params={"date_from": "1500", "date_to": "1509"}).json()
+    assert [row["item_id"] for row in rows] == [first]
+
+
+def test_migration_backfills_missing_summaries():
+    item_id = client.post("/api/items", json={"title": "Backfill summary"}).json()["id"]
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM itemsummary WHERE item_id = ?", (item_id.replace("-", ""),))
+        _backfill_item_summary(conn)
+    assert _summary(item_id)["title"] == "Backfill summary"
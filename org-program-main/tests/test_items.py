@@ -63,3 +63,9 @@ def test_upload_asset(tmp_path):
     assert data["bytes"] == 11
     assert data["checksum"]
 
+    # A second file with the same name gets its own object; the first keeps its bytes
+    again = client.post(f"/api/items/{item_id}/assets", files={"file": ("example.txt", b"other text", "text/plain")}).json()
+    assert again["file_path"] != data["file_path"]
+    with open(data["file_path"], "rb") as f:
+        assert f.read() == b"hello world"
+
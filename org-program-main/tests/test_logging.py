@@ -0,0 +1,63 @@
+import io
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.logs import JsonFormatter, RequestIdFilter, RequestIdMiddleware, SampleFilter
+from api.main import app
+
+
+client = TestClient(app)
+
+
+def _capture(logger: logging.Logger) -> io.StringIO:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    return stream
+
+
+def test_request_id_is_echoed_and_generated():
+    resp = client.get("/health", headers={"X-Request-ID": "abc-123"})
+    assert resp.headers["x-request-id"] == "abc-123"
+    generated = client.get("/health").headers["x-request-id"]
+    assert len(generated) == 32
+
+
+def test_json_records_carry_request_id_and_extra_fields():
+    logger = logging.getLogger("tests.logging.request")
+    logger.setLevel(logging.INFO)
+    stream = _capture(logger)
+    mini = FastAPI()
+    mini.add_middleware(RequestIdMiddleware)
+
+    @mini.get("/work")
+    def work():
+        logger.info("did %s", "work", extra={"items": 3})
+        return {}
+
+    TestClient(mini).get("/work", headers={"X-Request-ID": "req-42"})
+    logger.info("outside a request")
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["msg"] == "did work" and first["items"] == 3
+    assert first["request_id"] == "req-42" and first["level"] == "INFO"
+    assert second["request_id"] is None
+
+
+def test_sampling_keeps_one_in_n_but_all_warnings():
+    logger = logging.getLogger("tests.logging.sampled")
+    logger.setLevel(logging.DEBUG)
+    logger.addFilter(SampleFilter(10))
+    stream = _capture(logger)
+    for i in range(25):
+        logger.debug("file %d", i)
+    logger.warning("always kept")
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["msg"] for r in records] == ["file 0", "file 10", "file 20", "always kept"]
+    assert records[0]["sampled"] == 10
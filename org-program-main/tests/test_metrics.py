@@ -0,0 +1,66 @@
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from api import metrics
+from api.main import app
+
+
+client = TestClient(app)
+
+
+def _sample(text: str, name: str) -> float:
+    # Value of the first exposition line starting with `name`
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not found")
+
+
+def test_request_metrics_use_route_templates():
+    item = client.post("/api/items", json={"title": "Metrics item"}).json()
+    resp = client.get(f"/api/items/{item['id']}")
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    assert timing.startswith("app;dur=") and "db;dur=" in timing
+
+    route = "/api/items/{item_id}"
+    assert metrics.HTTP_REQUESTS.value("GET", route, "200") >= 1
+    assert metrics.REQUEST_QUERIES.count(route) >= 1
+
+    text = client.get("/metrics").text
+    assert 'org_http_requests_total{method="GET",route="/api/items/{item_id}",status="200"}' in text
+    assert 'org_http_request_duration_seconds_bucket{method="GET",route="/api/items/{item_id}",le="+Inf"}' in text
+    assert _sample(text, "org_db_queries_total") > 0
+    assert 'org_db_pool_connections{state="checkedout"}' in text
+    # Raw ids never become label values
+    assert item["id"] not in text
+
+
+def test_upload_records_stage_timings():
+    item = client.post("/api/items", json={"title": "Staged upload"}).json()
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 10, 10)).save(buffer, "JPEG")
+    before = metrics.STAGE_LATENCY.count("exif")
+    resp = client.post(
+        f"/api/items/{item['id']}/assets",
+        files={"file": ("stage.jpg", buffer.getvalue(), "image/jpeg")},
+    )
+    assert resp.status_code == 201
+    assert metrics.STAGE_LATENCY.count("exif") == before + 1
+    text = client.get("/metrics").text
+    for name in ("store", "exif", "phash", "ocr", "enrich", "fts"):
+        assert f"{name};dur=" in resp.headers["server-timing"]
+        assert f'org_stage_duration_seconds_count{{stage="{name}"}}' in text
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = metrics.Histogram("t_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(value, "/x")
+    lines = hist.render()
+    assert 't_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{route="/x"} 4' in lines
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from api import profiling
+from api.main import create_app
+
+
+def _client(monkeypatch) -> TestClient:
+    monkeypatch.setenv("SQL_PROFILE", "on")
+    return TestClient(create_app())
+
+
+def test_profile_header_and_debug_endpoint(monkeypatch):
+    client = _client(monkeypatch)
+    created = client.post("/api/items", json={"title": "Profiled lighthouse"})
+    assert created.status_code == 201
+    assert created.headers["x-sql-profile"].startswith("queries=")
+
+    resp = client.get("/api/items", params={"q": "lighthouse"}, headers={"X-Request-ID": "profile-search"})
+    assert resp.status_code == 200
+
+    summaries = client.get("/api/debug/sql").json()
+    assert summaries[0]["request_id"] == "profile-search"
+    assert summaries[0]["queries"] >= 2
+
+    detail = client.get("/api/debug/sql/profile-search").json()
+    statements = detail["statements"]
+    assert any("item_fts MATCH" in s["sql"] for s in statements)
+    # SELECTs carry their plan and the application line that issued them
+    fts = next(s for s in statements if "item_fts MATCH" in s["sql"])
+    assert fts["plan"] and fts["where"].startswith("routers/items.py:")
+    assert detail["top"][0]["count"] >= 1
+
+    assert client.get("/api/debug/sql/missing").status_code == 404
+
+
+def test_slow_queries_are_logged(monkeypatch):
+    client = _client(monkeypatch)
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 0.0)
+    seen = []
+    monkeypatch.setattr(profiling.logger, "warning", lambda msg, *args, **kwargs: seen.append(kwargs["extra"]["sql"]))
+    client.get("/api/items", params={"q": "anything"})
+    assert any("item_fts" in sql for sql in seen)
+
+
+def test_expanded_in_lists_normalise_to_one_statement():
+    a = profiling.normalize("SELECT * FROM item WHERE id IN (?, ?, ?)")
+    b = profiling.normalize("SELECT *  FROM item\n WHERE id IN (?,?)")
+    assert a == b == "SELECT * FROM item WHERE id IN (?, ...)"
+
+
+def test_profiling_is_off_by_default():
+    client = TestClient(create_app())
+    resp = client.get("/api/items")
+    assert "x-sql-profile" not in resp.headers
+    assert client.get("/api/debug/sql").status_code == 404
@@ -0,0 +1,73 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.responses import CompressionMiddleware, FastJSONResponse, compress_body, select_json_response_class
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, allow_brotli=False)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse("archive " * 500)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 300, b"b" * 300]), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n"]), media_type="text/event-stream")
+
+    return app
+
+
+client = TestClient(_app())
+
+
+def test_large_response_is_gzipped_when_accepted():
+    resp = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert int(resp.headers["content-length"]) < 4000
+    assert resp.text == "archive " * 500
+    assert "Accept-Encoding" in resp.headers["vary"]
+
+
+def test_small_or_unnegotiated_responses_are_untouched():
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+
+def test_streams_are_compressed_incrementally_but_event_streams_are_not():
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == b"a" * 300 + b"b" * 300
+
+    events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in events.headers
+    assert events.text == "data: 1\n\n"
+
+
+def test_fast_json_response_renders_compact_json():
+    body = FastJSONResponse({"title": "Café", "n": [1, 2]}).body
+    assert json.loads(body) == {"title": "Café", "n": [1, 2]}
+    assert b" " not in body
+
+
+def test_json_response_selection():
+    assert select_json_response_class("orjson") is FastJSONResponse
+    assert select_json_response_class("default") is None
+
+
+def test_gzip_helper_round_trips():
+    assert gzip.decompress(compress_body(b"x" * 1000, "gzip", 6)) == b"x" * 1000
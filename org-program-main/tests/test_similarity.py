@@ -0,0 +1,46 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.services.similarity import rebuild_similarity, term_counts, vectorize
+
+
+client = TestClient(app)
+
+
+def _create(title: str, description: str, subjects=()) -> str:
+    resp = client.post("/api/items", json={"title": title, "description": description, "subjects": list(subjects)})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def test_vectors_are_normalised_and_skip_stopwords():
+    counts = term_counts("The Harbor Lighthouse", "lighthouse keeper log", ["maritime"], "")
+    assert "the" not in counts
+    assert counts["lighthouse"] == 3  # title counts twice
+    vector = vectorize(counts, {"lighthouse": 1, "harbor": 5, "keeper": 1, "log": 1, "maritime": 2}, 10)
+    assert abs(sum(w * w for _, w in vector) - 1) < 1e-9
+
+
+def test_similar_items_built_offline_and_refreshed_on_write():
+    tag = uuid.uuid4().hex[:8]
+    lighthouse = _create(f"Zephyrine lighthouse {tag}", "Keeper's log of the zephyrine lighthouse beacon", ["maritime"])
+    beacon = _create(f"Zephyrine beacon {tag}", "Lighthouse beacon lamp of zephyrine point", ["maritime"])
+    _create(f"Quilted blanket {tag}", "Hand stitched quilt with floral pattern", ["textiles"])
+
+    rebuild_similarity()
+    similar = client.get(f"/api/items/{lighthouse}/similar").json()
+    assert similar and similar[0]["id"] == beacon
+    assert 0 < similar[0]["score"] <= 1
+
+    # A new item sharing vocabulary shows up without a rebuild (refresh runs after the write)
+    keeper = _create(f"Zephyrine lighthouse keeper {tag}", "Portrait of the zephyrine lighthouse keeper", ["maritime"])
+    assert keeper in [s["id"] for s in client.get(f"/api/items/{lighthouse}/similar").json()]
+    assert client.get("/api/similarity").json()["pending_changes"] == 0
+
+    # Deleted items disappear from their neighbours' lists
+    client.delete(f"/api/items/{beacon}")
+    assert beacon not in [s["id"] for s in client.get(f"/api/items/{lighthouse}/similar").json()]
+
+    assert client.get(f"/api/items/{uuid.uuid4()}/similar").status_code == 404
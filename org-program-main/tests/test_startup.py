@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from api import db
+from api.main import create_app
+
+
+def test_import_does_no_database_work(tmp_path):
+    # A fresh interpreter importing api.main must not create the database file
+    target = tmp_path / "untouched.db"
+    code = "import api.main, os, sys; sys.exit(os.path.exists(sys.argv[1]))"
+    env = {"DATABASE_URL": f"sqlite:///{target}", "UPLOAD_DIR": str(tmp_path / "up"), "PATH": ""}
+    result = subprocess.run([sys.executable, "-c", code, str(target)], env=env, cwd=str(Path(__file__).parents[1]))
+    assert result.returncode == 0
+    assert not target.exists()
+
+
+def test_migrate_stamps_version_and_lifespan_checks_it(monkeypatch):
+    assert db.migrate() == db.SCHEMA_VERSION
+    assert db.schema_version() == db.SCHEMA_VERSION
+
+    # A current database needs no migration at worker boot
+    monkeypatch.setattr(db, "_schema_ready", False)
+    calls = []
+    monkeypatch.setattr(db, "migrate", lambda: calls.append(1))
+    with TestClient(create_app()) as client:
+        assert client.get("/health").status_code == 200
+    assert calls == []
@@ -0,0 +1,67 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.services.suggest import TermDictionary, fts_prefix_query
+
+
+client = TestClient(app)
+
+
+def _create(title: str, subjects=(), creators=()) -> str:
+    resp = client.post("/api/items", json={"title": title, "subjects": list(subjects), "creators": list(creators)})
+    assert resp.status_code == 201, resp.text
+    return resp.json()["id"]
+
+
+def test_term_dictionary_ranks_prefix_matches_by_count():
+    terms = TermDictionary()
+    terms.add(["Harbor"])
+    terms.add(["harbor", "Harvest"])
+    terms.add(["Harvest", "Hats"])
+    terms.add(["harvest"])
+    assert terms.complete("har", 5) == [("Harvest", 3), ("Harbor", 2)]
+    terms.remove(["Harvest", "Harvest", "Harvest"])
+    assert terms.complete("HA", 5) == [("Harbor", 2), ("Hats", 1)]
+    assert len(terms) == 2
+
+
+def test_fts_prefix_query_only_stars_the_last_word():
+    assert fts_prefix_query("Light ho") == 'title : ("light" AND "ho"*)'
+    assert fts_prefix_query("harbor ") == 'title : ("harbor")'
+    assert fts_prefix_query("harbor l") == 'title : ("harbor")'
+    assert fts_prefix_query("l") is None
+    assert fts_prefix_query('"*') is None
+
+
+def test_suggest_titles_subjects_and_creators():
+    tag = uuid.uuid4().hex[:8]
+    item_id = _create(f"Quorvane lighthouse {tag}", [f"quorvane-{tag} maritime"], [f"Quorvane-{tag}, Ada"])
+    _create(f"Quorvane harbor {tag}", [f"quorvane-{tag} maritime"])
+
+    resp = client.get("/api/suggest", params={"prefix": "quorvane li"})
+    assert resp.status_code == 200
+    assert [t["id"] for t in resp.json()["titles"]] == [item_id]
+
+    body = client.get("/api/suggest", params={"prefix": f"QUORVANE-{tag}"}).json()
+    assert body["subjects"] == [{"value": f"quorvane-{tag} maritime", "count": 2}]
+    assert body["creators"] == [{"value": f"Quorvane-{tag}, Ada", "count": 1}]
+
+
+def test_suggestions_follow_item_writes():
+    tag = uuid.uuid4().hex[:8]
+    item_id = _create(f"Item {tag}", [f"zyx-{tag}-old"])
+    params = {"prefix": f"zyx-{tag}", "fields": "subjects"}
+    assert client.get("/api/suggest", params=params).json() == {"prefix": f"zyx-{tag}", "subjects": [{"value": f"zyx-{tag}-old", "count": 1}]}
+
+    resp = client.put(f"/api/items/{item_id}", json={"subjects": [f"zyx-{tag}-new"]})
+    assert resp.status_code == 200, resp.text
+    assert [s["value"] for s in client.get("/api/suggest", params=params).json()["subjects"]] == [f"zyx-{tag}-new"]
+
+    assert client.delete(f"/api/items/{item_id}").status_code == 204
+    assert client.get("/api/suggest", params=params).json()["subjects"] == []
+
+
+def test_unknown_field_is_rejected():
+    assert client.get("/api/suggest", params={"prefix": "a", "fields": "rights"}).status_code == 422
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from api.db import _backfill_date_range, engine
+from api.main import app
+from api.services.dates import parse_date_range
+
+
+client = TestClient(app)
+
+
+def test_parse_date_range_forms():
+    assert parse_date_range("1931-07-04") == (19310704, 19310704)
+    assert parse_date_range("1931:07:04 10:11:12") == (19310704, 19310704)  # EXIF
+    assert parse_date_range("July 1931") == (19310701, 19310731)
+    assert parse_date_range("4 July 1931") == parse_date_range("July 4, 1931") == (19310704, 19310704)
+    assert parse_date_range("1931") == (19310101, 19311231)
+    assert parse_date_range("1890s") == (18900101, 18991231)
+    assert parse_date_range("c. 1890") == parse_date_range("1890?") == (18850101, 18951231)
+    assert parse_date_range("1890-95") == parse_date_range("between 1890 and 1895") == (18900101, 18951231)
+    assert parse_date_range("1931-07-04/1931-07-10") == (19310704, 19310710)
+    assert parse_date_range("1931-07-04-1931-07-10") == (19310704, 19310710)
+    assert parse_date_range("19th century") == (18000101, 18991231)
+    for unreadable in ("undated", "1931-02-30", "2023-02-30", "1931-07-32", "1931-02-29", "1895-1890", "", None):
+        assert parse_date_range(unreadable) is None
+
+
+def test_date_columns_follow_writes_and_filter_listing():
+    first = client.post("/api/items", json={"title": "Timeline ledger", "date": "1702-03-09"}).json()
+    second = client.post("/api/items", json={"title": "Timeline map", "date": "circa 1704"}).json()
+    undated = client.post("/api/items", json={"title": "Timeline scrap", "date": "no idea"}).json()
+    assert (first["date_start"], first["date_end"]) == (17020309, 17020309)
+    assert undated["date_start"] is None
+
+    def listed(**params):
+        return [it["id"] for it in client.get("/api/items", params={"sort": "date", **params}).json()]
+
+    assert listed(date_from="1700", date_to="1701") == [second["id"]]  # 1699-1709 overlaps
+    ids = listed(date_from="1698", date_to="1703")
+    assert ids.index(second["id"]) < ids.index(first["id"])  # sorted by first possible day
+    assert listed(q="Timeline", date_from="1702-03", date_to="1702-03") == [second["id"], first["id"]]
+    assert listed(q="Timeline", date_from="1710", date_to="1720") == []
+
+    resp = client.put(f"/api/items/{first['id']}", json={"date": "1710"})
+    assert (resp.json()["date_start"], resp.json()["date_end"]) == (17100101, 17101231)
+    assert client.get("/api/items", params={"date_from": "someday"}).status_code == 422
+
+
+def test_timeline_histogram():
+    client.post("/api/items", json={"title": "Histogram a", "date": "1601-05-02"})
+    client.post("/api/items", json={"title": "Histogram b", "date": "May 1601"})
+    client.post("/api/items", json={"title": "Histogram c", "date": "1603"})
+
+    years = client.get("/api/timeline", params={"date_from": "1600", "date_to": "1609"}).json()
+    assert years["buckets"] == [{"period": "1601", "count": 2}, {"period": "1603", "count": 1}]
+    assert years["dated"] == 3 and years["unplaced"] == 0
+
+    months = client.get("/api/timeline", params={"granularity": "month", "date_from": "1600", "date_to": "1609"}).json()
+    assert months["buckets"] == [{"period": "1601-05", "count": 2}]
+    assert months["unplaced"] == 1  # "1603" has no month
+    assert months["undated"] >= 0
+
+
+def test_migration_backfills_existing_dates():
+    item = client.post("/api/items", json={"title": "Backfill item", "date": "1650s"}).json()
+    with engine.begin() as conn:
+        # As written before the columns existed
+        conn.exec_driver_sql("UPDATE item SET date_start = NULL, date_end = NULL WHERE id = ?", (item["id"].replace("-", ""),))
+        _backfill_date_range(conn)
+        row = conn.exec_driver_sql("SELECT date_start, date_end FROM item WHERE id = ?", (item["id"].replace("-", ""),)).one()
+    assert tuple(row) == (16500101, 16591231)